@@ -0,0 +1,66 @@
+"""
+Arabic text preparation for PDF output
+
+ReportLab draws glyphs in logical order without contextual shaping, so Arabic
+must be reshaped into presentation forms and reordered for display before it
+reaches a Paragraph. Browsers do this themselves, so HTML only needs RTL markup.
+The fixed UI strings, fallback questions and medical terms are prepared once;
+only session free text (patient answers, assessment explanation and
+recommendations) is shaped per render.
+"""
+import logging
+import re
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Mapping
+
+try:
+    import arabic_reshaper
+    from bidi.algorithm import get_display
+except ImportError:  # Optional: pip install arabic-reshaper python-bidi
+    arabic_reshaper = None
+    get_display = None
+
+from medical_knowledge import get_fallback_questions
+from translations import get_translations, get_medical_terms
+
+logger = logging.getLogger(__name__)
+
+_ARABIC_CHARS = re.compile(r'[\u0600-\u06FF\u0750-\u077F\u08A0-\u08FF\uFB50-\uFDFF\uFE70-\uFEFF]')
+
+def is_arabic(text: str) -> bool:
+    """True if the text contains any Arabic script characters"""
+    return bool(text) and _ARABIC_CHARS.search(text) is not None
+
+def shaping_available() -> bool:
+    """True if the reshaper and bidi libraries are installed"""
+    return arabic_reshaper is not None and get_display is not None
+
+def shape_text(text: str) -> str:
+    """Reshape and bidi-reorder text for PDF rendering (uncached)"""
+    if not shaping_available() or not is_arabic(text):
+        return text
+    try:
+        return get_display(arabic_reshaper.reshape(text))
+    except Exception as e:
+        logger.error(f"Arabic shaping error: {e}")
+        return text
+
+@lru_cache(maxsize=None)
+def get_static_shaped() -> Mapping[str, str]:
+    """Shaped output for every fixed Arabic string, built once per process"""
+    static_strings = set(get_translations('ar').values())
+    static_strings.update(get_fallback_questions()['ar'])
+    static_strings.update(get_medical_terms('ar').values())
+
+    if not shaping_available():
+        logger.info("arabic-reshaper/python-bidi not installed; Arabic PDF text left unshaped")
+
+    return MappingProxyType({text: shape_text(text) for text in static_strings if is_arabic(text)})
+
+def prepare_pdf_text(text: str) -> str:
+    """Return PDF-ready text, using the precomputed table for fixed strings"""
+    shaped = get_static_shaped().get(text)
+    if shaped is not None:
+        return shaped
+    return shape_text(text)
@@ -0,0 +1,49 @@
+"""
+PDF report throughput: per-instance style setup (before) vs shared registry (after)
+
+Usage: python -m benchmarks.bench_report_pdf [--seconds 5] [--size 10]
+"""
+import argparse
+import time
+
+import report_generator
+from benchmarks.synthetic import make_report_data
+
+def _reset_shared_state():
+    report_generator.get_report_font.cache_clear()
+    report_generator.get_report_styles.cache_clear()
+    report_generator.get_static_fragments.cache_clear()
+
+def run(mode: str, seconds: float, report_data) -> float:
+    """Return PDFs per second for ``mode`` ('cold' or 'shared')"""
+    shared = report_generator.ReportGenerator()
+    count = 0
+    deadline = time.perf_counter() + seconds
+    start = time.perf_counter()
+    while time.perf_counter() < deadline:
+        if mode == "cold":
+            # Mimic the old behaviour: rebuild styles, font lookup and fragments per generator
+            _reset_shared_state()
+            generator = report_generator.ReportGenerator()
+        else:
+            generator = shared
+        generator.generate_pdf_report(report_data)
+        count += 1
+    return count / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--size", type=int, default=10, help="Q&A pairs per report")
+    args = parser.parse_args()
+
+    report_data = make_report_data(args.size)
+    cold = run("cold", args.seconds, report_data)
+    shared = run("shared", args.seconds, report_data)
+
+    print(f"before (per-instance setup): {cold:8.1f} PDFs/s")
+    print(f"after  (shared registry):    {shared:8.1f} PDFs/s")
+    print(f"speedup: {shared / cold:.2f}x")
+
+if __name__ == "__main__":
+    main()
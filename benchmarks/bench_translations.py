@@ -0,0 +1,34 @@
+"""
+Translation lookup microbenchmark: per-call dict rebuild (before) vs frozen catalog (after)
+
+Usage: python -m benchmarks.bench_translations [--number 100000]
+"""
+import argparse
+import json
+import timeit
+
+import translations
+
+def legacy_get_translations(language: str):
+    # Old behaviour: both language dicts rebuilt on every call, then one indexed,
+    # with the templates serializing the result again on each render
+    catalog = {lang: dict(entries) for lang, entries in translations._TRANSLATIONS_SOURCE.items()}
+    return catalog.get(language, catalog['en'])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--number", type=int, default=100000)
+    args = parser.parse_args()
+
+    cases = {
+        "before: rebuild dicts": lambda: legacy_get_translations("ar"),
+        "before: rebuild + json.dumps": lambda: json.dumps(legacy_get_translations("ar"), ensure_ascii=False),
+        "after: get_translations": lambda: translations.get_translations("ar"),
+        "after: get_translations_json": lambda: translations.get_translations_json("ar"),
+    }
+    for name, func in cases.items():
+        seconds = timeit.timeit(func, number=args.number)
+        print(f"{name:32s} {seconds / args.number * 1e9:10.1f} ns/call")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Per-turn latency of the chat flow: /submit-answer + /question (before) vs /turn (after)
+
+Each HTTP request pays one simulated network round trip, so the comparison shows
+the saving on typical mobile links. Question generation uses the fallback path
+so Gemini latency doesn't mask the transport difference.
+
+Usage: python -m benchmarks.bench_turn_latency [--turns 8]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+import httpx
+
+# Every simulated turn comes from the same client address
+os.environ.setdefault("GRAVILOG_ADMISSION_CLIENT_RATE", "0")
+
+import main
+from benchmarks.synthetic import SAMPLE_ANSWERS
+
+# Typical round-trip times in seconds
+NETWORK_PROFILES = {
+    "wifi": 0.020,
+    "4g": 0.070,
+    "3g": 0.300,
+}
+
+class SimulatedRTTTransport(httpx.AsyncBaseTransport):
+    """ASGI transport that adds a fixed round-trip delay to every request"""
+
+    def __init__(self, app, rtt: float):
+        self.inner = httpx.ASGITransport(app=app)
+        self.rtt = rtt
+
+    async def handle_async_request(self, request):
+        await asyncio.sleep(self.rtt)
+        return await self.inner.handle_async_request(request)
+
+async def run_session(client: httpx.AsyncClient, mode: str, turns: int):
+    response = await client.post("/start-session", data={"language": "en"})
+    session_id = response.json()["session_id"]
+    await client.post(f"/patient-info/{session_id}", data={"name": "Bench", "age": 30, "gestational_week": 20})
+    await client.get(f"/question/{session_id}")
+
+    answers = SAMPLE_ANSWERS["en"]
+    latencies = []
+    for i in range(turns):
+        answer = answers[i % len(answers)]
+        start = time.perf_counter()
+        if mode == "split":
+            await client.post(f"/submit-answer/{session_id}", data={"answer": answer})
+            data = (await client.get(f"/question/{session_id}")).json()
+        else:
+            data = (await client.post(f"/turn/{session_id}", data={"answer": answer})).json()["next"]
+        latencies.append(time.perf_counter() - start)
+        if not data.get("question"):
+            break
+    return latencies
+
+async def run(turns: int):
+    main.rag_system.override(None)
+    print(f"{'network':8s} {'split p50 ms':>13s} {'turn p50 ms':>12s} {'saved ms':>9s}")
+    for name, rtt in NETWORK_PROFILES.items():
+        results = {}
+        for mode in ("split", "turn"):
+            transport = SimulatedRTTTransport(main.app, rtt)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                results[mode] = statistics.median(await run_session(client, mode, turns)) * 1000
+        print(f"{name:8s} {results['split']:13.1f} {results['turn']:12.1f} {results['split'] - results['turn']:9.1f}")
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--turns", type=int, default=8)
+    args = parser.parse_args()
+    asyncio.run(run(args.turns))
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,127 @@
+"""
+Cold-start import report for main.py from ``python -X importtime``
+
+Runs ``import main`` in fresh interpreters, reports the median wall time, the
+slowest modules by cumulative import time, and whether the heavy optional
+subsystems (google.genai, reportlab) were pulled in. With --baseline-ref the
+same measurement runs against another git revision checked out in a temporary
+worktree, to show the before/after.
+
+Usage: python -m benchmarks.import_time [--runs 5] [--top 15] [--baseline-ref HEAD~1] [--json]
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("google.genai", "reportlab", "reportlab.platypus", "arabic_reshaper", "report_generator")
+
+_IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+# Also list which heavy modules ended up loaded
+_PROBE = (
+    "import sys, json; import main; "
+    f"print(json.dumps({{m: m in sys.modules for m in {list(HEAVY_MODULES)!r}}}))"
+)
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """Parse ``-X importtime`` output into (module, self_us, cumulative_us, depth) records"""
+    records = []
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            records.append({
+                "module": module,
+                "self_us": int(self_us),
+                "cumulative_us": int(cumulative_us),
+                "depth": (len(indent) - 1) // 2
+            })
+    return records
+
+def measure(cwd: str, runs: int) -> Dict[str, Any]:
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    env.pop("GEMINI_API_KEY", None)
+    wall_times = []
+    records: List[Dict[str, Any]] = []
+    loaded: Dict[str, bool] = {}
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", _PROBE],
+            cwd=cwd, env=env, capture_output=True, text=True
+        )
+        wall_times.append(time.perf_counter() - start)
+        if result.returncode != 0:
+            raise RuntimeError(f"import main failed in {cwd}:\n{result.stderr[-2000:]}")
+        records = parse_importtime(result.stderr)
+        loaded = json.loads(result.stdout.strip().splitlines()[-1])
+
+    main_record = next((r for r in records if r["module"] == "main"), None)
+    return {
+        "wall_ms_median": round(statistics.median(wall_times) * 1000, 1),
+        "import_main_ms": round(main_record["cumulative_us"] / 1000, 1) if main_record else None,
+        "modules_imported": len(records),
+        "heavy_modules_loaded": loaded,
+        "slowest": sorted(records, key=lambda r: r["cumulative_us"], reverse=True)
+    }
+
+def measure_ref(ref: str, runs: int) -> Dict[str, Any]:
+    """Measure another revision in a throwaway git worktree"""
+    worktree = tempfile.mkdtemp(prefix="gravilog-importtime-")
+    try:
+        subprocess.run(["git", "worktree", "add", "--detach", worktree, ref],
+                       cwd=REPO_ROOT, check=True, capture_output=True)
+        return measure(worktree, runs)
+    finally:
+        subprocess.run(["git", "worktree", "remove", "--force", worktree], cwd=REPO_ROOT, capture_output=True)
+        shutil.rmtree(worktree, ignore_errors=True)
+
+def print_report(label: str, report: Dict[str, Any], top: int):
+    print(f"== {label}")
+    print(f"wall (interpreter + import main): {report['wall_ms_median']:.1f} ms median")
+    print(f"import main (cumulative):         {report['import_main_ms']} ms")
+    print(f"modules imported:                 {report['modules_imported']}")
+    print("heavy modules loaded:             " + ", ".join(
+        f"{name}={'yes' if loaded else 'no'}" for name, loaded in report["heavy_modules_loaded"].items()))
+    print(f"{'cumulative ms':>14s} {'self ms':>9s}  module")
+    for record in report["slowest"][:top]:
+        print(f"{record['cumulative_us'] / 1000:14.1f} {record['self_us'] / 1000:9.1f}  {record['module']}")
+    print()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--baseline-ref", help="Git revision to compare against, e.g. HEAD~1")
+    parser.add_argument("--json", action="store_true", help="Emit a machine-readable report")
+    args = parser.parse_args()
+
+    reports: Dict[str, Optional[Dict[str, Any]]] = {"current": measure(REPO_ROOT, args.runs)}
+    if args.baseline_ref:
+        reports["baseline"] = measure_ref(args.baseline_ref, args.runs)
+
+    if args.json:
+        for report in reports.values():
+            report["slowest"] = report["slowest"][:args.top]
+        print(json.dumps(reports, indent=2))
+        return
+
+    if args.baseline_ref:
+        print_report(f"baseline ({args.baseline_ref})", reports["baseline"], args.top)
+    print_report("current", reports["current"], args.top)
+    if args.baseline_ref:
+        before = reports["baseline"]["wall_ms_median"]
+        after = reports["current"]["wall_ms_median"]
+        print(f"cold start: {before:.1f} ms -> {after:.1f} ms ({before / after:.2f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""
+End-to-end load test: concurrent synthetic patients driving the real app in-process
+
+Each virtual patient runs the full flow (/start-session, /patient-info, /question
+and /submit-answer per answer, /assess-risk, /generate-report) through
+httpx's ASGI transport. Gemini is replaced by an in-process stub that blocks for
+a configurable latency, so the threadpool and event loop behave as in production.
+
+Usage: python -m benchmarks.load_test [--sessions 200] [--concurrency 50]
+                                      [--gemini-latency 0.8] [--output report.json]
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+# The stub replaces the real client, but the real one refuses to construct without a key
+os.environ.setdefault("GEMINI_API_KEY", "load-test-no-calls")
+# Every virtual patient shares one client address, and the default run is past the
+# global rate on purpose; the buckets are lifted so LLM shedding is what gets measured
+os.environ.setdefault("GRAVILOG_ADMISSION_CLIENT_RATE", "0")
+os.environ.setdefault("GRAVILOG_ADMISSION_SESSION_RATE", "0")
+os.environ.setdefault("GRAVILOG_ADMISSION_GLOBAL_RATE", "0")
+
+import httpx
+
+import main
+from benchmarks.synthetic import SAMPLE_ANSWERS
+from core.llm_client import MedicalRAGSystem, ModelRouter
+from core.llm_usage import UsageTracker
+from medical_knowledge import get_fallback_questions, get_medical_knowledge
+
+PATIENT_PROFILES = [
+    {"language": "en", "name": "Load Test", "age": 28, "gestational_week": 12},
+    {"language": "en", "name": "Load Test", "age": 35, "gestational_week": 31},
+    {"language": "ar", "name": "اختبار الحمل", "age": 26, "gestational_week": 20},
+    {"language": "ar", "name": "اختبار الحمل", "age": 39, "gestational_week": 36},
+]
+
+HIGH_RISK_MARKERS = ("bleeding", "vision", "نزيف", "رؤيتي")
+
+class StubGeminiClient:
+    """Drop-in for GeminiClient that sleeps instead of calling the API"""
+
+    def __init__(self, latency: float, jitter: float = 0.0):
+        self.model = "stub"
+        # One model for every route, so assessments never escalate
+        self.router = ModelRouter({}, "stub")
+        self.latency = latency
+        self.jitter = jitter
+        self.usage = UsageTracker()
+        self.latency_observer = None
+        self.calls = 0
+
+    def generate_content(self, prompt: str, system_instruction: Optional[str] = None,
+                         call_type: str = "general", session_id: Optional[str] = None,
+                         model: Optional[str] = None) -> str:
+        self.calls += 1
+        start = time.perf_counter()
+        time.sleep(max(0.0, self.latency + random.uniform(-self.jitter, self.jitter)))
+        if self.latency_observer is not None:
+            self.latency_observer(call_type, time.perf_counter() - start)
+        arabic = "أنت" in (system_instruction or "")  # system prompts open with "أنت"
+        if call_type == "questions":
+            return "\n".join(get_fallback_questions()["ar" if arabic else "en"][:5])
+        high = any(marker in prompt for marker in HIGH_RISK_MARKERS)
+        if arabic:
+            level = "عالي" if high else "منخفض"
+        else:
+            level = "High" if high else "Low"
+        return json.dumps({
+            "risk_level": level,
+            "risk_score": 8 if high else 2,
+            "reasons": ["stub assessment"],
+            "recommendations": ["stub recommendation"]
+        }, ensure_ascii=False)
+
+class LoadRecorder:
+    """Per-endpoint latencies and error counts"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    async def request(self, client: httpx.AsyncClient, method: str, endpoint: str, url: str, **kwargs) -> httpx.Response:
+        start = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        self.latencies[endpoint].append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            self.errors[endpoint] += 1
+        return response
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+async def run_patient(client: httpx.AsyncClient, recorder: LoadRecorder, profile: Dict[str, Any],
+                      answers_per_session: int, rng: random.Random) -> bool:
+    """One full assessment; True if every step succeeded"""
+    language = profile["language"]
+    response = await recorder.request(client, "POST", "POST /start-session", "/start-session", data={"language": language})
+    if response.status_code != 200:
+        return False
+    session_id = response.json()["session_id"]
+
+    await recorder.request(client, "POST", "POST /patient-info", f"/patient-info/{session_id}", data={
+        "name": profile["name"], "age": profile["age"], "gestational_week": profile["gestational_week"]
+    })
+
+    answers = SAMPLE_ANSWERS[language]
+    for _ in range(answers_per_session):
+        question = (await recorder.request(client, "GET", "GET /question", f"/question/{session_id}")).json()
+        if not question.get("question"):
+            break
+        await recorder.request(client, "POST", "POST /submit-answer", f"/submit-answer/{session_id}",
+                               data={"answer": rng.choice(answers)})
+
+    assessment = await recorder.request(client, "GET", "GET /assess-risk", f"/assess-risk/{session_id}")
+    report = await recorder.request(client, "GET", "GET /generate-report", f"/generate-report/{session_id}")
+    return assessment.status_code == 200 and report.status_code == 200
+
+async def run(sessions: int, concurrency: int, answers_per_session: int, gemini_latency: float,
+              gemini_jitter: float, seed: int) -> Dict[str, Any]:
+    stub = StubGeminiClient(gemini_latency, gemini_jitter)
+    stub.latency_observer = main.observe_gemini_latency
+    rag = main.rag_system.get() or MedicalRAGSystem(get_medical_knowledge())
+    rag.gemini_client = stub
+    main.rag_system.override(rag)
+
+    recorder = LoadRecorder()
+    rng = random.Random(seed)
+    remaining = iter(range(sessions))
+    completed = 0
+    failed = 0
+
+    async def worker(client: httpx.AsyncClient):
+        nonlocal completed, failed
+        for index in remaining:
+            profile = PATIENT_PROFILES[index % len(PATIENT_PROFILES)]
+            try:
+                ok = await run_patient(client, recorder, profile, answers_per_session, rng)
+            except Exception:
+                ok = False
+            completed += int(ok)
+            failed += int(not ok)
+
+    transport = httpx.ASGITransport(app=main.app)
+    start = time.perf_counter()
+    async with httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=None) as client:
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+    duration = time.perf_counter() - start
+
+    total_requests = sum(len(values) for values in recorder.latencies.values())
+    total_errors = sum(recorder.errors.values())
+    return {
+        "config": {
+            "sessions": sessions,
+            "concurrency": concurrency,
+            "answers_per_session": answers_per_session,
+            "gemini_latency_seconds": gemini_latency,
+            "gemini_jitter_seconds": gemini_jitter,
+            "seed": seed
+        },
+        "duration_seconds": round(duration, 3),
+        "sessions_completed": completed,
+        "sessions_failed": failed,
+        "sessions_per_second": round(completed / duration, 3),
+        "requests_total": total_requests,
+        "requests_per_second": round(total_requests / duration, 2),
+        "errors_total": total_errors,
+        "error_rate": round(total_errors / total_requests, 4) if total_requests else 0.0,
+        "gemini_stub_calls": stub.calls,
+        "admission": main.admission.status(),
+        "endpoints": {
+            endpoint: {
+                "count": len(values),
+                "errors": recorder.errors.get(endpoint, 0),
+                "requests_per_second": round(len(values) / duration, 2),
+                "p50_ms": round(percentile(values, 50) * 1000, 2),
+                "p95_ms": round(percentile(values, 95) * 1000, 2),
+                "p99_ms": round(percentile(values, 99) * 1000, 2),
+                "max_ms": round(max(values) * 1000, 2)
+            }
+            for endpoint, values in recorder.latencies.items()
+        }
+    }
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=200, help="Total patients to simulate")
+    parser.add_argument("--concurrency", type=int, default=50, help="Patients in flight at once")
+    parser.add_argument("--answers", type=int, default=6, help="Answers per patient")
+    parser.add_argument("--gemini-latency", type=float, default=0.8, help="Stub Gemini latency in seconds")
+    parser.add_argument("--gemini-jitter", type=float, default=0.2, help="Uniform +/- jitter on the stub latency")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args.sessions, args.concurrency, args.answers,
+                             args.gemini_latency, args.gemini_jitter, args.seed))
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+
+    # Latency numbers from a run with failed requests measure error paths, not the flow
+    if report["errors_total"] or report["sessions_failed"]:
+        print(f"{report['errors_total']} failed requests, {report['sessions_failed']} failed sessions",
+              file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,108 @@
+"""
+Input tokens sent per Gemini call with and without the prompt-prefix cache
+
+Runs question generation and risk assessment over synthetic transcripts in both
+languages against a stand-in Gemini client backed by LocalCacheBackend. With the
+cache, the system instruction and knowledge base are registered once per prefix
+and each call sends only the transcript; without it, every call sends everything.
+
+The built-in knowledge base is below the API's caching minimum, so the minimum
+is lowered by default to show the mechanics; pass --min-tokens 1024 to see
+what production does with the current tables.
+
+Usage: python -m benchmarks.prompt_cache [--sessions 50] [--sizes 1 5 20] [--min-tokens 0]
+"""
+import argparse
+import json
+import os
+import statistics
+from typing import Any, Dict, List, Optional
+
+os.environ.setdefault("GEMINI_API_KEY", "benchmark-no-calls")
+
+from benchmarks.synthetic import make_responses
+from core.knowledge_store import KnowledgeStore
+from core.llm_client import MedicalRAGSystem, ModelRouter
+from core.llm_usage import UsageTracker
+from core.prompt_budget import estimate_tokens
+from core.prompt_cache import LocalCacheBackend, PromptPrefixCache
+from medical_knowledge import get_medical_knowledge
+
+class StandInGeminiClient:
+    """Counts the input tokens each request would send; expands cache references like the API"""
+
+    def __init__(self, backend: LocalCacheBackend):
+        self.backend = backend
+        self.router = ModelRouter()
+        self.model = self.router.default
+        self.usage = UsageTracker()
+        self.sent_tokens: List[int] = []
+        self.billed_tokens: List[int] = []
+
+    def generate_content(self, prompt: str, system_instruction: Optional[str] = None,
+                         call_type: str = "general", session_id: Optional[str] = None,
+                         model: Optional[str] = None, cached_content: Optional[str] = None) -> str:
+        model = model or self.router.model_for(call_type)
+        sent = estimate_tokens(prompt)
+        cached = 0
+        if cached_content:
+            _, cached_instruction, contents = self.backend.resolve(cached_content)
+            cached = estimate_tokens(cached_instruction) + estimate_tokens(contents)
+        else:
+            sent += estimate_tokens(system_instruction or "")
+        self.sent_tokens.append(sent)
+        self.billed_tokens.append(sent + cached)
+        self.usage.record(call_type, session_id, input_tokens=sent + cached, cached_tokens=cached, model=model)
+        if call_type == "questions":
+            return "Any bleeding?\nAny headaches?\nAny swelling?"
+        return json.dumps({"risk_level": "Low", "risk_score": 2, "reasons": [], "recommendations": []})
+
+def run(sessions: int, sizes: List[int], cached: bool, min_tokens: int) -> Dict[str, Any]:
+    backend = LocalCacheBackend()
+    client = StandInGeminiClient(backend)
+    rag = MedicalRAGSystem(get_medical_knowledge(), knowledge_store=KnowledgeStore())
+    rag.gemini_client = client
+    if cached:
+        rag.prompt_cache = PromptPrefixCache(backend, min_tokens=min_tokens)
+
+    for i in range(sessions):
+        language = "ar" if i % 2 else "en"
+        responses = make_responses(sizes[i % len(sizes)], language)
+        week = (8, 20, 34)[i % 3]
+        rag.generate_questions(responses, language, session_id=f"s{i}", gestational_week=week)
+        rag.assess_risk(responses, language, session_id=f"s{i}", gestational_week=week)
+
+    return {
+        "cached": cached,
+        "calls": len(client.sent_tokens),
+        "input_tokens_sent": sum(client.sent_tokens),
+        "avg_input_tokens_sent": round(statistics.mean(client.sent_tokens), 1),
+        "cached_prefix_tokens_billed": sum(client.billed_tokens) - sum(client.sent_tokens),
+        "prompt_cache": {key: value for key, value in rag.prompt_cache.stats().items() if key != "entries"}
+                        if rag.prompt_cache else None
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 5, 20])
+    parser.add_argument("--min-tokens", type=int, default=0, help="Caching minimum (API: 1024 for flash models)")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    results = [run(args.sessions, args.sizes, cached, args.min_tokens) for cached in (False, True)]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    inline, cached = results
+    print(f"{'mode':>8s} {'calls':>6s} {'tokens sent':>12s} {'avg/call':>9s}")
+    for result in results:
+        print(f"{'cached' if result['cached'] else 'inline':>8s} {result['calls']:6d} "
+              f"{result['input_tokens_sent']:12d} {result['avg_input_tokens_sent']:9.1f}")
+    saved = inline["input_tokens_sent"] - cached["input_tokens_sent"]
+    print(f"prefix cache: {cached['prompt_cache']}")
+    print(f"input tokens sent reduced by {saved} ({saved / inline['input_tokens_sent']:.1%})")
+
+if __name__ == "__main__":
+    main()
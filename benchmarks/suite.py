@@ -0,0 +1,153 @@
+"""
+Microbenchmark suite for the hot paths, with JSON baselines and regression gates
+
+Each stage runs on synthetic transcripts of increasing size in both languages.
+Timings are the median per-call time over several repeats.
+
+Usage:
+    python -m benchmarks.suite --save            # record benchmarks/baselines.json
+    python -m benchmarks.suite                   # compare; exit 1 past --threshold
+    python -m benchmarks.suite --ci              # also exit 1 if a stage has no baseline (default when CI is set)
+    python -m benchmarks.suite --only retrieve --sizes 1 20
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import timeit
+from typing import Any, Callable, Dict, List, Optional
+
+# No Gemini calls are made, but the client refuses to construct without a key
+os.environ.setdefault("GEMINI_API_KEY", "benchmark-no-calls")
+
+from benchmarks.synthetic import make_report_data, make_responses
+from core.llm_client import MedicalRAGSystem, SimpleRAGRetriever
+from medical_knowledge import get_medical_knowledge
+from report_generator import ReportGenerator
+from risk_assessment import RiskAssessment
+from translations import get_translations
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baselines.json")
+DEFAULT_SIZES = (1, 5, 20, 80)
+LANGUAGES = ("en", "ar")
+
+def _transcript_query(size: int, language: str) -> str:
+    return "".join(f"Q: {resp['question']}\nA: {resp['answer']}\n" for resp in make_responses(size, language))
+
+class Stages:
+    """Stage name -> setup(size, language) returning the zero-argument call to time"""
+
+    def __init__(self):
+        knowledge = get_medical_knowledge()
+        self.retriever = SimpleRAGRetriever(knowledge)
+        self.rag_system = MedicalRAGSystem(knowledge)
+        self.risk_assessor = RiskAssessment()
+        self.report_generator = ReportGenerator()
+
+    def setups(self) -> Dict[str, Callable[[int, str], Callable[[], Any]]]:
+        return {
+            "retrieve": lambda size, language: (
+                lambda query=_transcript_query(size, language): self.retriever.retrieve(query)),
+            "retrieve_context": lambda size, language: (
+                lambda query=_transcript_query(size, language): self.rag_system.retrieve_context(query)),
+            "rule_assess_risk": lambda size, language: (
+                lambda responses=make_responses(size, language): self.risk_assessor.assess_risk(responses, language)),
+            "fallback_risk_assessment": lambda size, language: (
+                lambda responses=make_responses(size, language): self.rag_system._fallback_risk_assessment(responses, language)),
+            "generate_pdf_report": lambda size, language: (
+                lambda data=make_report_data(size, language): self.report_generator.generate_pdf_report(data)),
+            "generate_json_report": lambda size, language: (
+                lambda data=make_report_data(size, language): self.report_generator.generate_json_report(data)),
+        }
+
+# Stages whose cost does not depend on transcript size
+UNSIZED_STAGES = {
+    "get_translations": lambda language: (lambda: get_translations(language)),
+}
+
+def measure(func: Callable[[], Any], repeat: int = 5, min_time: float = 0.2) -> float:
+    """Median seconds per call"""
+    timer = timeit.Timer(func)
+    number, elapsed = timer.autorange()
+    if elapsed < min_time:
+        number = max(1, int(number * min_time / max(elapsed, 1e-9)))
+    return statistics.median(t / number for t in timer.repeat(repeat=repeat, number=number))
+
+def run_suite(sizes: List[int], only: Optional[str] = None, repeat: int = 5) -> Dict[str, float]:
+    results: Dict[str, float] = {}
+    for language in LANGUAGES:
+        for name, setup in UNSIZED_STAGES.items():
+            if only and only not in name:
+                continue
+            key = f"{name}/{language}"
+            results[key] = measure(setup(language), repeat)
+            print(f"{key:40s} {results[key] * 1e6:12.2f} us")
+
+    stages = Stages().setups()
+    for name, setup in stages.items():
+        if only and only not in name:
+            continue
+        for language in LANGUAGES:
+            for size in sizes:
+                key = f"{name}/{language}/{size}"
+                results[key] = measure(setup(size, language), repeat)
+                print(f"{key:40s} {results[key] * 1e6:12.2f} us")
+    return results
+
+def compare(results: Dict[str, float], baselines: Dict[str, float], threshold: float) -> List[Dict[str, Any]]:
+    """Stages slower than baseline by more than ``threshold`` (0.25 = 25%)"""
+    regressions = []
+    for key, seconds in results.items():
+        baseline = baselines.get(key)
+        if baseline and seconds > baseline * (1 + threshold):
+            regressions.append({"stage": key, "baseline": baseline, "current": seconds, "ratio": round(seconds / baseline, 3)})
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="Q&A pairs per transcript")
+    parser.add_argument("--only", help="Run stages whose name contains this string")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown vs baseline (0.25 = 25%%)")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save", action="store_true", help="Write results as the new baseline")
+    parser.add_argument("--ci", action="store_true", default=bool(os.environ.get("CI")),
+                        help="Fail when the baseline file or a stage's baseline is missing")
+    args = parser.parse_args()
+
+    results = run_suite(args.sizes, args.only, args.repeat)
+
+    if args.save:
+        baselines = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baselines = json.load(f)
+        baselines.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(dict(sorted(baselines.items())), f, indent=2)
+        print(f"Saved {len(results)} baselines to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save first")
+        if args.ci:
+            sys.exit(1)
+        return
+    with open(args.baseline) as f:
+        baselines = json.load(f)
+
+    missing = [key for key in results if key not in baselines]
+    if missing:
+        print(f"{len(missing)} stages have no baseline yet: {', '.join(missing)}")
+        if args.ci:
+            sys.exit(1)
+
+    regressions = compare(results, baselines, args.threshold)
+    if regressions:
+        print(json.dumps({"regressions": regressions}, indent=2))
+        sys.exit(1)
+    print(f"All {len(results) - len(missing)} baselined stages within {args.threshold:.0%} of baseline")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Synthetic bilingual assessment transcripts for benchmarks and load tests
+"""
+from datetime import datetime
+from typing import Dict, List, Any
+
+from medical_knowledge import get_fallback_questions
+
+SAMPLE_ANSWERS = {
+    "en": [
+        "No, nothing like that so far.",
+        "I have had some mild nausea in the mornings and I feel tired most afternoons.",
+        "Yes, there was light bleeding yesterday evening with some cramping in the lower abdomen.",
+        "The baby has been moving less than usual since this morning.",
+        "I get a severe headache most days and sometimes my vision is blurry.",
+        "My feet and hands are swollen, especially in the evening, and I feel dizzy."
+    ],
+    "ar": [
+        "لا، لا شيء من هذا حتى الآن.",
+        "أعاني من غثيان خفيف في الصباح وأشعر بالتعب معظم فترات بعد الظهر.",
+        "نعم، كان هناك نزيف خفيف مساء أمس مع بعض التقلصات في أسفل البطن.",
+        "حركة الطفل أقل من المعتاد منذ هذا الصباح.",
+        "أعاني من صداع شديد معظم الأيام وأحياناً تكون رؤيتي ضبابية.",
+        "قدماي ويداي متورمتان خاصة في المساء وأشعر بدوخة."
+    ]
+}
+
+def make_responses(size: int, language: str = "en") -> List[Dict[str, str]]:
+    """Build a transcript of ``size`` question/answer pairs"""
+    questions = get_fallback_questions()[language]
+    answers = SAMPLE_ANSWERS[language]
+    return [
+        {
+            "question": questions[i % len(questions)],
+            "answer": answers[i % len(answers)],
+            "timestamp": datetime.now().isoformat()
+        }
+        for i in range(size)
+    ]
+
+def make_report_data(size: int, language: str = "en") -> Dict[str, Any]:
+    """Build report_data in the shape ReportGenerator expects"""
+    responses = make_responses(size, language)
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "language": language,
+        "original_language": language,
+        "patient_info": {"name": "Test Patient", "age": 29, "pregnancy_week": 24},
+        "risk_assessment": {
+            "risk_level": "Medium",
+            "explanation": "Reported symptoms include nausea and intermittent headaches.",
+            "recommendations": "Contact your doctor. Monitor symptoms.",
+            "urgent_care_needed": False
+        },
+        "questions": [resp["question"] for resp in responses],
+        "responses": [resp["answer"] for resp in responses]
+    }
@@ -0,0 +1,173 @@
+"""
+Per-worker memory under gunicorn: preload-and-fork vs independent worker startup
+
+Starts gunicorn with gunicorn.conf.py at each worker count, once with
+GRAVILOG_PRELOAD=1 and once with 0, drives a few rule-based sessions through
+every worker (one keep-alive connection per session, which pins it to a worker
+the way GRAVILOG_STICKY_SESSIONS requires), then reads /proc/<pid>/smaps_rollup for each worker. PSS counts
+shared pages fractionally and USS counts only private pages, so the USS drop
+is the memory each extra worker no longer costs. Linux only.
+
+Usage: python -m benchmarks.worker_rss [--workers 8 12 16] [--sessions 64] [--json]
+"""
+import argparse
+import http.client
+import json
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.parse
+import urllib.request
+from typing import Any, Dict, List, Optional
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def _children(pid: int) -> List[int]:
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # Field 4 is the parent pid; the command name may contain spaces
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == pid:
+            children.append(int(entry))
+    return children
+
+def read_memory(pid: int) -> Dict[str, int]:
+    """RSS, PSS and USS in KiB from smaps_rollup"""
+    values: Dict[str, int] = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                values[parts[0][:-1]] = int(parts[1])
+    return {
+        "rss_kib": values.get("Rss", 0),
+        "pss_kib": values.get("Pss", 0),
+        "uss_kib": values.get("Private_Clean", 0) + values.get("Private_Dirty", 0)
+    }
+
+def _request(connection: http.client.HTTPConnection, method: str, path: str,
+             data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    body = urllib.parse.urlencode(data).encode() if data is not None else None
+    headers = {"Content-Type": "application/x-www-form-urlencoded"} if body is not None else {}
+    connection.request(method, path, body=body, headers=headers)
+    response = connection.getresponse()
+    payload = response.read()
+    if response.status >= 400:
+        raise RuntimeError(f"{method} {path} returned {response.status}: {payload[:200]!r}")
+    return json.loads(payload)
+
+def _get(base: str, path: str) -> Dict[str, Any]:
+    with urllib.request.urlopen(base + path, timeout=30) as response:
+        return json.loads(response.read())
+
+def drive_sessions(base: str, sessions: int):
+    """Rule-based sessions (no Gemini key) so every worker touches the shared tables"""
+    host, port = urllib.parse.urlparse(base).netloc.split(":")
+    for i in range(sessions):
+        language = "ar" if i % 2 else "en"
+        # Sessions live in one worker's memory: a keep-alive connection keeps the
+        # whole flow on the worker that accepted it, while new connections spread
+        connection = http.client.HTTPConnection(host, int(port), timeout=30)
+        try:
+            session_id = _request(connection, "POST", "/start-session", {"language": language})["session_id"]
+            _request(connection, "GET", f"/question/{session_id}")
+            _request(connection, "POST", f"/submit-answer/{session_id}", {"answer": "bleeding and headache"})
+            _request(connection, "GET", f"/assess-risk/{session_id}")
+        finally:
+            connection.close()
+
+def wait_ready(base: str, timeout: float = 60.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            _get(base, "/health")
+            return
+        except Exception:
+            time.sleep(0.25)
+    raise RuntimeError("gunicorn did not become ready")
+
+def measure(workers: int, preload: bool, sessions: int, settle: float) -> Dict[str, Any]:
+    port = _free_port()
+    env = dict(os.environ, GRAVILOG_WORKERS=str(workers), GRAVILOG_STICKY_SESSIONS="1",
+               GRAVILOG_PRELOAD="1" if preload else "0",
+               GRAVILOG_BIND=f"127.0.0.1:{port}", GRAVILOG_ADMISSION_CLIENT_RATE="0",
+               GRAVILOG_ADMISSION_SESSION_RATE="0")
+    env.pop("GEMINI_API_KEY", None)
+    master = subprocess.Popen([sys.executable, "-m", "gunicorn", "main:app"], cwd=REPO_ROOT, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base = f"http://127.0.0.1:{port}"
+    try:
+        wait_ready(base)
+        deadline = time.time() + 60
+        while len(_children(master.pid)) < workers and time.time() < deadline:
+            time.sleep(0.25)
+        drive_sessions(base, sessions)
+        time.sleep(settle)
+
+        per_worker = [read_memory(pid) for pid in _children(master.pid)]
+        master_memory = read_memory(master.pid)
+    finally:
+        master.send_signal(signal.SIGTERM)
+        master.wait(timeout=30)
+
+    def avg(key: str) -> float:
+        return round(statistics.mean(m[key] for m in per_worker) / 1024, 2)
+
+    return {
+        "workers": workers,
+        "workers_measured": len(per_worker),
+        "preload": preload,
+        "avg_rss_mib": avg("rss_kib"),
+        "avg_pss_mib": avg("pss_kib"),
+        "avg_uss_mib": avg("uss_kib"),
+        "total_pss_mib": round((sum(m["pss_kib"] for m in per_worker) + master_memory["pss_kib"]) / 1024, 2),
+        "master_rss_mib": round(master_memory["rss_kib"] / 1024, 2)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[8, 12, 16])
+    parser.add_argument("--sessions", type=int, default=64, help="Sessions driven before sampling memory")
+    parser.add_argument("--settle", type=float, default=2.0, help="Seconds to wait before sampling")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    results = []
+    for workers in args.workers:
+        for preload in (False, True):
+            results.append(measure(workers, preload, args.sessions, args.settle))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'workers':>7s} {'preload':>7s} {'RSS MiB':>8s} {'PSS MiB':>8s} {'USS MiB':>8s} {'total PSS':>10s}")
+    for result in results:
+        print(f"{result['workers']:7d} {str(result['preload']):>7s} {result['avg_rss_mib']:8.1f} "
+              f"{result['avg_pss_mib']:8.1f} {result['avg_uss_mib']:8.1f} {result['total_pss_mib']:10.1f}")
+    by_count: Dict[int, Dict[bool, Dict[str, Any]]] = {}
+    for result in results:
+        by_count.setdefault(result["workers"], {})[result["preload"]] = result
+    for workers, pair in sorted(by_count.items()):
+        if False in pair and True in pair:
+            saved = pair[False]["total_pss_mib"] - pair[True]["total_pss_mib"]
+            print(f"{workers} workers: preload saves {saved:.1f} MiB total PSS "
+                  f"({pair[False]['avg_uss_mib'] - pair[True]['avg_uss_mib']:.1f} MiB USS per worker)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""
+Admission control: token buckets per client and globally, with LLM load shedding
+
+Every admitted request takes a token from its client's bucket and from the
+global bucket. New sessions also take one from the session-creation bucket.
+If any of these is empty, the request is rejected with 429 and Retry-After.
+
+Work that would reach Gemini also asks for an LLM slot at the call site. The
+slot is refused when Gemini is under pressure:
+- in-flight LLM calls reach the concurrency limit
+- the LLM bucket is empty
+- recent LLM latency is over the threshold, which lowers the limit to a
+  single probe call so the latency signal can recover
+
+A refused slot sheds the call to the fallback questions or the rule-based
+assessment, so rejection happens only when even those paths are saturated.
+
+Latency is fed per Gemini request (observe_latency), not per slot, so an
+assessment escalated to the slower pro model doesn't count as one long call.
+
+Clients are keyed by peer address. Behind a reverse proxy or load balancer the
+peer is the proxy, so every user would share one bucket: list the proxies in
+GRAVILOG_TRUSTED_PROXIES (addresses or CIDRs, comma separated) and the client
+is then taken from X-Forwarded-For (or GRAVILOG_CLIENT_IP_HEADER), skipping
+trusted hops from the right. The header is ignored from untrusted peers,
+since clients can set it to anything.
+"""
+import ipaddress
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from core.metrics import counter
+
+logger = logging.getLogger(__name__)
+
+ADMISSION_DECISIONS = counter("gravilog_admission_total", "Admission decisions by route and outcome")
+
+class TokenBucket:
+    """Classic token bucket; a rate of 0 or less means unlimited"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def take(self, now: float) -> float:
+        """Take one token; returns 0.0 on success, else seconds until one is available"""
+        if self.rate <= 0:
+            return 0.0
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return 0.0
+        return (1.0 - self.tokens) / self.rate
+
+class AdmissionRejected(Exception):
+    """Raised when a request is over its client or global rate, even for the fallback paths"""
+
+    def __init__(self, scope: str, retry_after: float):
+        super().__init__(f"Too many requests ({scope}); retry in {retry_after:.1f}s")
+        self.scope = scope
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after)))
+
+class ClientResolver:
+    """Client key from the peer address, or from a forwarding header set by a trusted proxy"""
+
+    def __init__(self, trusted_proxies: Optional[List[str]] = None, header: str = "x-forwarded-for"):
+        self.trusted = [ipaddress.ip_network(proxy.strip(), strict=False) for proxy in trusted_proxies or [] if proxy.strip()]
+        self.header = header.lower()
+
+    @classmethod
+    def from_env(cls) -> "ClientResolver":
+        return cls(
+            os.environ.get("GRAVILOG_TRUSTED_PROXIES", "").split(","),
+            os.environ.get("GRAVILOG_CLIENT_IP_HEADER", "x-forwarded-for")
+        )
+
+    def _is_trusted(self, address: str) -> bool:
+        try:
+            ip = ipaddress.ip_address(address)
+        except ValueError:
+            return False
+        return any(ip in network for network in self.trusted)
+
+    def resolve(self, peer: Optional[str], forwarded: Optional[str]) -> str:
+        peer = peer or "unknown"
+        if not forwarded or not self._is_trusted(peer):
+            return peer
+        # Rightmost entries were appended by our own proxies; the first untrusted hop is the client
+        hops = [hop.strip() for hop in forwarded.split(",") if hop.strip()]
+        for hop in reversed(hops):
+            if not self._is_trusted(hop):
+                return hop
+        return hops[0] if hops else peer
+
+class AdmissionController:
+    """Token buckets plus live LLM concurrency and latency tracking"""
+
+    def __init__(
+        self,
+        client_rate: float = 5.0,
+        client_burst: float = 20.0,
+        global_rate: float = 200.0,
+        global_burst: float = 400.0,
+        session_rate: float = 20.0,
+        session_burst: float = 50.0,
+        llm_rate: float = 10.0,
+        llm_burst: float = 20.0,
+        max_llm_in_flight: int = 32,
+        latency_threshold: float = 8.0,
+        latency_alpha: float = 0.2,
+        max_clients: int = 10000
+    ):
+        self.client_rate = client_rate
+        self.client_burst = client_burst
+        self.max_llm_in_flight = max_llm_in_flight
+        self.latency_threshold = latency_threshold
+        self.latency_alpha = latency_alpha
+        self.max_clients = max_clients
+        self._global = TokenBucket(global_rate, global_burst)
+        self._sessions = TokenBucket(session_rate, session_burst)
+        self._llm = TokenBucket(llm_rate, llm_burst)
+        self._clients: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.llm_in_flight = 0
+        self.llm_latency: Optional[float] = None  # Exponentially weighted, seconds
+        self.degraded = 0
+        self.rejected = 0
+
+    @classmethod
+    def from_env(cls) -> "AdmissionController":
+        def env(name: str, default: str) -> float:
+            return float(os.environ.get(f"GRAVILOG_ADMISSION_{name}", default))
+
+        return cls(
+            client_rate=env("CLIENT_RATE", "5"),
+            client_burst=env("CLIENT_BURST", "20"),
+            global_rate=env("GLOBAL_RATE", "200"),
+            global_burst=env("GLOBAL_BURST", "400"),
+            session_rate=env("SESSION_RATE", "20"),
+            session_burst=env("SESSION_BURST", "50"),
+            llm_rate=env("LLM_RATE", "10"),
+            llm_burst=env("LLM_BURST", "20"),
+            max_llm_in_flight=int(env("MAX_LLM_IN_FLIGHT", "32")),
+            latency_threshold=env("LATENCY_SECONDS", "8")
+        )
+
+    def _client_bucket(self, client: str) -> TokenBucket:
+        bucket = self._clients.get(client)
+        if bucket is None:
+            bucket = self._clients[client] = TokenBucket(self.client_rate, self.client_burst)
+            # Least recently seen clients go first; a fresh bucket starts full anyway
+            while len(self._clients) > self.max_clients:
+                self._clients.popitem(last=False)
+        else:
+            self._clients.move_to_end(client)
+        return bucket
+
+    def llm_limit(self) -> int:
+        """Current LLM concurrency limit: one probe call while latency is over the threshold"""
+        if self.llm_latency is not None and self.llm_latency > self.latency_threshold:
+            return 1
+        return self.max_llm_in_flight
+
+    def _reject(self, route: str, scope: str, retry_after: float):
+        self.rejected += 1
+        ADMISSION_DECISIONS.inc(route=route, outcome="rejected")
+        logger.warning(f"Admission rejected {route} ({scope}), retry after {retry_after:.2f}s")
+        raise AdmissionRejected(scope, retry_after)
+
+    def admit(self, client: str, route: str, new_session: bool = False):
+        """Take the request's client and global tokens, or raise AdmissionRejected"""
+        now = time.monotonic()
+        with self._lock:
+            wait = self._client_bucket(client).take(now)
+            if wait:
+                self._reject(route, "client", wait)
+            wait = self._global.take(now)
+            if wait:
+                self._reject(route, "global", wait)
+            if new_session:
+                wait = self._sessions.take(now)
+                if wait:
+                    self._reject(route, "sessions", wait)
+        ADMISSION_DECISIONS.inc(route=route, outcome="admitted")
+
+    @contextmanager
+    def llm_slot(self, route: str) -> Iterator[bool]:
+        """Yields True if the caller may call Gemini now, False if it should take its fallback.
+
+        Granted slots count as in flight until the block exits. Latency is not
+        timed here: see observe_latency.
+        """
+        with self._lock:
+            granted = self.llm_in_flight < self.llm_limit() and not self._llm.take(time.monotonic())
+            if granted:
+                self.llm_in_flight += 1
+            else:
+                self.degraded += 1
+        ADMISSION_DECISIONS.inc(route=route, outcome="llm" if granted else "degraded")
+        if not granted:
+            yield False
+            return
+
+        try:
+            yield True
+        finally:
+            with self._lock:
+                self.llm_in_flight -= 1
+
+    def observe_latency(self, seconds: float):
+        """Feed one Gemini request's duration into the latency average that drives shedding"""
+        with self._lock:
+            if self.llm_latency is None:
+                self.llm_latency = seconds
+            else:
+                self.llm_latency += self.latency_alpha * (seconds - self.llm_latency)
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "llm_in_flight": self.llm_in_flight,
+                "llm_limit": self.llm_limit(),
+                "llm_latency_seconds": round(self.llm_latency, 4) if self.llm_latency is not None else None,
+                "latency_threshold_seconds": self.latency_threshold,
+                "clients_tracked": len(self._clients),
+                "degraded_total": self.degraded,
+                "rejected_total": self.rejected
+            }
@@ -0,0 +1,199 @@
+"""
+Streaming NDJSON export of completed assessment sessions for analytics
+"""
+import logging
+import re
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, Dict, Any, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Reports are always in English; Arabic sessions' assessments carry Arabic levels
+REPORT_RISK_LEVELS = {
+    "high": "High", "عالي": "High",
+    "medium": "Medium", "متوسط": "Medium",
+    "low": "Low", "منخفض": "Low"
+}
+
+_CURSOR = re.compile(r"^\d{10}\.\d{6}-.+$")
+
+def export_cursor(assessed_at: Optional[float], session_id: str) -> str:
+    """Cursor ordering sessions by when their current assessment was stored, then by id.
+
+    Fixed-width time, so string order is time order. Sessions assessed before
+    assessed_at was recorded sort first.
+    """
+    return f"{assessed_at or 0.0:017.6f}-{session_id}"
+
+def is_valid_cursor(cursor: str) -> bool:
+    return _CURSOR.match(cursor) is not None
+
+def _as_text(value: Any) -> str:
+    if isinstance(value, (list, tuple)):
+        return " ".join(str(item) for item in value)
+    return str(value) if value is not None else ""
+
+def session_to_report_data(session: Dict[str, Any]) -> Dict[str, Any]:
+    """Map an in-memory session onto the report_data shape used by ReportGenerator"""
+    risk_assessment = dict(session.get("risk_assessment") or {})
+
+    # Gemini and rule-based assessments return reasons and recommendations as lists, reports expect text
+    if "explanation" not in risk_assessment:
+        risk_assessment["explanation"] = _as_text(risk_assessment.get("reasons", []))
+    risk_assessment["recommendations"] = _as_text(risk_assessment.get("recommendations", []))
+
+    # An unrecognized level is reported as Medium rather than dropped or guessed low
+    level = str(risk_assessment.get("risk_level", "")).strip()
+    risk_assessment["risk_level"] = REPORT_RISK_LEVELS.get(level.lower(), "Medium")
+
+    # The session stores gestational_week; the report reads pregnancy_week
+    patient_info = dict(session.get("patient_info") or {})
+    week = patient_info.get("gestational_week")
+    if week is not None:
+        patient_info.setdefault("pregnancy_week", week)
+        if isinstance(week, int):
+            risk_assessment.setdefault("pregnancy_week", week)
+
+    created_at = session.get("created_at")
+    responses = session.get("responses", [])
+
+    return {
+        "session_id": session.get("id"),
+        "timestamp": created_at.isoformat() if hasattr(created_at, "isoformat") else str(created_at),
+        "language": session.get("language", "en"),
+        "original_language": session.get("language", "en"),
+        "patient_info": patient_info,
+        "risk_assessment": risk_assessment,
+        "questions": [resp.get("question", "") for resp in responses],
+        "responses": [resp.get("answer", "") for resp in responses]
+    }
+
+class ExportStats:
+    """Throughput counters for a single export run"""
+
+    def __init__(self, cursor: Optional[str] = None):
+        self.export_id = uuid.uuid4().hex
+        self.start_cursor = cursor
+        self.last_cursor = cursor
+        self.records = 0
+        self.bytes = 0
+        self.skipped = 0
+        self.started_at = time.perf_counter()
+        self.finished_at: Optional[float] = None
+
+    @property
+    def elapsed(self) -> float:
+        end = self.finished_at if self.finished_at is not None else time.perf_counter()
+        return end - self.started_at
+
+    def to_dict(self) -> Dict[str, Any]:
+        elapsed = self.elapsed
+        return {
+            "export_id": self.export_id,
+            "start_cursor": self.start_cursor,
+            "last_cursor": self.last_cursor,
+            "records": self.records,
+            "bytes": self.bytes,
+            "skipped": self.skipped,
+            "elapsed_seconds": round(elapsed, 6),
+            "records_per_second": round(self.records / elapsed, 2) if elapsed > 0 else None,
+            "bytes_per_second": round(self.bytes / elapsed, 2) if elapsed > 0 else None,
+            "finished": self.finished_at is not None
+        }
+
+class NDJSONSessionExporter:
+    """Generator pipeline that streams completed sessions as compact NDJSON.
+
+    Sessions are ordered by when their current assessment was stored (then by
+    id), so a session created before a cursor but completed after it is still
+    picked up by the next resume, and a re-assessed session is exported again.
+    Every record carries the cursor to resume after it.
+    Records are serialized one at a time, keeping memory flat regardless of
+    how many sessions are stored. Archived sessions are read back from the
+    cold tier one at a time, without rehydrating them into hot storage.
+    """
+
+    def __init__(self, sessions: Dict[str, Dict], get_report_generator: Callable[[], Any], archive=None,
+                 max_runs: int = 50):
+        self.sessions = sessions
+        self.get_report_generator = get_report_generator
+        self.archive = archive
+        self.max_runs = max_runs
+        # Recent runs by export id; concurrent exports each keep their own stats
+        self.runs: "OrderedDict[str, ExportStats]" = OrderedDict()
+
+    def start_run(self, cursor: Optional[str] = None) -> ExportStats:
+        """Stats for a new export run, retrievable by its export_id while it is recent"""
+        stats = ExportStats(cursor)
+        self.runs[stats.export_id] = stats
+        while len(self.runs) > self.max_runs:
+            self.runs.popitem(last=False)
+        return stats
+
+    def get_run(self, export_id: str) -> Optional[ExportStats]:
+        return self.runs.get(export_id)
+
+    def recent_runs(self) -> List[Dict[str, Any]]:
+        return [stats.to_dict() for stats in reversed(list(self.runs.values()))]
+
+    def _iter_cursors(self, cursor: Optional[str]) -> Iterator[Tuple[str, str]]:
+        """(cursor, session id) of completed sessions after ``cursor``, in cursor order"""
+        # Only keys are materialized; session payloads are read lazily
+        keys = {}
+        if self.archive is not None:
+            for session_id, assessed_at in self.archive.assessed_times().items():
+                keys[session_id] = export_cursor(assessed_at, session_id)
+        for session_id, session in list(self.sessions.items()):
+            # The hot copy is the latest; drop an archived key it supersedes
+            keys.pop(session_id, None)
+            if session.get("risk_assessment"):
+                keys[session_id] = export_cursor(session.get("assessed_at"), session_id)
+        return iter(sorted((key, sid) for sid, key in keys.items() if cursor is None or key > cursor))
+
+    def _iter_completed(self, cursor: Optional[str], stats: ExportStats) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        for session_cursor, session_id in self._iter_cursors(cursor):
+            session = self.sessions.get(session_id)
+            if session is None and self.archive is not None:
+                session = self.archive.load(session_id)
+            if not session or not session.get("risk_assessment"):
+                stats.skipped += 1
+                continue
+            yield session_cursor, session
+
+    def iter_records(self, cursor: Optional[str] = None, limit: Optional[int] = None,
+                     stats: Optional[ExportStats] = None) -> Iterator[bytes]:
+        """Yield one encoded NDJSON line per completed session after ``cursor``"""
+        if stats is None:
+            stats = self.start_run(cursor)
+
+        try:
+            for session_cursor, session in self._iter_completed(cursor, stats):
+                if limit is not None and stats.records >= limit:
+                    break
+
+                try:
+                    line = self.get_report_generator().generate_ndjson_record(
+                        session_to_report_data(session),
+                        cursor=session_cursor,
+                        session_id=session["id"]
+                    )
+                except Exception as e:
+                    logger.error(f"Export serialization error for session {session.get('id')}: {e}")
+                    stats.skipped += 1
+                    continue
+
+                data = (line + "\n").encode("utf-8")
+                stats.records += 1
+                stats.bytes += len(data)
+                stats.last_cursor = session_cursor
+                yield data
+        finally:
+            stats.finished_at = time.perf_counter()
+            summary = stats.to_dict()
+            logger.info(
+                f"NDJSON export finished: {summary['records']} records, {summary['bytes']} bytes "
+                f"in {summary['elapsed_seconds']}s ({summary['records_per_second']} records/s), "
+                f"last cursor {summary['last_cursor']}"
+            )
@@ -0,0 +1,169 @@
+"""
+Static asset pipeline: content-hashed, precompressed CSS/JS served with immutable caching
+
+Sources live in static/src. Building writes static/dist/<name>.<hash>.<ext>
+plus .gz and .br siblings and a manifest mapping logical names to hashed files.
+
+Build ahead of deployment with: python -m core.assets. The gunicorn master
+also rebuilds once at preload, before forking; request handling only reads
+the manifest, and builds it only if none exists yet.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import tempfile
+import threading
+from typing import Dict, Optional
+
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.staticfiles import StaticFiles
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip variants are always built
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "static")
+SOURCE_DIR = os.path.join(STATIC_DIR, "src")
+DIST_DIR = os.path.join(STATIC_DIR, "dist")
+MANIFEST_PATH = os.path.join(DIST_DIR, "manifest.json")
+STATIC_URL = "/static"
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# The manifest keeps its name across builds, so clients must revalidate it
+MANIFEST_CACHE_CONTROL = "no-cache"
+
+_manifest: Optional[Dict[str, str]] = None
+_manifest_lock = threading.Lock()
+
+def _write_if_changed(path: str, data: bytes):
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            if f.read() == data:
+                return
+    # Temp file plus rename, so a concurrent reader sees the old file or the new one, never half of it
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+def build_assets() -> Dict[str, str]:
+    """Fingerprint and precompress every source asset, returning the manifest"""
+    os.makedirs(DIST_DIR, exist_ok=True)
+    manifest = {}
+
+    for name in sorted(os.listdir(SOURCE_DIR)):
+        source_path = os.path.join(SOURCE_DIR, name)
+        if not os.path.isfile(source_path):
+            continue
+
+        with open(source_path, "rb") as f:
+            data = f.read()
+
+        stem, ext = os.path.splitext(name)
+        digest = hashlib.sha256(data).hexdigest()[:12]
+        hashed_name = f"{stem}.{digest}{ext}"
+        hashed_path = os.path.join(DIST_DIR, hashed_name)
+
+        _write_if_changed(hashed_path, data)
+        # mtime=0 keeps the gzip output byte-identical across builds
+        _write_if_changed(hashed_path + ".gz", gzip.compress(data, compresslevel=9, mtime=0))
+        if brotli is not None:
+            _write_if_changed(hashed_path + ".br", brotli.compress(data, quality=11))
+
+        manifest[name] = hashed_name
+
+    _write_if_changed(MANIFEST_PATH, json.dumps(manifest, indent=2, sort_keys=True).encode("utf-8"))
+
+    logger.info(f"Built {len(manifest)} static assets (brotli: {brotli is not None})")
+    return manifest
+
+def _load_manifest() -> Optional[Dict[str, str]]:
+    try:
+        with open(MANIFEST_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def get_manifest(build: bool = False) -> Dict[str, str]:
+    """The asset manifest, loaded once per process.
+
+    build=True rebuilds from the sources first (deploy or preload time). Otherwise
+    the prebuilt manifest is read, and built only when there is none yet.
+    """
+    global _manifest
+    if _manifest is None or build:
+        with _manifest_lock:
+            if _manifest is None or build:
+                manifest = None if build else _load_manifest()
+                if manifest is None:
+                    try:
+                        manifest = build_assets()
+                    except OSError as e:
+                        logger.error(f"Static asset build failed, using prebuilt manifest: {e}")
+                        # No prebuilt dist either: serve the unhashed sources
+                        manifest = _load_manifest() or {}
+                _manifest = manifest
+    return _manifest
+
+def asset_url(name: str) -> str:
+    """URL of the fingerprinted asset for a logical source name (Jinja global)"""
+    hashed_name = get_manifest().get(name)
+    if hashed_name:
+        return f"{STATIC_URL}/dist/{hashed_name}"
+    return f"{STATIC_URL}/src/{name}"
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles that serves prebuilt .br/.gz variants and caches hashed files forever (not the manifest)"""
+
+    ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+    async def get_response(self, path: str, scope):
+        accept_encoding = Headers(scope=scope).get("accept-encoding", "")
+        is_dist = path.startswith("dist/") or path.startswith("dist" + os.sep)
+
+        response = None
+        if is_dist:
+            for encoding, suffix in self.ENCODINGS:
+                if encoding not in accept_encoding:
+                    continue
+                try:
+                    candidate = await super().get_response(path + suffix, scope)
+                except HTTPException:
+                    continue
+                if candidate.status_code in (200, 304):
+                    response = candidate
+                    response.headers["Content-Encoding"] = encoding
+                    media_type, _ = mimetypes.guess_type(path)
+                    if media_type:
+                        if media_type.startswith("text/"):
+                            media_type += "; charset=utf-8"
+                        response.headers["Content-Type"] = media_type
+                    break
+
+        if response is None:
+            response = await super().get_response(path, scope)
+
+        if is_dist:
+            if os.path.basename(path) == os.path.basename(MANIFEST_PATH):
+                response.headers["Cache-Control"] = MANIFEST_CACHE_CONTROL
+            else:
+                response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+            response.headers["Vary"] = "Accept-Encoding"
+        return response
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    for logical, hashed in build_assets().items():
+        print(f"{logical} -> {hashed}")
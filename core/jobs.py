@@ -0,0 +1,164 @@
+"""
+Asynchronous risk assessment jobs with a bounded worker pool
+"""
+import asyncio
+import logging
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+import requests
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+# Callbacks only go to the local machine (EMR bridge, kiosk agent), never out to the internet
+LOCAL_CALLBACK_HOSTS = {"localhost", "127.0.0.1", "::1"}
+
+class QueueFullError(Exception):
+    """Raised when the job queue is at capacity"""
+
+def validate_callback_url(url: str) -> str:
+    """Accept only http(s) callback URLs pointing at the local host"""
+    parsed = urlparse(url)
+    if parsed.scheme not in ("http", "https") or parsed.hostname not in LOCAL_CALLBACK_HOSTS:
+        raise ValueError("callback_url must be an http(s) URL on localhost")
+    return url
+
+class AssessmentJob:
+    """State of a single queued assessment"""
+
+    def __init__(self, session_id: str, callback_url: Optional[str] = None):
+        self.id = f"job_{uuid.uuid4().hex}"
+        self.session_id = session_id
+        self.callback_url = callback_url
+        self.status = "queued"
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.callback_status: Optional[str] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("succeeded", "failed")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "session_id": self.session_id,
+            "status": self.status,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "result": self.result,
+            "error": self.error,
+            "callback_url": self.callback_url,
+            "callback_status": self.callback_status
+        }
+
+class AssessmentJobQueue:
+    """Bounded queue of assessment jobs drained by a fixed pool of workers"""
+
+    def __init__(
+        self,
+        runner: Callable[[str], Awaitable[Dict[str, Any]]],
+        workers: int = 4,
+        max_queue: int = 100,
+        retention_seconds: float = 3600.0,
+        callback_timeout: float = 5.0
+    ):
+        self.runner = runner
+        self.worker_count = workers
+        self.max_queue = max_queue
+        self.retention_seconds = retention_seconds
+        self.callback_timeout = callback_timeout
+        self.jobs: Dict[str, AssessmentJob] = {}
+        self.queue: Optional[asyncio.Queue] = None
+        self.workers: List[asyncio.Task] = []
+        self.completed = 0
+        self.failed = 0
+
+    async def start(self):
+        self.queue = asyncio.Queue(maxsize=self.max_queue)
+        self.workers = [asyncio.create_task(self._worker(i)) for i in range(self.worker_count)]
+        logger.info(f"Assessment job queue started with {self.worker_count} workers")
+
+    async def stop(self):
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+
+    def submit(self, session_id: str, callback_url: Optional[str] = None) -> AssessmentJob:
+        """Queue a job and return immediately"""
+        if self.queue is None:
+            raise RuntimeError("Job queue not started")
+        self._prune()
+
+        job = AssessmentJob(session_id, callback_url)
+        try:
+            self.queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise QueueFullError(f"Job queue full ({self.max_queue} pending)")
+        self.jobs[job.id] = job
+        logger.info(f"Queued assessment job {job.id} for session {session_id}")
+        return job
+
+    def get(self, job_id: str) -> Optional[AssessmentJob]:
+        return self.jobs.get(job_id)
+
+    def metrics(self) -> Dict[str, Any]:
+        now = time.time()
+        queued = [job for job in self.jobs.values() if job.status == "queued"]
+        running = [job for job in self.jobs.values() if job.status == "running"]
+        return {
+            "queue_depth": len(queued),
+            "queue_capacity": self.max_queue,
+            "running": len(running),
+            "workers": self.worker_count,
+            "oldest_queued_age_seconds": round(now - min(job.submitted_at for job in queued), 3) if queued else 0.0,
+            "oldest_running_age_seconds": round(now - min(job.started_at for job in running), 3) if running else 0.0,
+            "completed_total": self.completed,
+            "failed_total": self.failed,
+            "tracked_jobs": len(self.jobs)
+        }
+
+    def _prune(self):
+        cutoff = time.time() - self.retention_seconds
+        expired = [job_id for job_id, job in self.jobs.items() if job.finished and job.finished_at < cutoff]
+        for job_id in expired:
+            del self.jobs[job_id]
+
+    async def _worker(self, worker_id: int):
+        while True:
+            job = await self.queue.get()
+            job.status = "running"
+            job.started_at = time.time()
+            try:
+                job.result = await self.runner(job.session_id)
+                job.status = "succeeded"
+                self.completed += 1
+            except Exception as e:
+                logger.error(f"Assessment job {job.id} failed: {e}")
+                job.error = str(e) or e.__class__.__name__
+                job.status = "failed"
+                self.failed += 1
+            finally:
+                job.finished_at = time.time()
+                self.queue.task_done()
+
+            if job.callback_url:
+                await self._notify(job)
+
+    async def _notify(self, job: AssessmentJob):
+        try:
+            response = await run_in_threadpool(
+                requests.post, job.callback_url, json=job.to_dict(), timeout=self.callback_timeout
+            )
+            job.callback_status = f"delivered ({response.status_code})"
+        except Exception as e:
+            logger.error(f"Callback for job {job.id} failed: {e}")
+            job.callback_status = f"failed ({e.__class__.__name__})"
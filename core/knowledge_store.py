@@ -0,0 +1,242 @@
+"""
+Versioned knowledge base and risk keyword tables, reloaded in the background and swapped atomically
+
+GRAVILOG_KNOWLEDGE_DIR holds bundle files, each a complete version:
+
+    {
+      "version": "2026.10.1",
+      "knowledge": [{"category": ..., "risk_level": ..., "symptoms": [...], "description": ..., ...}],
+      "risk_keywords": {"high": [...], "medium": [...], "low": [...]}
+    }
+
+Items may carry an optional "trimesters" list (e.g. [2, 3]) restricting
+them to those trimesters; otherwise the built-in trimester profiles decide
+by category. Each snapshot precomputes one view per trimester (items,
+retrieval index and re-weighted keywords) so a session with a known
+gestational week only searches and scores what applies to it.
+
+The bundle with the highest version is active. Adding a newer file rolls
+forward, and removing it rolls back. Content edits that keep the same
+version are ignored; bump the version instead. Without a directory, or if
+no bundle is valid, the built-in tables from medical_knowledge are used.
+"""
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from core.llm_client import SimpleRAGRetriever
+from medical_knowledge import (
+    freeze_table, get_medical_knowledge, get_risk_keywords, get_trimester_profiles, trimester_for_week
+)
+
+logger = logging.getLogger(__name__)
+
+BUILTIN_VERSION = "builtin"
+RISK_LEVELS = ("high", "medium", "low")
+
+class KnowledgeValidationError(ValueError):
+    """Raised when a bundle file is malformed"""
+
+class TrimesterView:
+    """Knowledge items, retrieval index and keyword tables for one trimester (None: whole base)"""
+
+    def __init__(self, trimester: Optional[int], knowledge: Sequence[Mapping[str, Any]],
+                 risk_keywords: Mapping[str, Sequence[str]]):
+        self.trimester = trimester
+        self.knowledge = knowledge
+        self.risk_keywords = risk_keywords
+        self.retriever = SimpleRAGRetriever(knowledge)
+
+def _applies_to(item: Mapping[str, Any], trimester: int, profile: Mapping[str, Any]) -> bool:
+    if "trimesters" in item:
+        return trimester in item["trimesters"]
+    return item.get("category") not in profile["exclude_categories"]
+
+def _reweight(risk_keywords: Mapping[str, Sequence[str]], keyword_levels: Mapping[str, str]) -> Mapping[str, Sequence[str]]:
+    levels = {level: [k for k in risk_keywords[level] if k not in keyword_levels] for level in RISK_LEVELS}
+    for keyword, level in keyword_levels.items():
+        levels[level].append(keyword)
+    return freeze_table(levels)
+
+def build_trimester_views(knowledge: Sequence[Mapping[str, Any]],
+                          risk_keywords: Mapping[str, Sequence[str]]) -> Dict[int, TrimesterView]:
+    views = {}
+    for trimester, profile in get_trimester_profiles().items():
+        items = tuple(item for item in knowledge if _applies_to(item, trimester, profile))
+        views[trimester] = TrimesterView(trimester, items, _reweight(risk_keywords, profile["keyword_levels"]))
+    return views
+
+class KnowledgeSnapshot:
+    """One immutable knowledge version with its retrieval index and keyword tables.
+
+    Requests take a reference to the current snapshot once and use it for the
+    whole call, so a swap never changes the tables under an in-flight request.
+    """
+
+    def __init__(self, version: str, knowledge: Sequence[Mapping[str, Any]],
+                 risk_keywords: Mapping[str, Sequence[str]], source: str):
+        self.version = version
+        self.knowledge = knowledge
+        self.risk_keywords = risk_keywords
+        self.source = source
+        self.loaded_at = time.time()
+        self.full_view = TrimesterView(None, knowledge, risk_keywords)
+        self.retriever = self.full_view.retriever
+        self.views = build_trimester_views(knowledge, risk_keywords)
+
+    @classmethod
+    def builtin(cls) -> "KnowledgeSnapshot":
+        return cls(BUILTIN_VERSION, get_medical_knowledge(), get_risk_keywords(), "medical_knowledge.py")
+
+    def view_for(self, gestational_week: Any = None) -> TrimesterView:
+        """The trimester view for a gestational week; the whole base if the week is unknown"""
+        return self.views.get(trimester_for_week(gestational_week), self.full_view)
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "source": self.source,
+            "items": len(self.knowledge),
+            "trimester_items": {str(t): len(view.knowledge) for t, view in self.views.items()},
+            "loaded_at": self.loaded_at
+        }
+
+def _version_key(version: str) -> Tuple:
+    # Natural ordering: "2026.10.10" sorts after "2026.10.9"
+    return tuple(int(part) if part.isdigit() else part for part in re.split(r'(\d+)', version))
+
+ITEM_TEXT_FIELDS = ("category", "risk_level", "description", "action")
+
+def validate_bundle(bundle: Dict[str, Any]) -> None:
+    if not isinstance(bundle.get("version"), str) or not bundle["version"]:
+        raise KnowledgeValidationError("bundle needs a non-empty string 'version'")
+    knowledge = bundle.get("knowledge")
+    if not isinstance(knowledge, list) or not knowledge:
+        raise KnowledgeValidationError("'knowledge' must be a non-empty list")
+    for i, item in enumerate(knowledge):
+        if not isinstance(item, dict) or not isinstance(item.get("symptoms"), list):
+            raise KnowledgeValidationError(f"knowledge[{i}] must be an object with a 'symptoms' list")
+        # Retrieval and scoring lowercase these, so a non-string would fail per request, not here
+        if not all(isinstance(symptom, str) for symptom in item["symptoms"]):
+            raise KnowledgeValidationError(f"knowledge[{i}].symptoms must all be strings")
+        for field in ITEM_TEXT_FIELDS:
+            if field in item and not isinstance(item[field], str):
+                raise KnowledgeValidationError(f"knowledge[{i}].{field} must be a string")
+        trimesters = item.get("trimesters")
+        if trimesters is not None and (not isinstance(trimesters, list) or any(t not in (1, 2, 3) for t in trimesters)):
+            raise KnowledgeValidationError(f"knowledge[{i}].trimesters must be a list of 1, 2 or 3")
+    keywords = bundle.get("risk_keywords")
+    if not isinstance(keywords, dict) or any(not isinstance(keywords.get(level), list) for level in RISK_LEVELS):
+        raise KnowledgeValidationError(f"'risk_keywords' must have list values for {', '.join(RISK_LEVELS)}")
+    for level in RISK_LEVELS:
+        if not all(isinstance(keyword, str) and keyword for keyword in keywords[level]):
+            raise KnowledgeValidationError(f"risk_keywords.{level} must contain only non-empty strings")
+
+class KnowledgeStore:
+    """Holds the active KnowledgeSnapshot and polls the bundle directory for new versions"""
+
+    def __init__(self, directory: Optional[str] = None, poll_interval: float = 30.0):
+        self.directory = directory
+        self.poll_interval = poll_interval
+        self.task: Optional[asyncio.Task] = None
+        self.reloads = 0
+        self.last_error: Optional[str] = None
+        self._signature: Optional[Tuple] = None
+        # Plain attribute: readers see either the old or the new snapshot, never a mix
+        self.current: KnowledgeSnapshot = KnowledgeSnapshot.builtin()
+        if directory:
+            self.reload()
+
+    @classmethod
+    def from_env(cls) -> "KnowledgeStore":
+        return cls(
+            os.environ.get("GRAVILOG_KNOWLEDGE_DIR") or None,
+            poll_interval=float(os.environ.get("GRAVILOG_KNOWLEDGE_POLL_SECONDS", "30"))
+        )
+
+    def _bundle_files(self) -> List[str]:
+        if not self.directory or not os.path.isdir(self.directory):
+            return []
+        return sorted(os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith(".json"))
+
+    def _directory_signature(self) -> Tuple:
+        signature = []
+        for path in self._bundle_files():
+            try:
+                stat = os.stat(path)
+                signature.append((path, stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                continue
+        return tuple(signature)
+
+    def _load_newest(self) -> Optional[KnowledgeSnapshot]:
+        bundles = []
+        self.last_error = None
+        for path in self._bundle_files():
+            try:
+                with open(path, encoding="utf-8") as f:
+                    bundle = json.load(f)
+                validate_bundle(bundle)
+                bundles.append((path, bundle))
+            except (OSError, ValueError) as e:
+                logger.error(f"Skipping knowledge bundle {path}: {e}")
+                self.last_error = f"{os.path.basename(path)}: {e}"
+        if not bundles:
+            return None
+        path, bundle = max(bundles, key=lambda entry: _version_key(entry[1]["version"]))
+        return KnowledgeSnapshot(
+            bundle["version"],
+            freeze_table(bundle["knowledge"]),
+            freeze_table({level: bundle["risk_keywords"][level] for level in RISK_LEVELS}),
+            os.path.basename(path)
+        )
+
+    def reload(self, force: bool = False) -> bool:
+        """Rebuild from the directory if it changed; True if a new version was swapped in (blocking)"""
+        signature = self._directory_signature()
+        if not force and signature == self._signature:
+            return False
+        self._signature = signature
+
+        try:
+            snapshot = self._load_newest() or KnowledgeSnapshot.builtin()
+        except Exception as e:
+            logger.error(f"Knowledge reload failed, keeping version {self.current.version}: {e}")
+            self.last_error = str(e)
+            return False
+
+        if snapshot.version == self.current.version and snapshot.source == self.current.source and not force:
+            return False
+        previous = self.current.version
+        self.current = snapshot
+        self.reloads += 1
+        logger.info(f"Knowledge version {previous} -> {snapshot.version} ({snapshot.source})")
+        return True
+
+    def status(self) -> Dict[str, Any]:
+        return dict(self.current.describe(), directory=self.directory, reloads=self.reloads, last_error=self.last_error)
+
+    async def start(self):
+        if self.directory:
+            self.task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                # Index and matchers are built off the event loop
+                await run_in_threadpool(self.reload)
+            except Exception as e:
+                logger.error(f"Knowledge reload error: {e}")
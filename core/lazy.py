@@ -0,0 +1,63 @@
+"""
+Lazily built, thread-safe singletons for subsystems that are expensive to import or construct
+"""
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Generic, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+class LazySingleton(Generic[T]):
+    """Builds its value on first ``get()`` and shares it afterwards.
+
+    A factory that raises (or returns None) leaves the singleton unavailable;
+    ``get()`` then returns None and callers take their fallback path, as they
+    did when initialization failed at import time.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], Optional[T]]):
+        self.name = name
+        self.factory = factory
+        self._lock = threading.Lock()
+        self._built = False
+        self._value: Optional[T] = None
+        self.build_seconds: Optional[float] = None
+        self.error: Optional[str] = None
+
+    def get(self) -> Optional[T]:
+        if self._built:
+            return self._value
+        with self._lock:
+            if not self._built:
+                start = time.perf_counter()
+                try:
+                    self._value = self.factory()
+                except Exception as e:
+                    logger.error(f"{self.name} initialization error: {e}")
+                    self.error = str(e)
+                    self._value = None
+                self.build_seconds = time.perf_counter() - start
+                self._built = True
+                logger.info(f"{self.name} initialized in {self.build_seconds * 1000:.1f} ms")
+        return self._value
+
+    def override(self, value: Optional[T]):
+        """Replace the value (benchmarks and load tests swap in stubs)"""
+        with self._lock:
+            self._value = value
+            self._built = True
+
+    @property
+    def built(self) -> bool:
+        return self._built
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "built": self._built,
+            "available": self._value is not None,
+            "build_ms": round(self.build_seconds * 1000, 1) if self.build_seconds is not None else None,
+            "error": self.error
+        }
@@ -4,62 +4,217 @@ LlamaIndex + Google Gemini client for medical question generation and risk asses
 import os
 import json
 import logging
-from typing import List, Dict, Any, Optional
+import threading
+import time
+from typing import List, Dict, Any, Callable, Mapping, Optional, Tuple
 
-from google import genai
-from google.genai import types
-# Simplified imports - no complex LlamaIndex dependencies needed
+# google.genai is imported on first use: it is slow to import and most
+# workers that never reach Gemini (fallback-only, report-only) don't need it
+
+from core.llm_usage import UsageTracker, usage_tracker
+from core.metrics import FALLBACK_ACTIVATIONS, GEMINI_ERRORS, GEMINI_LATENCY, RETRIEVAL_LATENCY
+from core.prompt_budget import PromptCompactor, estimate_tokens
+from core.prompt_cache import CachedContentUnavailable, is_cache_unavailable_error
+from medical_knowledge import get_risk_keywords
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+DEFAULT_MODEL = "gemini-2.5-flash"
+ESCALATION_ROUTE = "assessment_escalation"
+
+# Per call type; GRAVILOG_MODEL_<CALL_TYPE> overrides (e.g. GRAVILOG_MODEL_QUESTIONS)
+DEFAULT_MODEL_ROUTES = {
+    "questions": "gemini-2.5-flash-lite",
+    "assessment": "gemini-2.5-flash",
+    ESCALATION_ROUTE: "gemini-2.5-pro"
+}
+
+# USD per million (input, output) tokens; GRAVILOG_MODEL_PRICING takes a JSON object of the same shape
+MODEL_PRICING = {
+    "gemini-2.5-flash-lite": (0.10, 0.40),
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-2.5-pro": (1.25, 10.00)
+}
+CACHED_INPUT_DISCOUNT = 0.25  # Cached input tokens bill at a quarter of the input rate
+
+class ModelRouter:
+    """Picks the Gemini model for each call type and prices its token usage"""
+    
+    def __init__(self, routes: Optional[Mapping[str, str]] = None, default: str = DEFAULT_MODEL,
+                 pricing: Optional[Mapping[str, Tuple[float, float]]] = None):
+        self.routes = dict(DEFAULT_MODEL_ROUTES if routes is None else routes)
+        self.default = default
+        self.pricing = dict(MODEL_PRICING if pricing is None else pricing)
+    
+    @classmethod
+    def from_env(cls) -> "ModelRouter":
+        default = os.environ.get("GRAVILOG_MODEL_DEFAULT", DEFAULT_MODEL)
+        routes = dict(DEFAULT_MODEL_ROUTES)
+        prefix = "GRAVILOG_MODEL_"
+        for name, value in os.environ.items():
+            if name.startswith(prefix) and name not in ("GRAVILOG_MODEL_DEFAULT", "GRAVILOG_MODEL_PRICING") and value:
+                routes[name[len(prefix):].lower()] = value
+        pricing = dict(MODEL_PRICING)
+        if os.environ.get("GRAVILOG_MODEL_PRICING"):
+            try:
+                pricing.update({model: tuple(rates) for model, rates in json.loads(os.environ["GRAVILOG_MODEL_PRICING"]).items()})
+            except (ValueError, TypeError) as e:
+                logger.error(f"Ignoring invalid GRAVILOG_MODEL_PRICING: {e}")
+        return cls(routes, default, pricing)
+    
+    def model_for(self, call_type: str) -> str:
+        return self.routes.get(call_type, self.default)
+    
+    def escalates(self, call_type: str, escalation_call_type: str = ESCALATION_ROUTE) -> bool:
+        """True if the escalation route uses a different model than the first pass"""
+        return escalation_call_type in self.routes and self.model_for(escalation_call_type) != self.model_for(call_type)
+    
+    def cost(self, model: str, input_tokens: int, output_tokens: int, cached_tokens: int = 0) -> float:
+        """USD for one call; 0.0 for models without a price"""
+        rates = self.pricing.get(model)
+        if not rates:
+            return 0.0
+        input_rate, output_rate = rates
+        billed_input = (input_tokens - cached_tokens) + cached_tokens * CACHED_INPUT_DISCOUNT
+        return (billed_input * input_rate + output_tokens * output_rate) / 1_000_000
+    
+    def describe(self) -> Dict[str, Any]:
+        return {"default": self.default, "routes": dict(self.routes)}
+
 class GeminiClient:
     """Google Gemini client for medical AI processing"""
     
-    def __init__(self):
-        self.client = genai.Client(api_key=os.environ.get("GEMINI_API_KEY"))
-        self.model = "gemini-2.5-flash"
+    def __init__(self, usage: Optional[UsageTracker] = None, router: Optional[ModelRouter] = None):
+        self.router = router or ModelRouter.from_env()
+        self.model = self.router.default
+        self.usage = usage or usage_tracker
+        # Called with (call_type, seconds) after every request; admission control uses it
+        self.latency_observer: Optional[Callable[[str, float], None]] = None
+        self._client = None
+        self._client_lock = threading.Lock()
+    
+    @property
+    def client(self):
+        """The genai client, created on first use"""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    from google import genai
+                    self._client = genai.Client(api_key=os.environ.get("GEMINI_API_KEY"))
+        return self._client
         
-    def generate_content(self, prompt: str, system_instruction: Optional[str] = None) -> str:
-        """Generate content using Gemini"""
+    def generate_content(self, prompt: str, system_instruction: Optional[str] = None,
+                         call_type: str = "general", session_id: Optional[str] = None,
+                         model: Optional[str] = None, cached_content: Optional[str] = None) -> str:
+        """Generate content using Gemini, with the model routed by call type unless given.
+
+        cached_content names a registered prompt prefix (see core.prompt_cache);
+        it already carries the system instruction. If the API no longer has it,
+        CachedContentUnavailable is raised; any other failure returns "".
+        """
+        model = model or self.router.model_for(call_type)
+        start = time.perf_counter()
         try:
+            from google.genai import types
             config = types.GenerateContentConfig()
-            if system_instruction:
+            if cached_content:
+                config.cached_content = cached_content
+            elif system_instruction:
                 config.system_instruction = system_instruction
                 
             response = self.client.models.generate_content(
-                model=self.model,
+                model=model,
                 contents=prompt,
                 config=config
             )
-            return response.text or ""
+            text = response.text or ""
+            self._observe_latency(time.perf_counter() - start, call_type, model)
+            self._record_usage(response, prompt, system_instruction, text, call_type, session_id,
+                               time.perf_counter() - start, model)
+            return text
         except Exception as e:
-            logger.error(f"Gemini generation error: {e}")
+            logger.error(f"Gemini generation error ({model}): {e}")
+            self._observe_latency(time.perf_counter() - start, call_type, model)
+            GEMINI_ERRORS.inc(call_type=call_type, model=model)
+            self.usage.record(call_type, session_id, latency=time.perf_counter() - start, error=True, model=model)
+            if cached_content and is_cache_unavailable_error(e):
+                raise CachedContentUnavailable(cached_content) from e
             return ""
+    
+    def _observe_latency(self, seconds: float, call_type: str, model: str):
+        GEMINI_LATENCY.observe(seconds, call_type=call_type, model=model)
+        if self.latency_observer is not None:
+            self.latency_observer(call_type, seconds)
+    
+    def _record_usage(self, response, prompt: str, system_instruction: Optional[str], text: str,
+                      call_type: str, session_id: Optional[str], latency: float, model: str):
+        """Record token usage from response metadata, estimating locally if it's missing"""
+        metadata = getattr(response, "usage_metadata", None)
+        input_tokens = getattr(metadata, "prompt_token_count", None)
+        output_tokens = getattr(metadata, "candidates_token_count", None)
+        cached_tokens = getattr(metadata, "cached_content_token_count", None)
+        
+        if input_tokens is None:
+            input_tokens = estimate_tokens(prompt) + estimate_tokens(system_instruction or "")
+        if output_tokens is None:
+            output_tokens = estimate_tokens(text)
+        
+        self.usage.record(
+            call_type,
+            session_id,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            cached_tokens=cached_tokens or 0,
+            latency=latency,
+            model=model,
+            cost=self.router.cost(model, input_tokens, output_tokens, cached_tokens or 0)
+        )
+
+def _format_item(item: Mapping[str, Any]) -> str:
+    context = f"Category: {item.get('category', '')}\n"
+    context += f"Risk Level: {item.get('risk_level', '')}\n"
+    context += f"Symptoms: {', '.join(item.get('symptoms', []))}\n"
+    context += f"Description: {item.get('description', '')}"
+    return context
+
+def _is_high_risk(result: Any) -> bool:
+    return isinstance(result, dict) and str(result.get("risk_level", "")).strip().lower() in ("high", "عالي")
 
 class SimpleRAGRetriever:
     """Simple retrieval system without complex embeddings"""
     
     def __init__(self, knowledge_base: List[Dict]):
         self.knowledge = knowledge_base
+        # Lower-cased matching terms, computed once rather than per query
+        self._index = [
+            (
+                item,
+                tuple(symptom.lower() for symptom in item.get('symptoms', [])),
+                item.get('category', '').lower(),
+                tuple(item.get('description', '').lower().split())
+            )
+            for item in knowledge_base
+        ]
         
+    @RETRIEVAL_LATENCY.timed()
     def retrieve(self, query: str, top_k: int = 3) -> List[str]:
         """Simple keyword-based retrieval"""
         query_lower = query.lower()
         scored_items = []
         
-        for item in self.knowledge:
+        for item, symptoms, category, description_words in self._index:
             score = 0
             # Check symptoms
-            for symptom in item.get('symptoms', []):
-                if symptom.lower() in query_lower:
+            for symptom in symptoms:
+                if symptom in query_lower:
                     score += 3
             
             # Check category and description
-            if item.get('category', '').lower() in query_lower:
+            if category in query_lower:
                 score += 2
-            if any(word in query_lower for word in item.get('description', '').lower().split()):
+            if any(word in query_lower for word in description_words):
                 score += 1
                 
             if score > 0:
@@ -72,13 +227,29 @@ class SimpleRAGRetriever:
 class MedicalRAGSystem:
     """LlamaIndex-based RAG system for medical knowledge"""
     
-    def __init__(self, medical_knowledge: List[Dict]):
+    def __init__(self, medical_knowledge: List[Dict], prompt_token_budget: Optional[int] = None,
+                 knowledge_store=None, prompt_cache=None):
         self.gemini_client = GeminiClient()
         self.knowledge = medical_knowledge
+        # Optional KnowledgeStore: retrieval and keywords then follow its hot-swapped snapshot
+        self.knowledge_store = knowledge_store
+        # Optional PromptPrefixCache: system instruction + knowledge sent once as cached content
+        self.prompt_cache = prompt_cache
+        self._prefix_texts: Dict[Any, str] = {}
+        self._compactors: Dict[Tuple[str, Optional[int]], PromptCompactor] = {}
         self.index = None
         self.query_engine = None
         self._setup_index()
         
+        # Token budget for the assessment prompt; keyword-flagged sentences always survive
+        if prompt_token_budget is None:
+            prompt_token_budget = int(os.environ.get("GRAVILOG_ASSESS_PROMPT_TOKENS", "3000"))
+        risk_keywords = get_risk_keywords()
+        self.prompt_compactor = PromptCompactor(
+            prompt_token_budget,
+            risk_keywords["high"] + risk_keywords["medium"]
+        )
+        
     def _setup_index(self):
         """Setup simple RAG system with medical knowledge"""
         try:
@@ -90,38 +261,107 @@ class MedicalRAGSystem:
             logger.error(f"Error setting up RAG system: {e}")
             self.retriever = None
     
-    def retrieve_context(self, query: str) -> str:
-        """Retrieve relevant medical context"""
-        if not self.retriever:
+    def _snapshot(self):
+        """The knowledge version a call should use from start to finish"""
+        return self.knowledge_store.current if self.knowledge_store is not None else None
+    
+    def _prompt_compactor(self, snapshot, gestational_week: Optional[int] = None) -> PromptCompactor:
+        """Compactor protecting the keywords rule scoring uses: the trimester view's for this week"""
+        if snapshot is None:
+            return self.prompt_compactor
+        view = snapshot.view_for(gestational_week)
+        key = (snapshot.version, view.trimester)
+        compactor = self._compactors.get(key)
+        if compactor is None:
+            keywords = view.risk_keywords
+            compactor = PromptCompactor(self.prompt_compactor.budget_tokens, list(keywords["high"]) + list(keywords["medium"]))
+            # Older versions' compactors are never asked for again
+            compactors = {k: v for k, v in self._compactors.items() if k[0] == snapshot.version}
+            compactors[key] = compactor
+            self._compactors = compactors
+        return compactor
+    
+    def retrieve_context(self, query: str, snapshot=None, gestational_week: Optional[int] = None) -> str:
+        """Retrieve relevant medical context, from the trimester view when the week is known"""
+        if snapshot is None:
+            snapshot = self._snapshot()
+        retriever = snapshot.view_for(gestational_week).retriever if snapshot is not None else self.retriever
+        if not retriever:
             return "Medical knowledge base not available"
             
         try:
             # Use simple retriever to get relevant knowledge
-            items = self.retriever.retrieve(query)
+            items = retriever.retrieve(query)
             if items:
-                context_parts = []
-                for item in items:
-                    context = f"Category: {item.get('category', '')}\n"
-                    context += f"Risk Level: {item.get('risk_level', '')}\n"
-                    context += f"Symptoms: {', '.join(item.get('symptoms', []))}\n"
-                    context += f"Description: {item.get('description', '')}"
-                    context_parts.append(context)
-                return "\n\n".join(context_parts)
+                return "\n\n".join(_format_item(item) for item in items)
             return "No relevant medical context found"
         except Exception as e:
             logger.error(f"Context retrieval error: {e}")
             return "Error retrieving medical context"
     
-    def generate_questions(self, user_responses: List[Dict], language: str = "en") -> List[str]:
+    def _prefix_key(self, snapshot, gestational_week: Optional[int]) -> Tuple[str, Optional[int]]:
+        if snapshot is None:
+            return "local", None
+        return snapshot.version, snapshot.view_for(gestational_week).trimester
+    
+    def _knowledge_prefix(self, snapshot, gestational_week: Optional[int]) -> str:
+        """The whole (trimester-filtered) knowledge base, rendered once per version and view"""
+        key = self._prefix_key(snapshot, gestational_week)
+        text = self._prefix_texts.get(key)
+        if text is None:
+            items = snapshot.view_for(gestational_week).knowledge if snapshot is not None else self.knowledge
+            text = "Medical Knowledge Base:\n\n" + "\n\n".join(_format_item(item) for item in items)
+            if snapshot is not None:
+                # Older versions' texts are never asked for again
+                self._prefix_texts = {k: v for k, v in self._prefix_texts.items() if k[0] == snapshot.version}
+            self._prefix_texts[key] = text
+        return text
+    
+    def _generate(self, call_type: str, language: str, system_instruction: str, inline_prompt: str,
+                  dynamic_prompt: str, session_id: Optional[str], snapshot, gestational_week: Optional[int]) -> str:
+        """Call Gemini through the cached prefix when there is one, else with the inline prompt"""
+        if self.prompt_cache is not None:
+            name = None
+            try:
+                name = self.prompt_cache.get(
+                    self.gemini_client.router.model_for(call_type),
+                    (call_type, language) + self._prefix_key(snapshot, gestational_week),
+                    system_instruction,
+                    self._knowledge_prefix(snapshot, gestational_week)
+                )
+            except Exception as e:
+                logger.error(f"Prompt cache lookup error: {e}")
+            if name:
+                try:
+                    return self.gemini_client.generate_content(
+                        dynamic_prompt, call_type=call_type, session_id=session_id, cached_content=name
+                    )
+                except CachedContentUnavailable:
+                    # Only an expired or deleted entry is worth re-registering and retrying inline;
+                    # an empty answer (e.g. a safety block) would come back empty inline too
+                    self.prompt_cache.invalidate(name)
+        return self.gemini_client.generate_content(
+            inline_prompt, system_instruction, call_type=call_type, session_id=session_id
+        )
+    
+    def generate_questions(self, user_responses: List[Dict], language: str = "en",
+                           session_id: Optional[str] = None,
+                           gestational_week: Optional[int] = None) -> List[str]:
         """Generate contextual medical questions using RAG + Gemini"""
         
+        # Over budget: skip Gemini and use the standard questions
+        if not self.gemini_client.usage.allow(session_id):
+            FALLBACK_ACTIVATIONS.inc(path="questions_budget")
+            return self._get_fallback_questions(language)
+        
         # Create context from user responses
         response_context = ""
         for resp in user_responses[-3:]:  # Last 3 responses
             response_context += f"Q: {resp.get('question', '')}\nA: {resp.get('answer', '')}\n"
         
         # Retrieve relevant medical knowledge
-        medical_context = self.retrieve_context(response_context)
+        snapshot = self._snapshot()
+        medical_context = self.retrieve_context(response_context, snapshot, gestational_week)
         
         # Language-specific prompts
         if language == "ar":
@@ -131,12 +371,13 @@ class MedicalRAGSystem:
 3. مناسبة ثقافياً
 4. تركز على الأعراض والمخاطر المحتملة"""
             
-            prompt = f"""السياق الطبي: {medical_context}
-
-إجابات المريضة السابقة:
+            dynamic_prompt = f"""إجابات المريضة السابقة:
 {response_context}
 
 قم بتوليد 3-5 أسئلة طبية مهمة باللغة العربية فقط. كل سؤال في سطر منفصل بدون ترقيم."""
+            prompt = f"""السياق الطبي: {medical_context}
+
+{dynamic_prompt}"""
 
         else:
             system_instruction = """You are a pregnancy health specialist. Generate 3-5 important medical questions in English based on the patient's previous responses and the provided medical knowledge. Questions should be:
@@ -145,21 +386,26 @@ class MedicalRAGSystem:
 3. Culturally appropriate
 4. Focus on symptoms and potential risks"""
             
-            prompt = f"""Medical Context: {medical_context}
-
-Patient's Previous Responses:
+            dynamic_prompt = f"""Patient's Previous Responses:
 {response_context}
 
 Generate 3-5 important medical questions in English only. Each question on a separate line without numbering."""
+            prompt = f"""Medical Context: {medical_context}
+
+{dynamic_prompt}"""
         
         # Generate questions using Gemini
-        response = self.gemini_client.generate_content(prompt, system_instruction)
+        response = self._generate(
+            "questions", language, system_instruction, prompt, dynamic_prompt,
+            session_id, snapshot, gestational_week
+        )
         
         if response:
             questions = [q.strip() for q in response.split('\n') if q.strip()]
             return questions[:5]  # Max 5 questions
         
         # Fallback questions
+        FALLBACK_ACTIVATIONS.inc(path="questions_llm_failed")
         return self._get_fallback_questions(language)
     
     def _get_fallback_questions(self, language: str) -> List[str]:
@@ -177,16 +423,24 @@ Generate 3-5 important medical questions in English only. Each question on a sep
                 "Are you experiencing severe nausea or vomiting?"
             ]
     
-    def assess_risk(self, responses: List[Dict], language: str = "en") -> Dict[str, Any]:
+    def assess_risk(self, responses: List[Dict], language: str = "en",
+                    session_id: Optional[str] = None,
+                    gestational_week: Optional[int] = None) -> Dict[str, Any]:
         """AI-powered risk assessment using Gemini + medical knowledge"""
         
+        # Over budget: downgrade to the rule-based assessment
+        if not self.gemini_client.usage.allow(session_id):
+            FALLBACK_ACTIVATIONS.inc(path="assessment_budget")
+            return self._fallback_risk_assessment(responses, language)
+        
         # Prepare response context
         response_text = ""
         for resp in responses:
             response_text += f"Q: {resp.get('question', '')}\nA: {resp.get('answer', '')}\n"
         
-        # Get relevant medical context
-        medical_context = self.retrieve_context(response_text)
+        # Get relevant medical context (retrieval is local, so it sees the full transcript)
+        snapshot = self._snapshot()
+        medical_context = self.retrieve_context(response_text, snapshot, gestational_week)
         
         # Risk assessment prompt
         if language == "ar":
@@ -217,19 +471,62 @@ Patient Responses:
 
 Analyze and provide risk assessment in JSON format."""
         
+        # Compact long transcripts to the prompt budget when they overflow it
+        prompt_tokens = estimate_tokens(prompt) + estimate_tokens(system_instruction)
+        compactor = self._prompt_compactor(snapshot, gestational_week)
+        if prompt_tokens > compactor.budget_tokens:
+            overhead = prompt_tokens - estimate_tokens(medical_context) - estimate_tokens(response_text)
+            response_text, medical_context, decisions = compactor.compact(
+                responses, medical_context, overhead_tokens=overhead
+            )
+            logger.info(f"Assessment prompt compacted: {decisions}")
+            prompt = f"""Medical Knowledge: {medical_context}
+
+Patient Responses:
+{response_text}
+
+Analyze and provide risk assessment in JSON format."""
+        
+        # With a cached prefix only the (possibly compacted) transcript is sent
+        dynamic_prompt = f"""Patient Responses:
+{response_text}
+
+Analyze and provide risk assessment in JSON format."""
+        
+        result = None
         try:
             # Generate assessment
-            response = self.gemini_client.generate_content(prompt, system_instruction)
+            response = self._generate(
+                "assessment", language, system_instruction, prompt, dynamic_prompt,
+                session_id, snapshot, gestational_week
+            )
             
             if response:
                 # Try to parse JSON
                 result = json.loads(response)
-                return result
                 
         except Exception as e:
             logger.error(f"Risk assessment error: {e}")
         
+        # High risk or an unusable first pass gets a second opinion from the stronger model
+        if (result is None or _is_high_risk(result)) and self.gemini_client.router.escalates("assessment"):
+            try:
+                response = self._generate(
+                    ESCALATION_ROUTE, language, system_instruction, prompt, dynamic_prompt,
+                    session_id, snapshot, gestational_week
+                )
+                if response:
+                    escalated = json.loads(response)
+                    logger.info(f"Assessment escalated ({'high risk' if result else 'first pass unusable'})")
+                    return escalated
+            except Exception as e:
+                logger.error(f"Escalated risk assessment error: {e}")
+        
+        if result is not None:
+            return result
+        
         # Fallback to rule-based assessment
+        FALLBACK_ACTIVATIONS.inc(path="assessment_llm_failed")
         return self._fallback_risk_assessment(responses, language)
     
     def _fallback_risk_assessment(self, responses: List[Dict], language: str) -> Dict[str, Any]:
@@ -0,0 +1,157 @@
+"""
+LLM token and latency accounting with per-session and per-minute budgets
+"""
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+def _empty_usage() -> Dict[str, Any]:
+    return {
+        "calls": 0,
+        "errors": 0,
+        "input_tokens": 0,
+        "output_tokens": 0,
+        "cached_tokens": 0,
+        "cache_hits": 0,
+        "latency_seconds": 0.0,
+        "cost_usd": 0.0
+    }
+
+def _add(usage: Dict[str, Any], input_tokens: int, output_tokens: int, cached_tokens: int, latency: float,
+         error: bool, cost: float = 0.0):
+    usage["calls"] += 1
+    usage["errors"] += int(error)
+    usage["input_tokens"] += input_tokens
+    usage["output_tokens"] += output_tokens
+    usage["cached_tokens"] += cached_tokens
+    usage["cache_hits"] += int(cached_tokens > 0)
+    usage["latency_seconds"] += latency
+    usage["cost_usd"] += cost
+
+def _summarize(usage: Dict[str, Any]) -> Dict[str, Any]:
+    summary = dict(usage)
+    summary["latency_seconds"] = round(usage["latency_seconds"], 4)
+    summary["cost_usd"] = round(usage["cost_usd"], 6)
+    summary["avg_latency_seconds"] = round(usage["latency_seconds"] / usage["calls"], 4) if usage["calls"] else 0.0
+    summary["total_tokens"] = usage["input_tokens"] + usage["output_tokens"]
+    return summary
+
+class UsageTracker:
+    """Aggregates Gemini usage per session, per call type and globally.
+
+    Budgets are optional: a session over ``session_token_budget`` or a process
+    over ``tokens_per_minute`` is refused further LLM calls, and callers fall
+    back to their rule-based paths.
+    """
+
+    def __init__(self, session_token_budget: Optional[int] = None, tokens_per_minute: Optional[int] = None):
+        self.session_token_budget = session_token_budget
+        self.tokens_per_minute = tokens_per_minute
+        self._lock = threading.Lock()
+        self._global = _empty_usage()
+        self._by_session: Dict[str, Dict[str, Any]] = {}
+        self._by_call_type: Dict[str, Dict[str, Any]] = {}
+        self._by_model: Dict[str, Dict[str, Any]] = {}
+        self._window: Deque[Tuple[float, int]] = deque()
+        self._budget_rejections = 0
+
+    @classmethod
+    def from_env(cls) -> "UsageTracker":
+        session_budget = os.environ.get("GRAVILOG_SESSION_TOKEN_BUDGET")
+        per_minute = os.environ.get("GRAVILOG_TOKENS_PER_MINUTE")
+        return cls(
+            session_token_budget=int(session_budget) if session_budget else None,
+            tokens_per_minute=int(per_minute) if per_minute else None
+        )
+
+    def _tokens_last_minute(self, now: float) -> int:
+        while self._window and self._window[0][0] < now - 60:
+            self._window.popleft()
+        return sum(tokens for _, tokens in self._window)
+
+    def record(
+        self,
+        call_type: str,
+        session_id: Optional[str] = None,
+        input_tokens: int = 0,
+        output_tokens: int = 0,
+        cached_tokens: int = 0,
+        latency: float = 0.0,
+        error: bool = False,
+        model: Optional[str] = None,
+        cost: float = 0.0
+    ):
+        """Record one LLM call"""
+        now = time.time()
+        values = (input_tokens, output_tokens, cached_tokens, latency, error, cost)
+        with self._lock:
+            _add(self._global, *values)
+            _add(self._by_call_type.setdefault(call_type, _empty_usage()), *values)
+            if model:
+                _add(self._by_model.setdefault(model, _empty_usage()), *values)
+            if session_id:
+                _add(self._by_session.setdefault(session_id, _empty_usage()), *values)
+            self._window.append((now, input_tokens + output_tokens))
+
+    def allow(self, session_id: Optional[str] = None) -> bool:
+        """True if another LLM call fits within the session and per-minute budgets"""
+        with self._lock:
+            if self.tokens_per_minute is not None and self._tokens_last_minute(time.time()) >= self.tokens_per_minute:
+                self._budget_rejections += 1
+                logger.warning("Per-minute LLM token budget exhausted; using rule-based path")
+                return False
+            if self.session_token_budget is not None and session_id:
+                usage = self._by_session.get(session_id)
+                if usage and usage["input_tokens"] + usage["output_tokens"] >= self.session_token_budget:
+                    self._budget_rejections += 1
+                    logger.warning(f"Session {session_id} exceeded its LLM token budget; using rule-based path")
+                    return False
+            return True
+
+    def session_usage(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            usage = self._by_session.get(session_id)
+            return _summarize(usage) if usage else None
+
+    def forget_session(self, session_id: str):
+        with self._lock:
+            self._by_session.pop(session_id, None)
+
+    def export_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Raw per-session counters, to be stored with a session leaving memory"""
+        with self._lock:
+            usage = self._by_session.get(session_id)
+            return dict(usage) if usage else None
+
+    def restore_session(self, session_id: str, usage: Optional[Dict[str, Any]]):
+        """Bring back counters from export_session, so the session budget still applies"""
+        if not usage:
+            return
+        with self._lock:
+            current = self._by_session.setdefault(session_id, _empty_usage())
+            for key, value in usage.items():
+                if key in current:
+                    current[key] += value
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "global": _summarize(self._global),
+                "by_call_type": {name: _summarize(usage) for name, usage in self._by_call_type.items()},
+                "by_model": {name: _summarize(usage) for name, usage in self._by_model.items()},
+                "sessions_tracked": len(self._by_session),
+                "tokens_last_minute": self._tokens_last_minute(time.time()),
+                "budgets": {
+                    "session_token_budget": self.session_token_budget,
+                    "tokens_per_minute": self.tokens_per_minute,
+                    "rejections": self._budget_rejections
+                }
+            }
+
+# Process-wide tracker used by GeminiClient
+usage_tracker = UsageTracker.from_env()
@@ -0,0 +1,71 @@
+"""
+Rendered page shell cache with strong ETags and conditional GET support
+"""
+import hashlib
+import logging
+import threading
+from typing import Dict, Any, Tuple
+
+from fastapi import Request
+from fastapi.responses import HTMLResponse, Response
+from fastapi.templating import Jinja2Templates
+
+from translations import normalize_language
+
+logger = logging.getLogger(__name__)
+
+class RenderedPageCache:
+    """Renders each template once per language and serves it with a strong ETag.
+
+    Only session-independent page shells belong here; per-session data must be
+    fetched by the page separately so one cached body serves every session.
+    """
+
+    def __init__(self, templates: Jinja2Templates):
+        self.templates = templates
+        self._pages: Dict[Tuple[str, str], Tuple[bytes, str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, template_name: str, language: str, context: Dict[str, Any]) -> Tuple[bytes, str]:
+        """Return (body, etag) for the page shell, rendering it on first use"""
+        # Client-supplied languages outside the catalog share the English entry, keeping the cache bounded
+        language = normalize_language(language)
+        key = (template_name, language)
+        page = self._pages.get(key)
+        if page is None:
+            with self._lock:
+                page = self._pages.get(key)
+                if page is None:
+                    body = self.templates.get_template(template_name).render(context).encode("utf-8")
+                    etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+                    page = (body, etag)
+                    self._pages[key] = page
+                    logger.info(f"Cached rendered page {template_name} ({language}), {len(body)} bytes")
+        return page
+
+    def clear(self):
+        with self._lock:
+            self._pages.clear()
+
+    @staticmethod
+    def _etag_matches(request: Request, etag: str) -> bool:
+        if_none_match = request.headers.get("if-none-match")
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        # If-None-Match uses weak comparison, so ignore any W/ prefix
+        candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return etag in candidates
+
+    def response(self, request: Request, template_name: str, language: str, context: Dict[str, Any]) -> Response:
+        """Serve the cached shell, or 304 Not Modified when the client already has it"""
+        body, etag = self.get(template_name, language, context)
+        headers = {
+            "ETag": etag,
+            # Allow caching but always revalidate, which costs a bodiless 304
+            "Cache-Control": "no-cache"
+        }
+        if self._etag_matches(request, etag):
+            return Response(status_code=304, headers=headers)
+        return HTMLResponse(content=body, headers=headers)
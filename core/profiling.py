@@ -0,0 +1,194 @@
+"""
+On-demand request profiling: sampled or secret-header-triggered, dumped per endpoint
+
+Two modes:
+- "sample" (default): a background thread samples every thread's stack every few
+  milliseconds and writes collapsed stacks (flamegraph.pl / speedscope input).
+  This sees threadpool work such as blocking Gemini calls.
+- "cprofile": deterministic cProfile of the event loop thread, written as pstats.
+
+Only one request is profiled at a time; others pass through untouched. Dumps
+are grouped by matched route (unmatched paths share one group) and only the
+newest ``max_per_endpoint`` are kept per route.
+"""
+import cProfile
+import hmac
+import itertools
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "x-gravilog-profile"
+
+# Innermost frames that just mean "this thread is idle"
+_IDLE_FUNCTIONS = {"wait", "select", "poll", "_worker", "accept"}
+_SAFE_NAME = re.compile(r'^[\w.-]+$')
+
+class StackSampler:
+    """Wall-clock sampling profiler over all threads"""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="gravilog-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        return self.samples
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or frame.f_code.co_name in _IDLE_FUNCTIONS:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                self.samples[";".join(reversed(stack))] += 1
+
+def endpoint_slug(route_path: Optional[str]) -> str:
+    """Directory name for a route template such as /question/{session_id}"""
+    if route_path is None:
+        # 404 probes and mounted static files: one bucket, not one per raw path
+        return "unmatched"
+    segments = [segment for segment in route_path.strip("/").split("/") if segment]
+    # "{session_id}" -> "session_id", "{path:path}" -> "path"
+    parts = [re.sub(r'[^\w-]', '_', segment.strip("{}").split(":")[0]) for segment in segments]
+    return "_".join(parts) or "root"
+
+class ProfileStore:
+    """Directory of profile dumps, one sub-directory per endpoint, newest ``max_per_endpoint`` kept"""
+
+    def __init__(self, directory: str, max_per_endpoint: int = 20):
+        self.directory = os.path.abspath(directory)
+        self.max_per_endpoint = max_per_endpoint
+        self._sequence = itertools.count(1)
+
+    def _new_path(self, endpoint: str, extension: str) -> str:
+        endpoint_dir = os.path.join(self.directory, endpoint)
+        os.makedirs(endpoint_dir, exist_ok=True)
+        # Pid and sequence keep dumps from workers, or within one millisecond, apart
+        stamp = f"{time.strftime('%Y%m%d_%H%M%S')}_{int(time.time() * 1000) % 1000:03d}"
+        return os.path.join(endpoint_dir, f"{stamp}_{os.getpid()}_{next(self._sequence)}{extension}")
+
+    def _prune(self, endpoint: str):
+        endpoint_dir = os.path.join(self.directory, endpoint)
+        paths = [os.path.join(endpoint_dir, name) for name in os.listdir(endpoint_dir)]
+        paths.sort(key=lambda path: os.stat(path).st_mtime_ns)
+        for path in paths[:max(0, len(paths) - self.max_per_endpoint)]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass  # Another worker pruned it first
+
+    def save_collapsed(self, endpoint: str, samples: Counter) -> str:
+        path = self._new_path(endpoint, ".collapsed")
+        with open(path, "w") as f:
+            for stack, count in samples.most_common():
+                f.write(f"{stack} {count}\n")
+        self._prune(endpoint)
+        return path
+
+    def save_pstats(self, endpoint: str, profiler: cProfile.Profile) -> str:
+        path = self._new_path(endpoint, ".pstats")
+        profiler.dump_stats(path)
+        self._prune(endpoint)
+        return path
+
+    def list(self) -> List[Dict[str, Any]]:
+        profiles = []
+        if not os.path.isdir(self.directory):
+            return profiles
+        for endpoint in sorted(os.listdir(self.directory)):
+            endpoint_dir = os.path.join(self.directory, endpoint)
+            if not os.path.isdir(endpoint_dir):
+                continue
+            for name in sorted(os.listdir(endpoint_dir), reverse=True):
+                stat = os.stat(os.path.join(endpoint_dir, name))
+                profiles.append({
+                    "endpoint": endpoint,
+                    "name": name,
+                    "bytes": stat.st_size,
+                    "created_at": stat.st_mtime,
+                    "url": f"/admin/profiles/{endpoint}/{name}"
+                })
+        return profiles
+
+    def resolve(self, endpoint: str, name: str) -> Optional[str]:
+        """Path of a stored profile, or None if it doesn't exist or the name is unsafe"""
+        if not _SAFE_NAME.match(endpoint) or not _SAFE_NAME.match(name):
+            return None
+        path = os.path.join(self.directory, endpoint, name)
+        return path if os.path.isfile(path) else None
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling a sample of requests, or any carrying the secret header"""
+
+    def __init__(self, app, store: ProfileStore, sample_rate: float = 0.0,
+                 secret: Optional[str] = None, mode: str = "sample"):
+        self.app = app
+        self.store = store
+        self.sample_rate = sample_rate
+        self.secret = secret
+        self.mode = mode
+        self._busy = threading.Lock()
+
+    def _requested(self, scope) -> bool:
+        if not self.secret:
+            return False
+        for name, value in scope.get("headers", []):
+            if name.decode("latin-1") == PROFILE_HEADER:
+                return hmac.compare_digest(value.decode("latin-1"), self.secret)
+        return False
+
+    @staticmethod
+    def _endpoint(scope) -> str:
+        # The router records the matched route in the scope while handling the request
+        route = scope.get("route")
+        return endpoint_slug(getattr(route, "path", None))
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not (self._requested(scope) or random.random() < self.sample_rate):
+            await self.app(scope, receive, send)
+            return
+        if not self._busy.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            if self.mode == "cprofile":
+                profiler = cProfile.Profile()
+                profiler.enable()
+                try:
+                    await self.app(scope, receive, send)
+                finally:
+                    profiler.disable()
+                    path = self.store.save_pstats(self._endpoint(scope), profiler)
+            else:
+                sampler = StackSampler()
+                sampler.start()
+                try:
+                    await self.app(scope, receive, send)
+                finally:
+                    path = self.store.save_collapsed(self._endpoint(scope), sampler.stop())
+            logger.info(f"Profiled {scope.get('method')} {scope.get('path')} -> {path}")
+        finally:
+            self._busy.release()
@@ -0,0 +1,113 @@
+"""
+Token-budgeted prompt compaction for long assessment transcripts
+"""
+import logging
+import math
+import re
+from typing import Dict, List, Any, Iterable, Tuple
+
+logger = logging.getLogger(__name__)
+
+_SENTENCE_SPLIT = re.compile(r'(?<=[.!?؟])\s+|\n+')
+
+def estimate_tokens(text: str) -> int:
+    """Cheap local token estimate: ~4 chars/token for ASCII, ~2 for Arabic and other scripts"""
+    if not text:
+        return 0
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return math.ceil(ascii_chars / 4 + (len(text) - ascii_chars) / 2)
+
+def dedupe_blocks(context: str) -> Tuple[List[str], int]:
+    """Split retrieved context into blocks and drop exact repeats"""
+    seen = set()
+    blocks = []
+    for block in context.split("\n\n"):
+        key = block.strip()
+        if not key or key in seen:
+            continue
+        seen.add(key)
+        blocks.append(key)
+    return blocks, len([b for b in context.split("\n\n") if b.strip()]) - len(blocks)
+
+def split_sentences(text: str) -> List[str]:
+    return [sentence.strip() for sentence in _SENTENCE_SPLIT.split(text) if sentence.strip()]
+
+class PromptCompactor:
+    """Fits transcript and retrieved context into a token budget.
+
+    Steps, applied only until the prompt fits: drop duplicate context blocks,
+    compress older answers to their keyword-flagged sentences (or a short
+    lead), trim trailing context blocks, then compress recent answers the
+    same way. Keyword-flagged sentences are never dropped.
+    """
+
+    def __init__(self, budget_tokens: int, keywords: Iterable[str], keep_recent: int = 3, lead_chars: int = 160):
+        self.budget_tokens = budget_tokens
+        self.keywords = [keyword.lower() for keyword in keywords]
+        self.keep_recent = keep_recent
+        self.lead_chars = lead_chars
+
+    def _flagged(self, sentence: str) -> bool:
+        lowered = sentence.lower()
+        return any(keyword in lowered for keyword in self.keywords)
+
+    def compress_answer(self, answer: str) -> str:
+        """Keep keyword-flagged sentences; otherwise a truncated first sentence"""
+        sentences = split_sentences(answer)
+        flagged = list(dict.fromkeys(sentence for sentence in sentences if self._flagged(sentence)))
+        if flagged:
+            return " ".join(flagged)
+        lead = sentences[0] if sentences else answer
+        return lead if len(lead) <= self.lead_chars else lead[:self.lead_chars].rstrip() + "…"
+
+    @staticmethod
+    def _format_pairs(pairs: List[Tuple[str, str]]) -> str:
+        return "".join(f"Q: {question}\nA: {answer}\n" for question, answer in pairs)
+
+    def _total(self, context_blocks: List[str], pairs: List[Tuple[str, str]], overhead: int) -> int:
+        return overhead + estimate_tokens("\n\n".join(context_blocks)) + estimate_tokens(self._format_pairs(pairs))
+
+    def compact(self, responses: List[Dict], medical_context: str, overhead_tokens: int = 0) -> Tuple[str, str, Dict[str, Any]]:
+        """Return (response_text, medical_context, decisions) fitted to the budget"""
+        pairs = [(resp.get('question', ''), resp.get('answer', '')) for resp in responses]
+        context_blocks, duplicate_blocks = dedupe_blocks(medical_context)
+
+        decisions: Dict[str, Any] = {
+            "budget_tokens": self.budget_tokens,
+            "original_tokens": overhead_tokens + estimate_tokens(medical_context) + estimate_tokens(self._format_pairs(pairs)),
+            "duplicate_context_blocks_removed": duplicate_blocks,
+            "older_answers_compressed": 0,
+            "context_blocks_trimmed": 0,
+            "recent_answers_compressed": 0
+        }
+
+        older_count = max(len(pairs) - self.keep_recent, 0)
+
+        # Older answers first: they matter least for the current risk picture
+        for i in range(older_count):
+            if self._total(context_blocks, pairs, overhead_tokens) <= self.budget_tokens:
+                break
+            question, answer = pairs[i]
+            compressed = self.compress_answer(answer)
+            if compressed != answer:
+                pairs[i] = (question, compressed)
+                decisions["older_answers_compressed"] += 1
+
+        # Then retrieved context, lowest-ranked blocks last in the list, keeping the top one
+        while len(context_blocks) > 1 and self._total(context_blocks, pairs, overhead_tokens) > self.budget_tokens:
+            context_blocks.pop()
+            decisions["context_blocks_trimmed"] += 1
+
+        # Finally the most recent answers
+        for i in range(older_count, len(pairs)):
+            if self._total(context_blocks, pairs, overhead_tokens) <= self.budget_tokens:
+                break
+            question, answer = pairs[i]
+            compressed = self.compress_answer(answer)
+            if compressed != answer:
+                pairs[i] = (question, compressed)
+                decisions["recent_answers_compressed"] += 1
+
+        decisions["final_tokens"] = self._total(context_blocks, pairs, overhead_tokens)
+        decisions["within_budget"] = decisions["final_tokens"] <= self.budget_tokens
+        return self._format_pairs(pairs), "\n\n".join(context_blocks), decisions
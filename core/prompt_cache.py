@@ -0,0 +1,236 @@
+"""
+Prompt-prefix cache: static system instructions and knowledge registered once as cached content
+
+The long, fixed part of each prompt is the bilingual system instruction plus
+the rendered knowledge base. It is registered with the backend once per
+(model, call type, language, knowledge version, trimester) and referenced by
+name, so each call sends only the patient transcript. Entries are refreshed
+when used near expiry and lapse on their own when idle. A prefix below the
+model's caching minimum, a failed create, or a reference the API reports as
+not found or expired (CachedContentUnavailable) falls back to the inline
+system_instruction prompt.
+
+Backends: GenaiCacheBackend (client.caches) in production, LocalCacheBackend
+as an in-process stand-in for tests and benchmarks.
+"""
+import itertools
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from core.prompt_budget import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Smallest prefix the API will cache; below it caching is refused (and pointless)
+MIN_CACHE_TOKENS = {"gemini-2.5-pro": 4096}
+DEFAULT_MIN_CACHE_TOKENS = 1024
+
+class CachedContentUnavailable(Exception):
+    """A call referenced a cache entry the API no longer has (expired or deleted)"""
+
+    def __init__(self, name: str):
+        super().__init__(f"Cached content {name} not found or expired")
+        self.name = name
+
+def is_cache_unavailable_error(error: Exception) -> bool:
+    """True for the API's not-found/expired answer to a cached_content reference.
+
+    The API reports a missing entry as 403 or 404 (sometimes 400 once expired),
+    always naming the cached content in the message.
+    """
+    code = getattr(error, "code", None)
+    message = str(getattr(error, "message", None) or error).lower()
+    return code in (400, 403, 404) and ("cachedcontent" in message or "cached content" in message)
+
+class GenaiCacheBackend:
+    """Cached content via google-genai's client.caches"""
+
+    def __init__(self, gemini_client):
+        self.gemini_client = gemini_client
+
+    def create(self, model: str, system_instruction: str, contents: str, ttl_seconds: float, display_name: str) -> str:
+        from google.genai import types
+        cache = self.gemini_client.client.caches.create(
+            model=model,
+            config=types.CreateCachedContentConfig(
+                display_name=display_name,
+                system_instruction=system_instruction,
+                contents=[contents],
+                ttl=f"{int(ttl_seconds)}s"
+            )
+        )
+        return cache.name
+
+    def refresh(self, name: str, ttl_seconds: float):
+        from google.genai import types
+        self.gemini_client.client.caches.update(name=name, config=types.UpdateCachedContentConfig(ttl=f"{int(ttl_seconds)}s"))
+
+    def delete(self, name: str):
+        self.gemini_client.client.caches.delete(name=name)
+
+class LocalCacheBackend:
+    """In-process stand-in with the same contract; resolve() lets a stub client expand a reference"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._entries: Dict[str, Tuple[str, str, str, float]] = {}
+        self.creates = 0
+        self.refreshes = 0
+
+    def create(self, model: str, system_instruction: str, contents: str, ttl_seconds: float, display_name: str) -> str:
+        with self._lock:
+            name = f"cachedContents/local-{next(self._ids)}"
+            self._entries[name] = (model, system_instruction, contents, time.time() + ttl_seconds)
+            self.creates += 1
+            return name
+
+    def refresh(self, name: str, ttl_seconds: float):
+        with self._lock:
+            model, system_instruction, contents, _ = self._entries[name]
+            self._entries[name] = (model, system_instruction, contents, time.time() + ttl_seconds)
+            self.refreshes += 1
+
+    def delete(self, name: str):
+        with self._lock:
+            self._entries.pop(name, None)
+
+    def resolve(self, name: str) -> Tuple[str, str, str]:
+        """(model, system_instruction, contents); CachedContentUnavailable if unknown or expired, like the API"""
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                raise CachedContentUnavailable(name)
+            model, system_instruction, contents, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[name]
+                raise CachedContentUnavailable(name)
+            return model, system_instruction, contents
+
+class _Entry:
+    def __init__(self, name: str, expires_at: float, tokens: int):
+        self.name = name
+        self.expires_at = expires_at
+        self.tokens = tokens
+        self.uses = 0
+
+class PromptPrefixCache:
+    """Maps static prompt prefixes to backend cache names, creating and refreshing them on demand"""
+
+    def __init__(self, backend, ttl_seconds: float = 3600.0, refresh_margin: float = 300.0,
+                 min_tokens: Optional[int] = None, retry_seconds: float = 60.0):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.refresh_margin = refresh_margin
+        self.min_tokens = min_tokens
+        self.retry_seconds = retry_seconds
+        self._lock = threading.Lock()
+        self._key_locks: Dict[Hashable, threading.Lock] = {}
+        self._entries: Dict[Hashable, _Entry] = {}
+        self._failed_until: Dict[Hashable, float] = {}
+        self.hits = 0
+        self.creates = 0
+        self.refreshes = 0
+        self.failures = 0
+        self.too_small = 0
+
+    @classmethod
+    def from_env(cls, gemini_client) -> Optional["PromptPrefixCache"]:
+        """GRAVILOG_PROMPT_CACHE=genai (default) or off"""
+        mode = os.environ.get("GRAVILOG_PROMPT_CACHE", "genai").lower()
+        if mode in ("off", "0", "false"):
+            return None
+        min_tokens = os.environ.get("GRAVILOG_PROMPT_CACHE_MIN_TOKENS")
+        return cls(
+            GenaiCacheBackend(gemini_client),
+            ttl_seconds=float(os.environ.get("GRAVILOG_PROMPT_CACHE_TTL_SECONDS", "3600")),
+            min_tokens=int(min_tokens) if min_tokens else None
+        )
+
+    def _min_tokens(self, model: str) -> int:
+        if self.min_tokens is not None:
+            return self.min_tokens
+        return MIN_CACHE_TOKENS.get(model, DEFAULT_MIN_CACHE_TOKENS)
+
+    def _key_lock(self, key: Hashable) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def get(self, model: str, key: Hashable, system_instruction: str, contents: str) -> Optional[str]:
+        """Cache name for this prefix, or None to send it inline (blocking; may call the backend)"""
+        full_key = (model, key)
+        now = time.time()
+        entry = self._entries.get(full_key)
+        if entry and entry.expires_at - now > self.refresh_margin:
+            with self._lock:
+                entry.uses += 1
+                self.hits += 1
+            return entry.name
+        if self._failed_until.get(full_key, 0) > now:
+            return None
+
+        tokens = estimate_tokens(system_instruction) + estimate_tokens(contents)
+        if tokens < self._min_tokens(model):
+            with self._lock:
+                self.too_small += 1
+            return None
+
+        # One create/refresh per prefix at a time; other callers wait and reuse it
+        with self._key_lock(full_key):
+            entry = self._entries.get(full_key)
+            now = time.time()
+            if entry and entry.expires_at - now > self.refresh_margin:
+                with self._lock:
+                    entry.uses += 1
+                    self.hits += 1
+                return entry.name
+            try:
+                if entry and entry.expires_at > now:
+                    self.backend.refresh(entry.name, self.ttl_seconds)
+                    entry.expires_at = now + self.ttl_seconds
+                    with self._lock:
+                        self.refreshes += 1
+                else:
+                    display_name = "gravilog-" + "-".join(str(part) for part in (key if isinstance(key, tuple) else (key,)))
+                    name = self.backend.create(model, system_instruction, contents, self.ttl_seconds, display_name[:120])
+                    entry = _Entry(name, now + self.ttl_seconds, tokens)
+                    self._entries[full_key] = entry
+                    with self._lock:
+                        self.creates += 1
+                    logger.info(f"Registered cached prompt prefix {name} for {model} {key} (~{tokens} tokens)")
+            except Exception as e:
+                logger.error(f"Prompt cache {'refresh' if entry else 'create'} failed for {model} {key}: {e}")
+                self._entries.pop(full_key, None)
+                self._failed_until[full_key] = now + self.retry_seconds
+                with self._lock:
+                    self.failures += 1
+                return None
+            with self._lock:
+                entry.uses += 1
+            return entry.name
+
+    def invalidate(self, name: str):
+        """Forget an entry the backend rejected (expired or deleted); the next call recreates it"""
+        for full_key, entry in list(self._entries.items()):
+            if entry.name == name:
+                self._entries.pop(full_key, None)
+                logger.warning(f"Cached prompt prefix {name} rejected; will re-register")
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        return {
+            "entries": [
+                {"model": model, "key": list(key) if isinstance(key, tuple) else key, "name": entry.name,
+                 "tokens": entry.tokens, "uses": entry.uses, "expires_in_seconds": round(entry.expires_at - now, 1)}
+                for (model, key), entry in list(self._entries.items())
+            ],
+            "hits": self.hits,
+            "creates": self.creates,
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "below_minimum": self.too_small,
+            "ttl_seconds": self.ttl_seconds
+        }
@@ -0,0 +1,229 @@
+"""
+Cold-tier archive for completed sessions: append-only zlib segments with an offset index
+"""
+import asyncio
+import json
+import logging
+import os
+import struct
+import threading
+import time
+import zlib
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+_LENGTH = struct.Struct(">I")
+INDEX_FILE = "index.tsv"
+
+def encode_session(session: Dict[str, Any]) -> bytes:
+    record = dict(session)
+    created_at = record.get("created_at")
+    if isinstance(created_at, datetime):
+        record["created_at"] = created_at.isoformat()
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+def _decode_session(data: bytes) -> Dict[str, Any]:
+    session = json.loads(data)
+    if isinstance(session.get("created_at"), str):
+        try:
+            session["created_at"] = datetime.fromisoformat(session["created_at"])
+        except ValueError:
+            pass
+    return session
+
+class SessionArchive:
+    """Append-only segment files of compressed session records.
+
+    Each record is a 4-byte length followed by zlib-compressed JSON. The index
+    (session id -> segment, offset, length, plus the session's assessed_at for
+    the export cursor) is kept in memory and appended to index.tsv, so it
+    survives restarts. Re-archiving a session appends a new
+    record and the index points at the latest one. Each process writes its own
+    segment files, so forked workers never interleave records.
+    """
+
+    def __init__(self, directory: str, max_segment_bytes: int = 64 * 1024 * 1024, compression_level: int = 6):
+        self.directory = directory
+        self.max_segment_bytes = max_segment_bytes
+        self.compression_level = compression_level
+        self._lock = threading.Lock()
+        self._index: Dict[str, Tuple[str, int, int]] = {}
+        self._assessed_at: Dict[str, Optional[float]] = {}
+        self.uncompressed_bytes = 0
+        self.compressed_bytes = 0
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+        self._segment_number = 1
+        self._segment_pid = None
+
+    def _segment_path(self, segment: str) -> str:
+        return os.path.join(self.directory, segment)
+
+    def _current_segment(self) -> str:
+        # Re-evaluated per append: the archive may be created before gunicorn forks
+        if self._segment_pid != os.getpid():
+            self._segment_pid = os.getpid()
+            self._segment_number = 1
+        return f"segment-{self._segment_pid}-{self._segment_number:04d}.zlog"
+
+    def _load_index(self):
+        path = os.path.join(self.directory, INDEX_FILE)
+        if not os.path.exists(path):
+            return
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                parts = line.rstrip("\n").split("\t")
+                if len(parts) in (5, 6):
+                    session_id, segment, offset, length, raw_length = parts[:5]
+                    self._index[session_id] = (segment, int(offset), int(length))
+                    # Lines written before the column existed have no assessment time
+                    self._assessed_at[session_id] = float(parts[5]) if len(parts) == 6 and parts[5] else None
+                    self.compressed_bytes += int(length)
+                    self.uncompressed_bytes += int(raw_length)
+        logger.info(f"Session archive index loaded: {len(self._index)} sessions")
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def session_ids(self) -> List[str]:
+        return list(self._index.keys())
+
+    def assessed_times(self) -> Dict[str, Optional[float]]:
+        """Session id -> when its archived assessment was stored (None if unknown)"""
+        return dict(self._assessed_at)
+
+    def append(self, session: Dict[str, Any]):
+        """Compress and append one session (blocking; run in the threadpool)"""
+        raw = encode_session(session)
+        compressed = zlib.compress(raw, self.compression_level)
+        with self._lock:
+            segment = self._current_segment()
+            path = self._segment_path(segment)
+            while os.path.exists(path) and os.path.getsize(path) + len(compressed) > self.max_segment_bytes:
+                self._segment_number += 1
+                segment = self._current_segment()
+                path = self._segment_path(segment)
+            with open(path, "ab") as f:
+                offset = f.tell()
+                f.write(_LENGTH.pack(len(compressed)) + compressed)
+            # One short O_APPEND write per line, so workers sharing the index don't interleave
+            with open(os.path.join(self.directory, INDEX_FILE), "a", encoding="utf-8") as f:
+                assessed_at = session.get("assessed_at")
+                f.write(f"{session['id']}\t{segment}\t{offset}\t{len(compressed)}\t{len(raw)}\t"
+                        f"{assessed_at if assessed_at is not None else ''}\n")
+            self._index[session["id"]] = (segment, offset, len(compressed))
+            self._assessed_at[session["id"]] = assessed_at
+            self.compressed_bytes += len(compressed)
+            self.uncompressed_bytes += len(raw)
+
+    def load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Read one session back, or None if it was never archived"""
+        entry = self._index.get(session_id)
+        if entry is None:
+            return None
+        segment, offset, length = entry
+        with open(self._segment_path(segment), "rb") as f:
+            f.seek(offset + _LENGTH.size)
+            return _decode_session(zlib.decompress(f.read(length)))
+
+    def stats(self) -> Dict[str, Any]:
+        segments = sorted({entry[0] for entry in self._index.values()})
+        disk_bytes = sum(os.path.getsize(self._segment_path(s)) for s in segments if os.path.exists(self._segment_path(s)))
+        return {
+            "sessions": len(self._index),
+            "segments": len(segments),
+            "disk_bytes": disk_bytes,
+            "live_compressed_bytes": sum(entry[2] for entry in self._index.values()),
+            "uncompressed_bytes_written": self.uncompressed_bytes,
+            "compressed_bytes_written": self.compressed_bytes,
+            "compression_ratio": round(self.uncompressed_bytes / self.compressed_bytes, 2) if self.compressed_bytes else None
+        }
+
+class SessionArchiver:
+    """Periodically moves idle, completed sessions from the hot dict into the archive"""
+
+    def __init__(
+        self,
+        sessions: Dict[str, Dict],
+        archive: SessionArchive,
+        idle_seconds: float = 900.0,
+        interval: float = 60.0,
+        is_busy: Callable[[str], bool] = lambda session_id: False,
+        on_evict: Callable[[str], None] = lambda session_id: None,
+        archive_fields: Callable[[str], Dict[str, Any]] = lambda session_id: {}
+    ):
+        self.sessions = sessions
+        self.archive = archive
+        self.idle_seconds = idle_seconds
+        self.interval = interval
+        self.is_busy = is_busy
+        # Per-session state kept outside the sessions dict: stored with the archived copy, then dropped
+        self.archive_fields = archive_fields
+        self.on_evict = on_evict
+        self.task: Optional[asyncio.Task] = None
+        self.archived_total = 0
+        self.last_run: Optional[float] = None
+
+    def _candidates(self, now: float) -> List[Tuple[Dict, int, float]]:
+        """(session, transcript version, last activity), snapshotted on the event loop"""
+        return [
+            (session, session["transcript_version"], session.get("last_activity", 0))
+            for session_id, session in list(self.sessions.items())
+            if session.get("risk_assessment")
+            and session.get("risk_assessment_version") == session.get("transcript_version")
+            and now - session.get("last_activity", 0) >= self.idle_seconds
+            and not self.is_busy(session_id)
+        ]
+
+    def _write(self, candidates: List[Tuple[Dict, int, float]]) -> List[Tuple[str, int, float]]:
+        written = []
+        for session, version, touched in candidates:
+            # Rehydrated and unchanged since: the archived copy is still current
+            if session.get("archived_version") != version:
+                self.archive.append(dict(session, archived_version=version, **self.archive_fields(session["id"])))
+            written.append((session["id"], version, touched))
+        return written
+
+    async def run_once(self) -> int:
+        """Archive eligible sessions; returns how many left hot storage"""
+        self.last_run = time.time()
+        candidates = self._candidates(self.last_run)
+        if not candidates:
+            return 0
+        written = await run_in_threadpool(self._write, candidates)
+
+        # Back on the event loop: only evict sessions nobody touched while we were writing
+        evicted = 0
+        for session_id, version, touched in written:
+            session = self.sessions.get(session_id)
+            if session and session["transcript_version"] == version and session.get("last_activity", 0) == touched:
+                del self.sessions[session_id]
+                self.on_evict(session_id)
+                evicted += 1
+        self.archived_total += evicted
+        logger.info(f"Archived {evicted} completed sessions ({len(self.sessions)} hot)")
+        return evicted
+
+    async def start(self):
+        self.task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"Session archival error: {e}")
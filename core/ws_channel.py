@@ -0,0 +1,112 @@
+"""
+WebSocket channel helpers for the chat assessment conversation
+"""
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+logger = logging.getLogger(__name__)
+
+MessageHandler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+class SessionChannel:
+    """One persistent conversation connection bound to a session.
+
+    Outbound messages go through a bounded queue drained by a single sender
+    task: producers await when the client reads slowly, so a stalled socket
+    applies backpressure instead of buffering without limit. Inbound messages
+    are handled one at a time, in order. The server pings every
+    ``heartbeat_interval`` seconds and closes connections that stay silent
+    for ``idle_timeout`` seconds, or whose outbox is still full at a ping.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        session_id: str,
+        max_pending: int = 16,
+        heartbeat_interval: float = 15.0,
+        idle_timeout: float = 60.0,
+        max_message_bytes: int = 16 * 1024
+    ):
+        self.websocket = websocket
+        self.session_id = session_id
+        self.outbox: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+        self.heartbeat_interval = heartbeat_interval
+        self.idle_timeout = idle_timeout
+        self.max_message_bytes = max_message_bytes
+        self.last_seen = time.monotonic()
+        self.closed = False
+
+    async def send(self, message: Dict[str, Any]):
+        """Queue a message for the client, waiting while the outbox is full"""
+        if not self.closed:
+            await self.outbox.put(message)
+
+    async def _sender(self):
+        while True:
+            message = await self.outbox.get()
+            await self.websocket.send_text(json.dumps(message, ensure_ascii=False))
+
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            if time.monotonic() - self.last_seen > self.idle_timeout:
+                logger.info(f"Closing idle conversation socket for session {self.session_id}")
+                await self.websocket.close(code=1001)
+                return
+            # Never wait on the outbox here: a client that stopped reading would stall the idle check too
+            try:
+                self.outbox.put_nowait({"type": "ping", "timestamp": time.time()})
+            except asyncio.QueueFull:
+                logger.info(f"Closing conversation socket for session {self.session_id}: client not reading")
+                self.closed = True
+                await self.websocket.close(code=1008)
+                return
+
+    async def _receiver(self, handler: MessageHandler):
+        while True:
+            raw = await self.websocket.receive_text()
+            self.last_seen = time.monotonic()
+
+            if len(raw) > self.max_message_bytes:
+                await self.send({"type": "error", "message": "Message too large"})
+                continue
+            try:
+                message = json.loads(raw)
+            except ValueError:
+                await self.send({"type": "error", "message": "Invalid JSON"})
+                continue
+            if not isinstance(message, dict):
+                await self.send({"type": "error", "message": "Expected a JSON object"})
+                continue
+
+            if message.get("type") == "pong":
+                continue
+            await handler(message)
+
+    async def serve(self, handler: MessageHandler, on_connect: Optional[Callable[[], Awaitable[None]]] = None):
+        """Run the connection until the client disconnects or goes idle"""
+        sender = asyncio.create_task(self._sender())
+        heartbeat = asyncio.create_task(self._heartbeat())
+        try:
+            if on_connect:
+                await on_connect()
+            receiver = asyncio.create_task(self._receiver(handler))
+            done, _ = await asyncio.wait({receiver, sender, heartbeat}, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                exc = task.exception()
+                if exc and not isinstance(exc, WebSocketDisconnect):
+                    logger.error(f"Conversation socket error for session {self.session_id}: {exc}")
+            receiver.cancel()
+        except WebSocketDisconnect:
+            pass
+        finally:
+            self.closed = True
+            sender.cancel()
+            heartbeat.cancel()
+            logger.info(f"Conversation socket closed for session {self.session_id}")
@@ -0,0 +1,108 @@
+"""
+Record/replay store for Gemini responses, keyed by sha256(model, system_instruction, prompt)
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+from core.llm_client import GeminiClient
+from core.llm_usage import UsageTracker
+
+logger = logging.getLogger(__name__)
+
+MODES = ("replay", "record", "auto")
+
+class CassetteMiss(Exception):
+    """Raised in replay mode when no recording exists for a request"""
+
+def cassette_key(model: str, system_instruction: Optional[str], prompt: str) -> str:
+    digest = hashlib.sha256()
+    for part in (model, system_instruction or "", prompt):
+        encoded = part.encode("utf-8")
+        # Length-prefix each part so boundaries can't collide
+        digest.update(len(encoded).to_bytes(8, "big"))
+        digest.update(encoded)
+    return digest.hexdigest()
+
+class CassetteStore:
+    """One JSON file per recorded request; responses round-trip byte-for-byte"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> Optional[str]:
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                return json.load(f)["response"]
+        except FileNotFoundError:
+            return None
+
+    def put(self, key: str, record: Dict[str, Any]):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(record, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self._path(key))
+
+class CassetteGeminiClient(GeminiClient):
+    """GeminiClient that replays recorded responses and, when allowed, records new ones.
+
+    replay: recordings only; a miss raises CassetteMiss (the RAG system's own
+            error handling then takes its fallback path, and the miss is reported)
+    record: always call Gemini and overwrite the recording
+    auto:   replay when recorded, otherwise call Gemini and record
+    """
+
+    def __init__(self, store: CassetteStore, mode: str = "replay", usage: Optional[UsageTracker] = None):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}")
+        super().__init__(usage=usage or UsageTracker())
+        self.store = store
+        self.mode = mode
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.recorded = 0
+        self.misses: Dict[Optional[str], List[str]] = defaultdict(list)
+
+    def generate_content(self, prompt: str, system_instruction: Optional[str] = None,
+                         call_type: str = "general", session_id: Optional[str] = None,
+                         model: Optional[str] = None) -> str:
+        # Keyed by the routed model, so re-routing a call type re-records rather than replaying
+        model = model or self.router.model_for(call_type)
+        key = cassette_key(model, system_instruction, prompt)
+
+        if self.mode != "record":
+            recorded = self.store.get(key)
+            if recorded is not None:
+                with self._lock:
+                    self.hits += 1
+                self.usage.record(call_type, session_id, model=model)
+                return recorded
+            if self.mode == "replay":
+                with self._lock:
+                    self.misses[session_id].append(call_type)
+                raise CassetteMiss(f"No recording for {call_type} request {key[:12]}")
+
+        start = time.perf_counter()
+        text = super().generate_content(prompt, system_instruction, call_type=call_type,
+                                        session_id=session_id, model=model)
+        if text:
+            self.store.put(key, {
+                "model": model,
+                "call_type": call_type,
+                "system_instruction": system_instruction,
+                "prompt": prompt,
+                "response": text,
+                "latency_seconds": round(time.perf_counter() - start, 4)
+            })
+            with self._lock:
+                self.recorded += 1
+        return text
@@ -0,0 +1,54 @@
+"""
+Gunicorn configuration: uvicorn workers, optionally preloaded and forked from a warm master
+
+    gunicorn main:app                      # picks up this file automatically
+
+With GRAVILOG_PRELOAD=1 (the default) the master imports the app, builds all
+read-only structures (knowledge base, keyword tables, translations, report
+styles, asset manifest) and calls gc.freeze() before forking. Workers then
+share those pages copy-on-write, and the cyclic GC never writes to them.
+Network clients (genai) are still created lazily in each worker.
+
+Sessions, in-flight assessments, the job queue, WebSocket channels and the
+archive index all live in one process's memory, so a request that lands on a
+different worker than the one holding its session gets a 400. The default is
+therefore a single worker. More than one is refused unless the deployment pins
+each session to a worker (sticky routing in the load balancer) and says so
+with GRAVILOG_STICKY_SESSIONS=1; scale out with more instances otherwise.
+"""
+import gc
+import logging
+import os
+
+logger = logging.getLogger("gunicorn.error")
+
+bind = os.environ.get("GRAVILOG_BIND", f"0.0.0.0:{os.environ.get('PORT', '8000')}")
+workers = int(os.environ.get("GRAVILOG_WORKERS", "1"))
+if workers > 1 and os.environ.get("GRAVILOG_STICKY_SESSIONS") != "1":
+    raise RuntimeError(
+        f"GRAVILOG_WORKERS={workers} needs sticky session routing: sessions are held in worker memory. "
+        "Set GRAVILOG_STICKY_SESSIONS=1 once the load balancer pins each session to one worker."
+    )
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = os.environ.get("GRAVILOG_PRELOAD", "1") == "1"
+timeout = int(os.environ.get("GRAVILOG_WORKER_TIMEOUT", "120"))
+
+if preload_app:
+    # Keep the master's heap compact while the app loads; collected once, below
+    gc.disable()
+
+def when_ready(server):
+    """Runs in the master after the app is loaded and before any worker forks"""
+    if not preload_app:
+        return
+    import main
+    main.preload_shared_state()
+    gc.collect()
+    gc.freeze()
+    # The master lives on (and re-forks on worker restarts); frozen objects stay out of its collections
+    gc.enable()
+    logger.info(f"Preloaded shared state; {gc.get_freeze_count()} objects frozen before fork")
+
+def post_fork(server, worker):
+    if preload_app:
+        gc.enable()
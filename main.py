@@ -2,22 +2,39 @@
 GraviLog - Smart Risk Analysis Agent for Pregnancy Health
 FastAPI backend with LlamaIndex + Google Gemini
 """
+import asyncio
+import hmac
 import logging
 import os
+import time
 from datetime import datetime
-from typing import Dict
+from typing import Dict, List, Optional, Tuple
 
-from fastapi import FastAPI, Request, Form, HTTPException
+from fastapi import FastAPI, Request, Form, HTTPException, WebSocket
+from starlette.requests import HTTPConnection
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse, FileResponse
+from fastapi.responses import HTMLResponse, FileResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
 from fastapi.templating import Jinja2Templates
+from starlette.concurrency import run_in_threadpool
 
 # Import our new modules
-from core.llm_client import MedicalRAGSystem
+from core.admission import AdmissionController, AdmissionRejected, ClientResolver
+from core.analytics_export import NDJSONSessionExporter, is_valid_cursor, session_to_report_data
+from core.assets import PrecompressedStaticFiles, asset_url, get_manifest, STATIC_DIR
+from core.knowledge_store import KnowledgeStore
+from core.lazy import LazySingleton
+from core.jobs import AssessmentJobQueue, QueueFullError, validate_callback_url
+from core.llm_usage import usage_tracker
+from core.metrics import FALLBACK_ACTIVATIONS, gauge, registry as metrics_registry
+from core.llm_client import ESCALATION_ROUTE, MedicalRAGSystem
+from core.page_cache import RenderedPageCache
+from core.prompt_cache import PromptPrefixCache
+from core.session_archive import SessionArchive, SessionArchiver, encode_session
+from core.profiling import PROFILE_HEADER, ProfileStore, ProfilingMiddleware
+from core.ws_channel import SessionChannel
 from medical_knowledge import get_medical_knowledge, get_fallback_questions
-from report_generator import ReportGenerator
 from risk_assessment import RiskAssessment
-from translations import get_translations
+from translations import get_translations, get_translations_json, get_language_name, normalize_language
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -35,27 +52,124 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Sampled / secret-header-triggered request profiling, dumped per endpoint
+PROFILE_SECRET = os.environ.get("GRAVILOG_PROFILE_SECRET")
+# Session exports contain patient health data; unset means export is disabled
+EXPORT_SECRET = os.environ.get("GRAVILOG_EXPORT_SECRET")
+EXPORT_HEADER = "x-gravilog-export"
+profile_store = ProfileStore(
+    os.environ.get("GRAVILOG_PROFILE_DIR", "profiles"),
+    max_per_endpoint=int(os.environ.get("GRAVILOG_PROFILE_KEEP", "20"))
+)
+app.add_middleware(
+    ProfilingMiddleware,
+    store=profile_store,
+    sample_rate=float(os.environ.get("GRAVILOG_PROFILE_SAMPLE_RATE", "0")),
+    secret=PROFILE_SECRET,
+    mode=os.environ.get("GRAVILOG_PROFILE_MODE", "sample")
+)
+
 # Setup templates
 templates = Jinja2Templates(directory="templates")
+templates.env.globals["asset_url"] = asset_url
+
+# Fingerprinted, precompressed CSS/JS extracted from the templates
+app.mount("/static", PrecompressedStaticFiles(directory=STATIC_DIR), name="static")
+
+# Session-independent page shells, rendered once per language
+page_cache = RenderedPageCache(templates)
+
+# Gemini returns Arabic risk levels for Arabic sessions
+RISK_LEVEL_CLASSES = {
+    "High": "high", "عالي": "high",
+    "Medium": "medium", "متوسط": "medium",
+    "Low": "low", "منخفض": "low"
+}
+
+# Initialize systems lazily: importing main stays cheap for worker spawns and --reload
+def build_rag_system() -> Optional[MedicalRAGSystem]:
+    """Gemini-backed RAG; without an API key the rule-based paths are used instead"""
+    if not os.environ.get("GEMINI_API_KEY"):
+        logger.warning("GEMINI_API_KEY not set; using fallback questions and rule-based assessment")
+        return None
+    rag = MedicalRAGSystem(get_medical_knowledge(), knowledge_store=knowledge_store)
+    rag.prompt_cache = PromptPrefixCache.from_env(rag.gemini_client)
+    rag.gemini_client.latency_observer = observe_gemini_latency
+    return rag
+
+def build_report_generator():
+    """PDF/JSON report generator; reportlab and the style registry load here"""
+    from report_generator import ReportGenerator
+    return ReportGenerator()
+
+# Versioned knowledge and keyword tables, hot-swapped from GRAVILOG_KNOWLEDGE_DIR
+knowledge_store = KnowledgeStore.from_env()
+
+rag_system = LazySingleton("rag_system", build_rag_system)
+report_generator = LazySingleton("report_generator", build_report_generator)
+risk_assessor = RiskAssessment(knowledge_store)  # Rule-based and cheap, so built eagerly
+
+# Token-bucket admission; Gemini work is shed to the rule-based paths under pressure
+admission = AdmissionController.from_env()
+gauge("gravilog_llm_in_flight", "Gemini-backed calls in progress", lambda: admission.llm_in_flight)
+gauge("gravilog_llm_latency_ewma_seconds", "Smoothed Gemini-backed call latency", lambda: admission.llm_latency or 0.0)
+
+def observe_gemini_latency(call_type: str, seconds: float):
+    # Pro escalations are slow by design; counting them would shed flash traffic for nothing
+    if call_type != ESCALATION_ROUTE:
+        admission.observe_latency(seconds)
+
+# Behind a reverse proxy, set GRAVILOG_TRUSTED_PROXIES so users don't all share the proxy's bucket
+client_resolver = ClientResolver.from_env()
+
+def client_key(connection: HTTPConnection) -> str:
+    return client_resolver.resolve(
+        connection.client.host if connection.client else None,
+        connection.headers.get(client_resolver.header)
+    )
 
-# Initialize systems
-try:
-    medical_knowledge = get_medical_knowledge()
-    rag_system = MedicalRAGSystem(medical_knowledge)
-    risk_assessor = RiskAssessment()
-    report_generator = ReportGenerator()
-    logger.info("All systems initialized successfully with LlamaIndex + Gemini")
-except Exception as e:
-    logger.error(f"System initialization error: {e}")
-    rag_system = None
-    risk_assessor = RiskAssessment()  # This should always work as it's rule-based
-    report_generator = ReportGenerator()
+def admit(connection: HTTPConnection, route: str, new_session: bool = False):
+    """Apply the client and global buckets; 429 with Retry-After when they are empty"""
+    try:
+        admission.admit(client_key(connection), route, new_session=new_session)
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": e.retry_after_header})
 
 # Session storage (in production, use Redis or database)
 sessions: Dict[str, Dict] = {}
 
+gauge("gravilog_sessions", "Sessions held in the in-memory store", lambda: len(sessions))
+
+# In-flight assessments per session: (transcript_version, future)
+assessment_futures: Dict[str, Tuple[int, asyncio.Future]] = {}
+
+# Completed, idle sessions move to compressed on-disk segments
+session_archive = SessionArchive(os.environ.get("GRAVILOG_ARCHIVE_DIR", "session_archive"))
+session_archiver = SessionArchiver(
+    sessions,
+    session_archive,
+    idle_seconds=float(os.environ.get("GRAVILOG_ARCHIVE_AFTER_SECONDS", "900")),
+    interval=float(os.environ.get("GRAVILOG_ARCHIVE_INTERVAL", "60")),
+    is_busy=lambda session_id: session_id in assessment_futures,
+    # LLM usage travels with the archived session, so rehydrating it doesn't reset its token budget
+    archive_fields=lambda session_id: {"llm_usage": usage_tracker.export_session(session_id)},
+    on_evict=usage_tracker.forget_session
+)
+gauge("gravilog_archived_sessions", "Sessions held in the cold archive", lambda: len(session_archive))
+
+# Bulk analytics export over the session store
+session_exporter = NDJSONSessionExporter(sessions, report_generator.get, archive=session_archive)
+
 def get_session(session_id: str) -> Dict:
-    """Get or create session"""
+    """Get or create session, rehydrating it from the archive if it was moved there"""
+    if session_id not in sessions and session_id in session_archive:
+        try:
+            session = session_archive.load(session_id)
+            usage_tracker.restore_session(session_id, session.pop("llm_usage", None))
+            sessions[session_id] = session
+            logger.info(f"Rehydrated archived session {session_id}")
+        except Exception as e:
+            logger.error(f"Archive rehydration error for session {session_id}: {e}")
     if session_id not in sessions:
         sessions[session_id] = {
             "id": session_id,
@@ -65,9 +179,13 @@ def get_session(session_id: str) -> Dict:
             "current_question_index": 0,
             "questions": [],
             "risk_assessment": None,
+            "risk_assessment_version": None,
+            "transcript_version": 0,
             "created_at": datetime.now()
         }
-    return sessions[session_id]
+    session = sessions[session_id]
+    session["last_activity"] = time.time()
+    return session
 
 @app.get("/", response_class=HTMLResponse)
 async def home(request: Request):
@@ -75,26 +193,26 @@ async def home(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
 
 @app.post("/start-session")
-async def start_session(language: str = Form(...)):
+async def start_session(request: Request, language: str = Form(...)):
     """Start a new assessment session"""
+    admit(request, "start_session", new_session=True)
     session_id = f"session_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
     session = get_session(session_id)
-    session["language"] = language
+    session["language"] = normalize_language(language)
 
     logger.info(f"Started new session: {session_id} (Language: {language})")
     return {"session_id": session_id, "redirect": f"/assessment?session_id={session_id}"}
 
 @app.get("/assessment", response_class=HTMLResponse)
 async def assessment_page(request: Request, session_id: str):
-    """Assessment page"""
+    """Assessment page (cached shell; the page reads session_id from the URL)"""
     session = get_session(session_id)
-    translations = get_translations(session["language"])
+    language = normalize_language(session["language"])
 
-    return templates.TemplateResponse("assessment.html", {
-        "request": request,
-        "session_id": session_id,
-        "language": session["language"],
-        "translations": translations
+    return page_cache.response(request, "assessment.html", language, {
+        "language": language,
+        "translations": get_translations(language),
+        "translations_json": get_translations_json(language)
     })
 
 @app.post("/patient-info/{session_id}")
@@ -115,10 +233,12 @@ async def collect_patient_info(
     logger.info(f"Patient info collected for session {session_id}")
     return {"status": "success", "message": "Patient information saved"}
 
-@app.get("/question/{session_id}")
-async def get_question(session_id: str):
-    """Get next question for the session using LlamaIndex + Gemini"""
-    session = get_session(session_id)
+def gestational_week(session: Dict) -> Optional[int]:
+    """The session's gestational week, which routes retrieval and scoring to its trimester"""
+    return session.get("patient_info", {}).get("gestational_week")
+
+def ensure_questions(session_id: str, session: Dict):
+    """Generate more questions when the session has run out (may block on Gemini)"""
     language = session["language"]
     responses = session["responses"]
 
@@ -126,26 +246,34 @@ async def get_question(session_id: str):
     if not session["questions"] or len(responses) >= len(session["questions"]):
         try:
             # Try AI-powered question generation with LlamaIndex + Gemini
-            if rag_system:
-                new_questions = rag_system.generate_questions(responses, language)
-                if new_questions:
-                    session["questions"].extend(new_questions)
-                    logger.info(f"Generated {len(new_questions)} Gemini questions for session {session_id}")
+            rag = rag_system.get()
+            if rag:
+                with admission.llm_slot("questions") as allowed:
+                    if allowed:
+                        new_questions = rag.generate_questions(
+                            responses, language, session_id=session_id, gestational_week=gestational_week(session)
+                        )
+                        if new_questions:
+                            session["questions"].extend(new_questions)
+                            logger.info(f"Generated {len(new_questions)} Gemini questions for session {session_id}")
 
             # Fallback to template questions if AI fails
             if not session["questions"] or len(responses) >= len(session["questions"]):
                 fallback_questions = get_fallback_questions()[language]
                 session["questions"].extend(fallback_questions[len(responses):len(responses)+3])
+                FALLBACK_ACTIVATIONS.inc(path="template_questions")
                 logger.info(f"Using fallback questions for session {session_id}")
 
         except Exception as e:
             logger.error(f"Question generation error: {e}")
             # Use fallback questions
+            FALLBACK_ACTIVATIONS.inc(path="template_questions")
             fallback_questions = get_fallback_questions()[language]
             session["questions"].extend(fallback_questions[len(responses):len(responses)+3])
 
-    # Check if we have more questions
-    current_index = len(responses)
+def current_question_payload(session: Dict) -> Dict:
+    """Describe the session's current question, or signal that assessment is ready"""
+    current_index = len(session["responses"])
     if current_index < len(session["questions"]) and current_index < 10:  # Cap at 10 questions
         question = session["questions"][current_index]
         return {
@@ -158,10 +286,13 @@ async def get_question(session_id: str):
         # No more questions, proceed to assessment
         return {"question": None, "has_more": False, "assessment_ready": True}
 
-@app.post("/submit-answer/{session_id}")
-async def submit_answer(session_id: str, answer: str = Form(...)):
-    """Submit answer for current question"""
-    session = get_session(session_id)
+async def next_question(session_id: str, session: Dict) -> Dict:
+    """Ensure questions are available and return the next one"""
+    await run_in_threadpool(ensure_questions, session_id, session)
+    return current_question_payload(session)
+
+def record_answer(session_id: str, session: Dict, answer: str) -> Dict:
+    """Record an answer to the session's current question"""
     current_index = len(session["responses"])
 
     if current_index < len(session["questions"]):
@@ -171,64 +302,363 @@ async def submit_answer(session_id: str, answer: str = Form(...)):
             "answer": answer,
             "timestamp": datetime.now().isoformat()
         })
+        # New answers invalidate any memoized or in-flight assessment
+        session["transcript_version"] += 1
+        session["risk_assessment"] = None
+        assessment_futures.pop(session_id, None)
 
         logger.info(f"Answer submitted for session {session_id}, question {current_index + 1}")
         return {"status": "success", "message": "Answer recorded"}
     else:
         return {"status": "error", "message": "No active question"}
 
+@app.get("/question/{session_id}")
+async def get_question(request: Request, session_id: str):
+    """Get next question for the session using LlamaIndex + Gemini"""
+    admit(request, "question")
+    session = get_session(session_id)
+    return await next_question(session_id, session)
+
+@app.post("/submit-answer/{session_id}")
+async def submit_answer(request: Request, session_id: str, answer: str = Form(...)):
+    """Submit answer for current question"""
+    admit(request, "submit_answer")
+    session = get_session(session_id)
+    return record_answer(session_id, session, answer)
+
+@app.post("/turn/{session_id}")
+async def conversation_turn(request: Request, session_id: str, answer: str = Form(...)):
+    """Record an answer and return the next question in a single round trip"""
+    admit(request, "turn")
+    session = get_session(session_id)
+    result = record_answer(session_id, session, answer)
+    if result["status"] != "success":
+        return result
+
+    result["next"] = await next_question(session_id, session)
+    return result
+
+def compute_risk_assessment(session_id: str, responses: List[Dict], language: str,
+                            week: Optional[int] = None) -> Dict:
+    """Assess risk with Gemini, falling back to rules (blocking; run in the threadpool)"""
+    # Try AI-powered risk assessment with Gemini
+    rag = rag_system.get()
+    if rag:
+        with admission.llm_slot("assessment") as allowed:
+            if allowed:
+                try:
+                    risk_result = rag.assess_risk(responses, language, session_id=session_id, gestational_week=week)
+                    if risk_result:
+                        logger.info(f"Gemini risk assessment completed for session {session_id}")
+                        return risk_result
+                except Exception as e:
+                    logger.error(f"Gemini risk assessment failed: {e}")
+
+    # Fallback to rule-based assessment
+    FALLBACK_ACTIVATIONS.inc(path="rule_based_assessment")
+    risk_result = risk_assessor.assess_risk(responses, language, gestational_week=week)
+    logger.info(f"Rule-based risk assessment completed for session {session_id}")
+    return risk_result
+
+async def get_risk_assessment(session_id: str, session: Dict) -> Dict:
+    """Memoized assessment for the session's current transcript version.
+
+    Concurrent callers share one in-flight computation, so a double-click or a
+    results page racing /assess-risk costs a single Gemini call. The result is
+    reused until record_answer bumps the transcript version.
+    """
+    version = session["transcript_version"]
+    if session.get("risk_assessment") and session.get("risk_assessment_version") == version:
+        return session["risk_assessment"]
+
+    entry = assessment_futures.get(session_id)
+    if entry is None or entry[0] != version:
+        # Snapshot the transcript so answers arriving mid-call can't leak into this version
+        task = asyncio.ensure_future(run_in_threadpool(
+            compute_risk_assessment, session_id, list(session["responses"]), session["language"],
+            gestational_week(session)
+        ))
+
+        def store_result(done: asyncio.Future):
+            current = assessment_futures.get(session_id)
+            if current and current[1] is done:
+                assessment_futures.pop(session_id)
+            if done.cancelled() or done.exception() is not None:
+                return
+            # Only keep the result if no new answers arrived while it was computed
+            if session["transcript_version"] == version:
+                session["risk_assessment"] = done.result()
+                session["risk_assessment_version"] = version
+                session["assessed_at"] = time.time()  # Orders the analytics export cursor
+
+        task.add_done_callback(store_result)
+        assessment_futures[session_id] = (version, task)
+    else:
+        task = entry[1]
+
+    # Shield so one caller disconnecting doesn't cancel the others' computation
+    return await asyncio.shield(task)
+
+def prefetch_questions(session_id: str, session: Dict):
+    """Top up Gemini questions one turn early so the next turn doesn't wait on generation"""
+    rag = rag_system.get()
+    if not rag or len(session["questions"]) >= 10:
+        return
+    if len(session["responses"]) + 1 < len(session["questions"]):
+        return
+    try:
+        with admission.llm_slot("prefetch") as allowed:
+            # Shed under pressure: the turn itself then falls back if it still needs questions
+            if not allowed:
+                return
+            new_questions = rag.generate_questions(
+                session["responses"], session["language"], session_id=session_id,
+                gestational_week=gestational_week(session)
+            )
+        if new_questions:
+            session["questions"].extend(new_questions)
+            logger.info(f"Prefetched {len(new_questions)} Gemini questions for session {session_id}")
+    except Exception as e:
+        logger.error(f"Question prefetch error: {e}")
+
+# Client message types on the conversation socket ("pong" is handled by SessionChannel)
+WS_MESSAGE_TYPES = frozenset({"answer", "next", "resume", "assess"})
+
+@app.websocket("/ws/{session_id}")
+async def conversation_socket(websocket: WebSocket, session_id: str):
+    """Persistent conversation channel: answers in; questions, progress and assessment out.
+
+    Clients resume after a reconnect by connecting with the same session id:
+    the server sends the session state, and a client that was waiting for a
+    question sends "resume" to get the current one again.
+    """
+    await websocket.accept()
+    session = get_session(session_id)
+    channel = SessionChannel(websocket, session_id)
+    prefetch = {"task": None}
+
+    async def send_progress():
+        await channel.send({
+            "type": "progress",
+            "answered": len(session["responses"]),
+            "total_questions": min(len(session["questions"]), 10)
+        })
+
+    async def send_question():
+        # Never race a running prefetch into generating the same batch twice
+        if prefetch["task"] and not prefetch["task"].done():
+            await prefetch["task"]
+        payload = await next_question(session_id, session)
+        await channel.send({"type": "question", **payload})
+        if payload.get("question") and payload.get("has_more"):
+            prefetch["task"] = asyncio.create_task(run_in_threadpool(prefetch_questions, session_id, session))
+
+    async def send_assessment():
+        if not session["responses"]:
+            await channel.send({"type": "error", "message": "No responses found"})
+            return
+        result = await get_risk_assessment(session_id, session)
+        # Stream the summary first, then reasons and recommendations as they render
+        await channel.send({
+            "type": "assessment_start",
+            "risk_level": result.get("risk_level"),
+            "risk_score": result.get("risk_score")
+        })
+        for reason in result.get("reasons", []):
+            await channel.send({"type": "assessment_reason", "text": reason})
+        recommendations = result.get("recommendations", [])
+        for recommendation in ([recommendations] if isinstance(recommendations, str) else recommendations):
+            await channel.send({"type": "assessment_recommendation", "text": recommendation})
+        await channel.send({"type": "assessment_end"})
+
+    async def on_connect():
+        await channel.send({
+            "type": "state",
+            "session_id": session_id,
+            "language": session["language"],
+            "answered": len(session["responses"]),
+            "assessment_available": bool(session.get("risk_assessment"))
+        })
+
+    async def on_message(message: Dict):
+        message_type = message.get("type")
+        # The type is client-chosen: only known ones get their own route label
+        route = f"ws_{message_type}" if message_type in WS_MESSAGE_TYPES else "ws_unknown"
+        try:
+            admission.admit(client_key(websocket), route)
+        except AdmissionRejected as e:
+            await channel.send({"type": "error", "message": str(e), "retry_after": e.retry_after})
+            return
+        if message_type == "answer":
+            result = record_answer(session_id, session, str(message.get("answer", "")))
+            await channel.send({"type": "answer_ack", **result})
+            if result["status"] == "success":
+                await send_progress()
+                await send_question()
+        elif message_type in ("next", "resume"):
+            await send_progress()
+            await send_question()
+        elif message_type == "assess":
+            await send_assessment()
+        else:
+            await channel.send({"type": "error", "message": f"Unknown message type: {message_type}"})
+
+    try:
+        await channel.serve(on_message, on_connect)
+    finally:
+        if prefetch["task"]:
+            prefetch["task"].cancel()
+
 @app.get("/assess-risk/{session_id}")
-async def assess_risk(session_id: str):
+async def assess_risk(request: Request, session_id: str):
     """Perform risk assessment using LlamaIndex + Gemini"""
+    admit(request, "assess_risk")
     session = get_session(session_id)
-    responses = session["responses"]
-    language = session["language"]
 
-    if not responses:
+    if not session["responses"]:
         raise HTTPException(status_code=400, detail="No responses found")
 
     try:
-        # Try AI-powered risk assessment with Gemini
-        if rag_system:
-            try:
-                risk_result = rag_system.assess_risk(responses, language)
-                if risk_result:
-                    session["risk_assessment"] = risk_result
-                    logger.info(f"Gemini risk assessment completed for session {session_id}")
-                    return risk_result
-            except Exception as e:
-                logger.error(f"Gemini risk assessment failed: {e}")
-
-        # Fallback to rule-based assessment
-        risk_result = risk_assessor.assess_risk(responses, language)
-        session["risk_assessment"] = risk_result
-        logger.info(f"Rule-based risk assessment completed for session {session_id}")
-        return risk_result
-
+        return await get_risk_assessment(session_id, session)
     except Exception as e:
         logger.error(f"Risk assessment error: {e}")
         raise HTTPException(status_code=500, detail="Risk assessment failed")
 
+async def run_assessment_job(session_id: str) -> Dict:
+    """Job runner: shares the memoized assessment with the synchronous endpoints"""
+    session = get_session(session_id)
+    if not session["responses"]:
+        raise ValueError("No responses found")
+    return await get_risk_assessment(session_id, session)
+
+# Background assessment jobs for integrations that shouldn't hold a connection open
+assessment_jobs = AssessmentJobQueue(
+    run_assessment_job,
+    workers=int(os.environ.get("GRAVILOG_JOB_WORKERS", "4")),
+    max_queue=int(os.environ.get("GRAVILOG_JOB_QUEUE_SIZE", "100"))
+)
+
+@app.on_event("startup")
+async def start_assessment_jobs():
+    await assessment_jobs.start()
+
+def warm_up():
+    """Build the lazy subsystems so the first patient doesn't pay for them"""
+    rag_system.get()
+    report_generator.get()
+
+def preload_shared_state():
+    """Build every read-only structure in the gunicorn master, before workers fork.
+
+    Knowledge tables, keyword lists, translations, report styles/fonts and the
+    asset manifest are then shared copy-on-write. No network client is created
+    here: the genai client is still made lazily in each worker after the fork.
+    """
+    get_medical_knowledge()
+    get_fallback_questions()
+    # Build the assets once here, so workers never write static/dist while serving
+    get_manifest(build=True)
+    warm_up()
+
+warm_up_task: Optional[asyncio.Future] = None
+
+@app.on_event("startup")
+async def start_warm_up():
+    # In the background: the worker accepts connections (and answers /health) meanwhile
+    global warm_up_task
+    warm_up_task = asyncio.ensure_future(run_in_threadpool(warm_up))
+
+@app.on_event("shutdown")
+async def stop_assessment_jobs():
+    await assessment_jobs.stop()
+
+@app.on_event("startup")
+async def start_knowledge_reloader():
+    await knowledge_store.start()
+
+@app.on_event("shutdown")
+async def stop_knowledge_reloader():
+    await knowledge_store.stop()
+
+@app.on_event("startup")
+async def start_session_archiver():
+    await session_archiver.start()
+
+@app.on_event("shutdown")
+async def stop_session_archiver():
+    await session_archiver.stop()
+
+@app.post("/jobs/assess-risk/{session_id}", status_code=202)
+async def submit_assessment_job(request: Request, session_id: str, callback_url: Optional[str] = Form(None)):
+    """Queue a risk assessment and return a job id immediately"""
+    admit(request, "submit_job")
+    session = get_session(session_id)
+
+    if not session["responses"]:
+        raise HTTPException(status_code=400, detail="No responses found")
+    if callback_url:
+        try:
+            validate_callback_url(callback_url)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        job = assessment_jobs.submit(session_id, callback_url)
+    except QueueFullError as e:
+        return JSONResponse(status_code=503, content={"detail": str(e)}, headers={"Retry-After": "5"})
+
+    return {"job_id": job.id, "status": job.status, "status_url": f"/jobs/{job.id}"}
+
+@app.get("/jobs/metrics")
+async def assessment_job_metrics():
+    """Queue depth, job age and throughput counters"""
+    return assessment_jobs.metrics()
+
+@app.get("/jobs/{job_id}")
+async def assessment_job_status(job_id: str):
+    """Poll the status (and result, once finished) of an assessment job"""
+    job = assessment_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
 @app.get("/results/{session_id}", response_class=HTMLResponse)
 async def results_page(request: Request, session_id: str):
-    """Results page showing risk assessment"""
+    """Results page showing risk assessment (cached shell; data from /results-data)"""
     session = get_session(session_id)
+    language = normalize_language(session["language"])
 
-    if not session.get("risk_assessment"):
-        # Perform assessment if not done
-        if rag_system:
-            risk_result = rag_system.assess_risk(session["responses"], session["language"])
-        else:
-            risk_result = risk_assessor.assess_risk(session["responses"], session["language"])
-        session["risk_assessment"] = risk_result
+    return page_cache.response(request, "results.html", language, {
+        "language": language,
+        "language_name": get_language_name(language),
+        "translations": get_translations(language)
+    })
 
-    translations = get_translations(session["language"])
+@app.get("/results-data/{session_id}")
+async def results_data(request: Request, session_id: str):
+    """Per-session risk assessment data rendered by the results page"""
+    admit(request, "results_data")
+    session = get_session(session_id)
 
-    return templates.TemplateResponse("results.html", {
-        "request": request,
-        "session": session,
-        "translations": translations
-    })
+    # Reuses the memoized assessment, or joins one already in flight
+    risk_assessment = await get_risk_assessment(session_id, session)
+    risk_level = risk_assessment.get("risk_level", "")
+    recommendations = risk_assessment.get("recommendations", [])
+    if isinstance(recommendations, str):
+        recommendations = [recommendations]
+
+    return {
+        "risk_level": risk_level,
+        "risk_level_class": RISK_LEVEL_CLASSES.get(risk_level, "low"),
+        "risk_score": risk_assessment.get("risk_score"),
+        "explanation": risk_assessment.get("explanation") or " ".join(risk_assessment.get("reasons", [])),
+        "recommendations": recommendations,
+        "urgent_care_needed": risk_assessment.get("urgent_care_needed", False),
+        "questions_and_responses": [
+            {"question": resp.get("question", ""), "answer": resp.get("answer", "")}
+            for resp in session["responses"]
+        ]
+    }
 
 @app.get("/generate-report/{session_id}")
 async def generate_report(session_id: str):
@@ -239,25 +669,130 @@ async def generate_report(session_id: str):
         raise HTTPException(status_code=400, detail="Risk assessment not completed")
 
     try:
-        # Generate PDF report
-        pdf_path = report_generator.generate_report(
-            patient_info=session["patient_info"],
-            responses=session["responses"],
-            risk_assessment=session["risk_assessment"],
-            language=session["language"]
-        )
+        # Render off the event loop; reportlab is CPU-bound
+        report_data = session_to_report_data(session)
+        pdf_bytes = await run_in_threadpool(lambda: report_generator.get().generate_pdf_report(report_data))
 
         logger.info(f"PDF report generated for session {session_id}")
-        return FileResponse(
-            pdf_path,
+        return Response(
+            content=pdf_bytes,
             media_type="application/pdf",
-            filename=f"pregnancy_assessment_{session_id}.pdf"
+            headers={"Content-Disposition": f'attachment; filename="pregnancy_assessment_{session_id}.pdf"'}
         )
 
     except Exception as e:
         logger.error(f"Report generation error: {e}")
         raise HTTPException(status_code=500, detail="Report generation failed")
 
+def require_export_secret(request: Request):
+    """Export endpoints need the shared secret in the x-gravilog-export header"""
+    provided = request.headers.get(EXPORT_HEADER, "")
+    if not EXPORT_SECRET or not hmac.compare_digest(provided, EXPORT_SECRET):
+        raise HTTPException(status_code=403, detail="Export access denied")
+
+@app.get("/export/sessions.ndjson")
+async def export_sessions(request: Request, cursor: Optional[str] = None, limit: Optional[int] = None):
+    """Stream completed sessions as NDJSON; resume by passing the last record's cursor"""
+    require_export_secret(request)
+    if cursor is not None and not is_valid_cursor(cursor):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    stats = session_exporter.start_run(cursor)
+    return StreamingResponse(
+        session_exporter.iter_records(cursor=cursor, limit=limit, stats=stats),
+        media_type="application/x-ndjson",
+        headers={"X-Export-Id": stats.export_id}
+    )
+
+@app.get("/export/stats")
+async def export_stats(request: Request):
+    """Throughput metrics for recent NDJSON exports, newest first"""
+    require_export_secret(request)
+    return {"exports": session_exporter.recent_runs()}
+
+@app.get("/export/stats/{export_id}")
+async def export_run_stats(export_id: str, request: Request):
+    """Throughput metrics for one export, by the X-Export-Id of its response"""
+    require_export_secret(request)
+    stats = session_exporter.get_run(export_id)
+    if stats is None:
+        raise HTTPException(status_code=404, detail="Export not found")
+    return stats.to_dict()
+
+@app.get("/usage")
+async def llm_usage():
+    """Gemini calls, tokens and latency: global, by call type, and budget state"""
+    usage = usage_tracker.snapshot()
+    rag = rag_system.get() if rag_system.built else None
+    if rag and rag.prompt_cache:
+        usage["prompt_cache"] = rag.prompt_cache.stats()
+    return usage
+
+@app.get("/usage/{session_id}")
+async def llm_session_usage(session_id: str):
+    """Gemini usage for one session"""
+    usage = usage_tracker.session_usage(session_id)
+    if usage is None:
+        raise HTTPException(status_code=404, detail="No LLM usage recorded for session")
+    return usage
+
+@app.get("/admission")
+async def admission_status():
+    """LLM concurrency, smoothed latency and shedding/rejection counters"""
+    return admission.status()
+
+@app.get("/archive/stats")
+async def archive_stats():
+    """Hot (in-memory) vs cold (archived) session storage"""
+    hot_sessions = list(sessions.values())
+    hot_bytes = await run_in_threadpool(lambda: sum(len(encode_session(s)) for s in hot_sessions))
+    return {
+        "hot": {"sessions": len(hot_sessions), "serialized_bytes": hot_bytes},
+        "archive": await run_in_threadpool(session_archive.stats),
+        "archiver": {
+            "idle_seconds": session_archiver.idle_seconds,
+            "interval_seconds": session_archiver.interval,
+            "archived_total": session_archiver.archived_total,
+            "last_run": session_archiver.last_run
+        }
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text exposition of latency histograms, counters and gauges"""
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+def require_profile_secret(request: Request):
+    """Admin profile endpoints need the same shared secret as the profiling header"""
+    provided = request.headers.get(PROFILE_HEADER, "")
+    if not PROFILE_SECRET or not hmac.compare_digest(provided, PROFILE_SECRET):
+        raise HTTPException(status_code=403, detail="Profiling access denied")
+
+@app.get("/admin/profiles")
+async def list_profiles(request: Request):
+    """Stored request profiles, newest first per endpoint"""
+    require_profile_secret(request)
+    return {"directory": profile_store.directory, "profiles": profile_store.list()}
+
+@app.get("/admin/profiles/{endpoint}/{name}")
+async def fetch_profile(endpoint: str, name: str, request: Request):
+    """Download a collapsed-stack (.collapsed) or pstats (.pstats) profile"""
+    require_profile_secret(request)
+    path = profile_store.resolve(endpoint, name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, filename=name, media_type="text/plain" if name.endswith(".collapsed") else "application/octet-stream")
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe: 503 until the lazily built subsystems are warm.
+
+    /health only says the process is alive; this says it can serve a full
+    assessment, including the report, without first-request initialization.
+    """
+    components = {"rag_system": rag_system.status(), "report_generator": report_generator.status()}
+    ready = rag_system.built and report_generator.built and components["report_generator"]["available"]
+    return JSONResponse(status_code=200 if ready else 503, content={"ready": ready, "components": components})
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
@@ -265,11 +800,12 @@ async def health_check():
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
         "systems": {
-            "llamaindex_gemini": rag_system is not None,
+            "llamaindex_gemini": rag_system.status()["available"],
             "risk_assessment": risk_assessor is not None,
-            "report_generator": report_generator is not None,
+            "report_generator": report_generator.status()["available"],
             "gemini_api_key": bool(os.environ.get("GEMINI_API_KEY"))
-        }
+        },
+        "knowledge": knowledge_store.status()
     }
 
 if __name__ == "__main__":
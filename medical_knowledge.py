@@ -2,10 +2,62 @@
 Medical knowledge base for pregnancy health risk assessment
 LlamaIndex-compatible knowledge structure
 """
-from typing import List, Dict, Any
+import sys
+from functools import lru_cache
+from types import MappingProxyType
+from typing import List, Dict, Any, Mapping, Optional, Tuple
 
-def get_medical_knowledge() -> List[Dict[str, Any]]:
-    """Return structured medical knowledge for LlamaIndex"""
+def freeze_table(value: Any) -> Any:
+    """Read-only, compact form: tuples for lists, mapping proxies for dicts, interned strings.
+
+    Built once per process; under gunicorn preload it is built in the master and
+    shared copy-on-write by every forked worker.
+    """
+    if isinstance(value, dict):
+        return MappingProxyType({sys.intern(key): freeze_table(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze_table(item) for item in value)
+    if isinstance(value, str):
+        return sys.intern(value)
+    return value
+
+@lru_cache(maxsize=None)
+def get_medical_knowledge() -> Tuple[Mapping[str, Any], ...]:
+    """Return structured medical knowledge for LlamaIndex (shared, read-only)"""
+    return freeze_table(_medical_knowledge_source())
+
+@lru_cache(maxsize=None)
+def get_fallback_questions() -> Mapping[str, Tuple[str, ...]]:
+    """Fallback questions when AI generation fails (shared, read-only)"""
+    return freeze_table(_fallback_questions_source())
+
+@lru_cache(maxsize=None)
+def get_risk_keywords() -> Mapping[str, Tuple[str, ...]]:
+    """Keywords for rule-based risk assessment fallback (shared, read-only)"""
+    return freeze_table(_risk_keywords_source())
+
+@lru_cache(maxsize=None)
+def get_trimester_profiles() -> Mapping[int, Mapping[str, Any]]:
+    """Per-trimester knowledge filters and keyword re-weighting (shared, read-only)"""
+    return MappingProxyType({
+        trimester: freeze_table(profile) for trimester, profile in _trimester_profiles_source().items()
+    })
+
+def trimester_for_week(gestational_week: Any) -> Optional[int]:
+    """Trimester (1-3) for a gestational week, or None if the week is missing or invalid"""
+    try:
+        week = int(gestational_week)
+    except (TypeError, ValueError):
+        return None
+    if week < 1 or week > 45:
+        return None
+    if week <= 12:
+        return 1
+    if week <= 27:
+        return 2
+    return 3
+
+def _medical_knowledge_source() -> List[Dict[str, Any]]:
     return [
         # High-risk emergency conditions
         {
@@ -102,8 +154,7 @@ def get_medical_knowledge() -> List[Dict[str, Any]]:
         }
     ]
 
-def get_fallback_questions() -> Dict[str, List[str]]:
-    """Fallback questions when AI generation fails"""
+def _fallback_questions_source() -> Dict[str, List[str]]:
     return {
         "en": [
             "Are you experiencing any vaginal bleeding or spotting?",
@@ -131,8 +182,7 @@ def get_fallback_questions() -> Dict[str, List[str]]:
         ]
     }
 
-def get_risk_keywords() -> Dict[str, List[str]]:
-    """Keywords for rule-based risk assessment fallback"""
+def _risk_keywords_source() -> Dict[str, List[str]]:
     return {
         "high": [
             "bleeding", "نزيف", "blood", "دم", 
@@ -151,4 +201,45 @@ def get_risk_keywords() -> Dict[str, List[str]]:
             "heartburn", "حرقة", "back pain", "ألم الظهر",
             "constipation", "إمساك", "gas", "غازات"
         ]
-    }
\ No newline at end of file
+    }
+
+def _trimester_profiles_source() -> Dict[int, Dict[str, Any]]:
+    # From the guideline's trimester timeline and red flag combinations.
+    # exclude_categories: knowledge items that can't apply yet (or any more);
+    # keyword_levels: keywords moved to (or added at) a risk level for this trimester.
+    return {
+        1: {
+            "weeks": [1, 12],
+            "exclude_categories": ["Fetal Distress", "Premature Labor", "Normal Later Pregnancy"],
+            "keyword_levels": {
+                # Ectopic pregnancy: dizziness or fainting, shoulder tip pain
+                "dizziness": "high", "دوخة": "high",
+                "fainting": "high", "إغماء": "high",
+                "shoulder pain": "high", "ألم الكتف": "high",
+                # Nausea is expected in the first trimester
+                "nausea": "low", "غثيان": "low"
+            }
+        },
+        2: {
+            "weeks": [13, 27],
+            "exclude_categories": ["Normal Early Pregnancy"],
+            "keyword_levels": {
+                "leaking fluid": "high", "تسرب السوائل": "high",
+                # Movement begins around week 20
+                "decreased movement": "medium", "قلة الحركة": "medium",
+                # Gestational diabetes screening window
+                "thirst": "medium", "عطش": "medium"
+            }
+        },
+        3: {
+            "weeks": [28, 45],
+            "exclude_categories": ["Normal Early Pregnancy"],
+            "keyword_levels": {
+                # No fetal movement after 28 weeks = HIGH
+                "decreased movement": "high", "قلة الحركة": "high",
+                "no movement": "high", "لا حركة": "high",
+                "leaking fluid": "high", "تسرب السوائل": "high",
+                "severe swelling": "high", "تورم شديد": "high"
+            }
+        }
+    }
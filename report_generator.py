@@ -1,7 +1,11 @@
+import copy
 import io
 import json
+import os
 from datetime import datetime
-from typing import Dict, Any, List
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, Any, List, Mapping
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
@@ -11,74 +15,166 @@ from reportlab.lib import colors
 from reportlab.lib.colors import HexColor
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
+from arabic_text import get_static_shaped, is_arabic, prepare_pdf_text
+from core.metrics import PDF_RENDER_LATENCY, PDF_SIZE
 # Removed old translator import
 
+# Candidate locations for an Arabic-capable TrueType font
+ARABIC_FONT_PATHS = [
+    os.environ.get('GRAVILOG_ARABIC_FONT', ''),
+    'NotoSansArabic-Regular.ttf',
+    '/usr/share/fonts/truetype/noto/NotoSansArabic-Regular.ttf',
+    '/usr/share/fonts/noto/NotoSansArabic-Regular.ttf',
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
+]
+
+@lru_cache(maxsize=None)
+def get_report_font() -> str:
+    """Register the Arabic font once per process and return the font name to use"""
+    for font_path in ARABIC_FONT_PATHS:
+        if not font_path or not os.path.exists(font_path):
+            continue
+        try:
+            # Register Arabic font if available
+            pdfmetrics.registerFont(TTFont('Arabic', font_path))
+            return 'Arabic'
+        except Exception:
+            continue
+    # Fallback to Helvetica which supports Unicode
+    return 'Helvetica'
+
+@lru_cache(maxsize=None)
+def get_report_styles() -> Mapping[str, ParagraphStyle]:
+    """Process-wide, read-only style sheet shared by every ReportGenerator"""
+    styles = getSampleStyleSheet()
+    arabic_font = get_report_font()
+    
+    # Custom title style
+    styles.add(ParagraphStyle(
+        name='CustomTitle',
+        parent=styles['Title'],
+        fontSize=18,
+        spaceAfter=30,
+        alignment=TA_CENTER,
+        textColor=colors.darkblue,
+        fontName=arabic_font
+    ))
+    
+    # Risk level styles
+    styles.add(ParagraphStyle(
+        name='HighRisk',
+        parent=styles['Normal'],
+        fontSize=14,
+        textColor=colors.red,
+        fontName='Helvetica-Bold'
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='MediumRisk',
+        parent=styles['Normal'],
+        fontSize=14,
+        textColor=colors.orange,
+        fontName='Helvetica-Bold'
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='LowRisk',
+        parent=styles['Normal'],
+        fontSize=14,
+        textColor=colors.green,
+        fontName='Helvetica-Bold'
+    ))
+    
+    # Arabic patient text (already shaped and reordered for display)
+    styles.add(ParagraphStyle(
+        name='ArabicNormal',
+        parent=styles['Normal'],
+        alignment=TA_RIGHT,
+        fontName=arabic_font
+    ))
+    
+    # Section header style
+    styles.add(ParagraphStyle(
+        name='SectionHeader',
+        parent=styles['Heading2'],
+        fontSize=14,
+        spaceBefore=20,
+        spaceAfter=10,
+        textColor=colors.darkblue
+    ))
+    
+    return MappingProxyType(styles.byName)
+
+# Static report text, keyed by fragment name: (text, style name)
+_STATIC_PARAGRAPHS = {
+    'patient_info_title': ("Patient Information", 'SectionHeader'),
+    'risk_section_title': ("Risk Assessment Summary", 'SectionHeader'),
+    'explanation_title': ("Explanation:", 'Heading3'),
+    'week_analysis_title': ("Pregnancy Week Analysis", 'SectionHeader'),
+    'assessment_title': ("Medical Assessment Summary", 'SectionHeader'),
+    'responses_title': ("Patient Responses:", 'Heading3'),
+    'recommendations_title': ("Clinical Recommendations:", 'Heading3'),
+    'next_steps_title': ("Next Steps:", 'Heading3'),
+    'urgent_warning': ("⚠️ URGENT: This assessment indicates immediate medical attention is required.", 'HighRisk'),
+    'qa_section_title': ("Assessment Questions and Responses", 'SectionHeader'),
+    'disclaimer_title': ("Important Disclaimer:", 'Heading3'),
+    'disclaimer': ("""This assessment is for informational purposes only and should not replace professional medical advice. 
+        Always consult with your healthcare provider for proper medical evaluation and treatment.""", 'Normal'),
+    'footer': ("Generated by GraviLog Smart Risk Analysis Agent", 'Normal'),
+}
+
+@lru_cache(maxsize=None)
+def get_static_fragments() -> Mapping[str, Paragraph]:
+    """Pre-parsed paragraphs for the fixed headings, disclaimer and footer"""
+    styles = get_report_styles()
+    return MappingProxyType({
+        name: Paragraph(text, styles[style_name])
+        for name, (text, style_name) in _STATIC_PARAGRAPHS.items()
+    })
+
+# Shared Q&A table style; TableStyle is only read when applied to a table
+QA_TABLE_STYLE = TableStyle([
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ('LEFTPADDING', (0, 0), (-1, -1), 0),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 0),
+    ('TOPPADDING', (0, 0), (-1, -1), 6),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+])
+
 class ReportGenerator:
     def __init__(self):
-        self.styles = getSampleStyleSheet()
         self.setup_custom_styles()
     
     def setup_custom_styles(self):
-        """Setup custom styles for the report"""
-        
-        # Try to register Arabic font (fallback if not available)
-        try:
-            # Register Arabic font if available
-            pdfmetrics.registerFont(TTFont('Arabic', 'NotoSansArabic-Regular.ttf'))
-            arabic_font = 'Arabic'
-        except:
-            # Fallback to Helvetica which supports Unicode
-            arabic_font = 'Helvetica'
-        
-        # Custom title style
-        self.styles.add(ParagraphStyle(
-            name='CustomTitle',
-            parent=self.styles['Title'],
-            fontSize=18,
-            spaceAfter=30,
-            alignment=TA_CENTER,
-            textColor=colors.darkblue,
-            fontName=arabic_font
-        ))
-        
-        # Risk level styles
-        self.styles.add(ParagraphStyle(
-            name='HighRisk',
-            parent=self.styles['Normal'],
-            fontSize=14,
-            textColor=colors.red,
-            fontName='Helvetica-Bold'
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='MediumRisk',
-            parent=self.styles['Normal'],
-            fontSize=14,
-            textColor=colors.orange,
-            fontName='Helvetica-Bold'
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='LowRisk',
-            parent=self.styles['Normal'],
-            fontSize=14,
-            textColor=colors.green,
-            fontName='Helvetica-Bold'
-        ))
-        
-        # Section header style
-        self.styles.add(ParagraphStyle(
-            name='SectionHeader',
-            parent=self.styles['Heading2'],
-            fontSize=14,
-            spaceBefore=20,
-            spaceAfter=10,
-            textColor=colors.darkblue
-        ))
+        """Bind the shared, prebuilt report styles"""
+        self.styles = get_report_styles()
+        # Shape the fixed Arabic strings up front, off the request path
+        get_static_shaped()
+    
+    def _fragment(self, name: str) -> Paragraph:
+        """Per-document copy of a prebuilt static paragraph (layout state is per copy)"""
+        return copy.copy(get_static_fragments()[name])
+    
+    def _patient_text(self, text: str, prefix: str = "") -> Paragraph:
+        """Paragraph for session free text (Q&A, explanation, recommendations), shaping Arabic for the PDF canvas"""
+        if is_arabic(text):
+            return Paragraph(f"{prepare_pdf_text(text)} {prefix}".strip(), self.styles['ArabicNormal'])
+        return Paragraph(f"{prefix} {text}".strip(), self.styles['Normal'])
     
     def generate_pdf_report(self, report_data: Dict[str, Any]) -> bytes:
         """Generate PDF report from assessment data - Always in English for medical professionals"""
         
+        with PDF_RENDER_LATENCY.time():
+            pdf_data = self._render_pdf(report_data)
+        PDF_SIZE.observe(len(pdf_data))
+        return pdf_data
+    
+    def _render_pdf(self, report_data: Dict[str, Any]) -> bytes:
+        """Build the PDF document"""
+        
         buffer = io.BytesIO()
         doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=72, leftMargin=72,
                                topMargin=72, bottomMargin=18)
@@ -105,8 +201,7 @@ class ReportGenerator:
         story.append(Spacer(1, 20))
         
         # Patient Information Section - Always in English
-        patient_info_title = "Patient Information"
-        story.append(Paragraph(patient_info_title, self.styles['SectionHeader']))
+        story.append(self._fragment('patient_info_title'))
         
         patient_info = report_data.get('patient_info', {})
         patient_details = [
@@ -123,8 +218,7 @@ class ReportGenerator:
         risk_assessment = report_data['risk_assessment']
         
         # Risk level section
-        risk_section_title = "Risk Assessment Summary"
-        story.append(Paragraph(risk_section_title, self.styles['SectionHeader']))
+        story.append(self._fragment('risk_section_title'))
         
         # Risk level with appropriate styling
         risk_level = risk_assessment['risk_level']
@@ -140,58 +234,50 @@ class ReportGenerator:
         story.append(Spacer(1, 12))
         
         # Explanation
-        explanation_title = "Explanation:"
-        story.append(Paragraph(explanation_title, self.styles['Heading3']))
+        story.append(self._fragment('explanation_title'))
         
         explanation_text = risk_assessment['explanation']
-        story.append(Paragraph(explanation_text, self.styles['Normal']))
+        story.append(self._patient_text(explanation_text))
         story.append(Spacer(1, 12))
         
         # Pregnancy Week Analysis
         if 'pregnancy_week_risks' in risk_assessment:
-            week_analysis_title = "Pregnancy Week Analysis"
-            story.append(Paragraph(week_analysis_title, self.styles['SectionHeader']))
+            story.append(self._fragment('week_analysis_title'))
             
             pregnancy_week = risk_assessment.get('pregnancy_week', 'N/A')
             week_text = f"Current Gestational Age: {pregnancy_week} weeks"
             story.append(Paragraph(week_text, self.styles['Normal']))
             
             for risk in risk_assessment['pregnancy_week_risks']:
-                story.append(Paragraph(f"• {risk}", self.styles['Normal']))
+                story.append(self._patient_text(risk, "•"))
             story.append(Spacer(1, 15))
         
         # Medical Assessment Summary
-        assessment_title = "Medical Assessment Summary"
-        story.append(Paragraph(assessment_title, self.styles['SectionHeader']))
+        story.append(self._fragment('assessment_title'))
         
         # Patient responses
-        responses_title = "Patient Responses:"
-        story.append(Paragraph(responses_title, self.styles['Heading3']))
+        story.append(self._fragment('responses_title'))
         
         questions = report_data.get('questions', [])
         responses = report_data.get('responses', [])
         
         for i, (question, response) in enumerate(zip(questions, responses), 1):
             if i > 1:  # Skip patient info context
-                q_text = f"Q{i-1}: {question}"
-                story.append(Paragraph(q_text, self.styles['Normal']))
-                a_text = f"A{i-1}: {response}"
-                story.append(Paragraph(a_text, self.styles['Normal']))
+                story.append(self._patient_text(question, f"Q{i-1}:"))
+                story.append(self._patient_text(response, f"A{i-1}:"))
                 story.append(Spacer(1, 8))
         
         story.append(Spacer(1, 15))
         
         # Recommendations
-        recommendations_title = "Clinical Recommendations:"
-        story.append(Paragraph(recommendations_title, self.styles['Heading3']))
+        story.append(self._fragment('recommendations_title'))
         
         recommendations_text = risk_assessment['recommendations']
-        story.append(Paragraph(recommendations_text, self.styles['Normal']))
+        story.append(self._patient_text(recommendations_text))
         story.append(Spacer(1, 15))
         
         # Next Steps
-        next_steps_title = "Next Steps:"
-        story.append(Paragraph(next_steps_title, self.styles['Heading3']))
+        story.append(self._fragment('next_steps_title'))
         
         next_steps = self._get_next_steps(risk_assessment, 'en')  # Always get English next steps
         for step in next_steps:
@@ -200,52 +286,33 @@ class ReportGenerator:
         
         # Urgent care warning if needed
         if risk_assessment.get('urgent_care_needed', False):
-            urgent_text = "⚠️ URGENT: This assessment indicates immediate medical attention is required."
-            urgent_para = Paragraph(urgent_text, self.styles['HighRisk'])
-            story.append(urgent_para)
+            story.append(self._fragment('urgent_warning'))
             story.append(Spacer(1, 20))
         
         # Questions and Responses section
-        qa_section_title = "Assessment Questions and Responses"
-        story.append(Paragraph(qa_section_title, self.styles['SectionHeader']))
+        story.append(self._fragment('qa_section_title'))
         
         # Create Q&A table
         qa_data = []
         for i, (question, response) in enumerate(zip(report_data['questions'], report_data['responses'])):
-            qa_data.append([f"Q{i+1}:", question])
-            qa_data.append(["A:", response])
+            qa_data.append([f"Q{i+1}:", self._patient_text(question) if is_arabic(question) else question])
+            qa_data.append(["A:", self._patient_text(response) if is_arabic(response) else response])
             qa_data.append(["", ""])  # Empty row for spacing
         
         if qa_data:
             qa_table = Table(qa_data, colWidths=[1*inch, 5*inch])
-            qa_table.setStyle(TableStyle([
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 0), (-1, -1), 10),
-                ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                ('LEFTPADDING', (0, 0), (-1, -1), 0),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 0),
-                ('TOPPADDING', (0, 0), (-1, -1), 6),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-            ]))
+            qa_table.setStyle(QA_TABLE_STYLE)
             story.append(qa_table)
         
         story.append(Spacer(1, 30))
         
         # Disclaimer
-        disclaimer_title = "Important Disclaimer:"
-        story.append(Paragraph(disclaimer_title, self.styles['Heading3']))
-        
-        disclaimer_text = """This assessment is for informational purposes only and should not replace professional medical advice. 
-        Always consult with your healthcare provider for proper medical evaluation and treatment."""
-        
-        story.append(Paragraph(disclaimer_text, self.styles['Normal']))
+        story.append(self._fragment('disclaimer_title'))
+        story.append(self._fragment('disclaimer'))
         
         # Footer
         story.append(Spacer(1, 30))
-        footer_text = "Generated by GraviLog Smart Risk Analysis Agent"
-        footer = Paragraph(footer_text, self.styles['Normal'])
-        story.append(footer)
+        story.append(self._fragment('footer'))
         
         # Build PDF
         doc.build(story)
@@ -292,10 +359,10 @@ class ReportGenerator:
         
         return steps
     
-    def generate_json_report(self, report_data: Dict[str, Any]) -> str:
-        """Generate JSON report for API consumption"""
+    def build_json_report(self, report_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the JSON report structure shared by single and bulk exports"""
         
-        json_report = {
+        return {
             'report_id': f"risk_assessment_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
             'timestamp': report_data['timestamp'],
             'language': report_data['language'],
@@ -318,5 +385,16 @@ class ReportGenerator:
                 'system_version': '1.0'
             }
         }
+    
+    def generate_json_report(self, report_data: Dict[str, Any]) -> str:
+        """Generate JSON report for API consumption"""
         
+        json_report = self.build_json_report(report_data)
         return json.dumps(json_report, indent=2, ensure_ascii=False)
+    
+    def generate_ndjson_record(self, report_data: Dict[str, Any], **extra: Any) -> str:
+        """Generate a compact single-line JSON report for bulk NDJSON exports"""
+        
+        record = dict(extra)
+        record['report'] = self.build_json_report(report_data)
+        return json.dumps(record, ensure_ascii=False, separators=(',', ':'))
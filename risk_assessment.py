@@ -3,7 +3,8 @@ Rule-based risk assessment for pregnancy health
 Fallback when AI systems are unavailable
 """
 import logging
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
+from core.metrics import RULE_ASSESSMENT_LATENCY
 from medical_knowledge import get_risk_keywords
 
 logger = logging.getLogger(__name__)
@@ -11,12 +12,23 @@ logger = logging.getLogger(__name__)
 class RiskAssessment:
     """Rule-based risk assessment using keyword matching"""
     
-    def __init__(self):
+    def __init__(self, knowledge_store=None):
         self.risk_keywords = get_risk_keywords()
+        # Optional KnowledgeStore whose current snapshot supplies the keyword tables
+        self.knowledge_store = knowledge_store
         
-    def assess_risk(self, responses: List[Dict], language: str = "en") -> Dict[str, Any]:
+    @RULE_ASSESSMENT_LATENCY.timed()
+    def assess_risk(self, responses: List[Dict], language: str = "en",
+                    gestational_week: Optional[int] = None) -> Dict[str, Any]:
         """Assess pregnancy risk based on responses using rule-based logic"""
         
+        # One keyword table for the whole call, even if a new version is swapped in meanwhile;
+        # with a known gestational week, the trimester's re-weighted table
+        if self.knowledge_store:
+            risk_keywords = self.knowledge_store.current.view_for(gestational_week).risk_keywords
+        else:
+            risk_keywords = self.risk_keywords
+        
         risk_score = 0
         risk_factors = []
         detected_conditions = []
@@ -28,7 +40,7 @@ class RiskAssessment:
             combined_text += " " + answer
         
         # Check for high-risk keywords
-        for keyword in self.risk_keywords["high"]:
+        for keyword in risk_keywords["high"]:
             if keyword.lower() in combined_text:
                 risk_score += 3
                 if language == "ar":
@@ -37,7 +49,7 @@ class RiskAssessment:
                     risk_factors.append(f"High-risk symptom: {keyword}")
         
         # Check for medium-risk keywords
-        for keyword in self.risk_keywords["medium"]:
+        for keyword in risk_keywords["medium"]:
             if keyword.lower() in combined_text:
                 risk_score += 2
                 if language == "ar":
@@ -46,7 +58,7 @@ class RiskAssessment:
                     risk_factors.append(f"Medium-risk symptom: {keyword}")
         
         # Check for low-risk keywords
-        for keyword in self.risk_keywords["low"]:
+        for keyword in risk_keywords["low"]:
             if keyword.lower() in combined_text:
                 risk_score += 1
                 if language == "ar":
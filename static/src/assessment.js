@@ -0,0 +1,241 @@
+let sessionId = null;
+let currentLanguage = 'en';
+let currentPhase = 'patient_info';
+let patientInfoStep = 0;
+let currentQuestionIndex = 0;
+let totalQuestions = 0;
+let translations = {};
+
+// Initialize page
+document.addEventListener('DOMContentLoaded', async function() {
+    const urlParams = new URLSearchParams(window.location.search);
+    sessionId = urlParams.get('session_id');
+
+    if (!sessionId) {
+        window.location.href = '/';
+        return;
+    }
+
+    await loadCurrentQuestion();
+    setupEventListeners();
+});
+
+function setupEventListeners() {
+    // Patient info input
+    document.getElementById('answer-input').addEventListener('input', function() {
+        const hasText = this.value.trim().length > 0;
+        document.getElementById('next-btn').disabled = !hasText;
+    });
+
+    // Medical questions input
+    document.getElementById('medical-answer-input').addEventListener('input', function() {
+        const hasText = this.value.trim().length > 0;
+        document.getElementById('medical-next-btn').disabled = !hasText;
+        document.getElementById('complete-btn').disabled = !hasText;
+    });
+
+    // Next button for patient info
+    document.getElementById('next-btn').addEventListener('click', submitPatientInfo);
+
+    // Next button for medical questions
+    document.getElementById('medical-next-btn').addEventListener('click', submitMedicalAnswer);
+
+    // Complete button
+    document.getElementById('complete-btn').addEventListener('click', submitMedicalAnswer);
+}
+
+async function loadCurrentQuestion() {
+    try {
+        const response = await fetch(`/question/${sessionId}`);
+        const data = await response.json();
+
+        if (data.completed) {
+            window.location.href = `/results/${sessionId}`;
+            return;
+        }
+
+        currentLanguage = data.language || 'en';
+        translations = data.translations || {};
+
+        if (data.phase === 'patient_info') {
+            handlePatientInfoPhase(data);
+        } else if (data.phase === 'medical_questions') {
+            handleMedicalQuestionsPhase(data);
+        }
+
+        // Set RTL for Arabic and update placeholders and button text
+        if (currentLanguage === 'ar') {
+            document.body.classList.add('rtl');
+            document.getElementById('answer-input').placeholder = translations.placeholder_answer || 'اكتبي إجابتك هنا...';
+            document.getElementById('medical-answer-input').placeholder = translations.placeholder_symptoms || 'يرجى وصف الأعراض بالتفصيل...';
+            document.querySelector('#loading p').textContent = translations.processing_text || 'جاري معالجة معلوماتك...';
+            document.getElementById('next-btn').textContent = translations.next_button || 'التالي';
+            document.getElementById('medical-next-btn').textContent = translations.next_question_button || 'السؤال التالي';
+            document.getElementById('complete-btn').textContent = translations.complete_button || 'إنهاء التقييم';
+        } else {
+            document.getElementById('answer-input').placeholder = translations.placeholder_answer || 'Type your answer here...';
+            document.getElementById('medical-answer-input').placeholder = translations.placeholder_symptoms || 'Please describe your symptoms in detail...';
+            document.querySelector('#loading p').textContent = translations.processing_text || 'Processing your information...';
+            document.getElementById('next-btn').textContent = translations.next_button || 'Next';
+            document.getElementById('medical-next-btn').textContent = translations.next_question_button || 'Next Question';
+            document.getElementById('complete-btn').textContent = translations.complete_button || 'Complete Assessment';
+        }
+
+    } catch (error) {
+        console.error('Error loading question:', error);
+        showError('Failed to load question. Please try again.');
+    }
+}
+
+function handlePatientInfoPhase(data) {
+    currentPhase = 'patient_info';
+    patientInfoStep = data.step || 0;
+
+    document.getElementById('patient-info-section').style.display = 'block';
+    document.getElementById('medical-questions-section').style.display = 'none';
+
+    document.getElementById('question-text').textContent = data.question;
+    document.getElementById('phase-indicator').textContent = translations.patient_info_title || 'Patient Information';
+
+    // Update progress (patient info is 50% of total)
+    const progress = (patientInfoStep / 2) * 50;
+    document.getElementById('progress-fill').style.width = progress + '%';
+
+    document.getElementById('answer-input').value = '';
+    document.getElementById('next-btn').disabled = true;
+}
+
+function handleMedicalQuestionsPhase(data) {
+    currentPhase = 'medical_questions';
+    currentQuestionIndex = data.question_number - 1 || 0;
+    totalQuestions = data.total_questions || 5;
+
+    document.getElementById('patient-info-section').style.display = 'none';
+    document.getElementById('medical-questions-section').style.display = 'block';
+
+    // Show patient info summary
+    const patientInfo = data.patient_info || {};
+    document.getElementById('patient-name').textContent = patientInfo.name || '-';
+    document.getElementById('patient-age').textContent = patientInfo.age || '-';
+    document.getElementById('patient-week').textContent = patientInfo.pregnancy_week || '-';
+
+    document.getElementById('medical-question-text').textContent = data.question;
+    document.getElementById('phase-indicator').textContent = translations.medical_questions_title || 'Medical Assessment';
+
+    // Update progress (50% for patient info + 50% for medical questions)
+    const medicalProgress = (currentQuestionIndex / totalQuestions) * 50;
+    const totalProgress = 50 + medicalProgress;
+    document.getElementById('progress-fill').style.width = totalProgress + '%';
+
+    // Show appropriate button
+    if (currentQuestionIndex >= totalQuestions - 1) {
+        document.getElementById('medical-next-btn').style.display = 'none';
+        document.getElementById('complete-btn').style.display = 'inline-block';
+    } else {
+        document.getElementById('medical-next-btn').style.display = 'inline-block';
+        document.getElementById('complete-btn').style.display = 'none';
+    }
+
+    document.getElementById('medical-answer-input').value = '';
+    document.getElementById('medical-next-btn').disabled = true;
+    document.getElementById('complete-btn').disabled = true;
+}
+
+async function submitPatientInfo() {
+    const answer = document.getElementById('answer-input').value.trim();
+    if (!answer) return;
+
+    showLoading(true);
+
+    try {
+        const formData = new FormData();
+        formData.append('info_value', answer);
+
+        const response = await fetch(`/patient-info/${sessionId}`, {
+            method: 'POST',
+            body: formData
+        });
+
+        const data = await response.json();
+
+        if (data.error) {
+            showError(data.error);
+            showLoading(false);
+            return;
+        }
+
+        if (data.patient_info_complete) {
+            // Move to medical questions
+            setTimeout(() => {
+                loadCurrentQuestion();
+                showLoading(false);
+            }, 1000);
+        } else {
+            // Continue with next patient info question
+            document.getElementById('question-text').textContent = data.next_question;
+            patientInfoStep = data.step;
+
+            // Update progress
+            const progress = (patientInfoStep / 2) * 50;
+            document.getElementById('progress-fill').style.width = progress + '%';
+
+            document.getElementById('answer-input').value = '';
+            document.getElementById('next-btn').disabled = true;
+            showLoading(false);
+        }
+
+    } catch (error) {
+        console.error('Error submitting patient info:', error);
+        showError('Failed to submit information. Please try again.');
+        showLoading(false);
+    }
+}
+
+async function submitMedicalAnswer() {
+    const answer = document.getElementById('medical-answer-input').value.trim();
+    if (!answer) return;
+
+    showLoading(true);
+
+    try {
+        const formData = new FormData();
+        formData.append('answer', answer);
+
+        const response = await fetch(`/answer/${sessionId}`, {
+            method: 'POST',
+            body: formData
+        });
+
+        const data = await response.json();
+
+        if (data.completed || data.redirect_to_results) {
+            window.location.href = `/results/${sessionId}`;
+        } else {
+            // Load next question
+            setTimeout(() => {
+                loadCurrentQuestion();
+                showLoading(false);
+            }, 1000);
+        }
+
+    } catch (error) {
+        console.error('Error submitting answer:', error);
+        showError('Failed to submit answer. Please try again.');
+        showLoading(false);
+    }
+}
+
+function showLoading(show) {
+    document.getElementById('loading').style.display = show ? 'block' : 'none';
+    document.getElementById('content').style.opacity = show ? '0.5' : '1';
+}
+
+function showError(message) {
+    const errorElement = document.getElementById('error-message');
+    errorElement.textContent = message;
+    errorElement.style.display = 'block';
+
+    setTimeout(() => {
+        errorElement.style.display = 'none';
+    }, 5000);
+}
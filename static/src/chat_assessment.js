@@ -0,0 +1,397 @@
+const sessionId = new URLSearchParams(window.location.search).get('session_id');
+const language = document.documentElement.lang;
+const translations = JSON.parse(document.getElementById('translations-data').textContent);
+
+let currentStep = 'patient_info';
+let patientInfoStep = 'name';
+let questionIndex = 0;
+let conversationComplete = false;
+
+// Persistent conversation channel; the HTTP endpoints are used whenever it is down
+let socket = null;
+let socketReady = false;
+let pendingQuestion = null;
+let reconnectDelay = 1000;
+
+const chatMessages = document.getElementById('chatMessages');
+const messageInput = document.getElementById('messageInput');
+const sendButton = document.getElementById('sendButton');
+const typingIndicator = document.getElementById('typingIndicator');
+const chatForm = document.getElementById('chatForm');
+const scrollToBottomBtn = document.getElementById('scrollToBottom');
+
+// Auto-resize textarea
+messageInput.addEventListener('input', function() {
+    this.style.height = 'auto';
+    this.style.height = this.scrollHeight + 'px';
+});
+
+// Scroll detection for showing/hiding scroll-to-bottom button
+chatMessages.addEventListener('scroll', function() {
+    const isAtBottom = chatMessages.scrollTop + chatMessages.clientHeight >= chatMessages.scrollHeight - 100;
+    if (isAtBottom) {
+        scrollToBottomBtn.classList.remove('show');
+    } else {
+        scrollToBottomBtn.classList.add('show');
+    }
+});
+
+// Scroll to bottom button functionality
+scrollToBottomBtn.addEventListener('click', function() {
+    chatMessages.scrollTo({
+        top: chatMessages.scrollHeight,
+        behavior: 'smooth'
+    });
+});
+
+// Add message to chat
+function addMessage(content, isUser = false, showAvatar = true) {
+    const messageDiv = document.createElement('div');
+    messageDiv.className = `message ${isUser ? 'user' : 'ai'}`;
+
+    const avatarDiv = showAvatar ? `<div class="avatar ${isUser ? 'user' : 'ai'}">${isUser ? 'U' : 'AI'}</div>` : '';
+    const contentDiv = `<div class="message-content">${content}</div>`;
+
+    if (isUser) {
+        messageDiv.innerHTML = contentDiv + avatarDiv;
+    } else {
+        messageDiv.innerHTML = avatarDiv + contentDiv;
+    }
+
+    chatMessages.appendChild(messageDiv);
+
+    // Force scroll to bottom immediately and with timeout for mobile
+    requestAnimationFrame(() => {
+        chatMessages.scrollTop = chatMessages.scrollHeight;
+        setTimeout(() => {
+            chatMessages.scrollTop = chatMessages.scrollHeight;
+        }, 50);
+        setTimeout(() => {
+            chatMessages.scrollTo({
+                top: chatMessages.scrollHeight,
+                behavior: 'smooth'
+            });
+        }, 100);
+    });
+}
+
+// Show typing indicator
+function showTyping() {
+    typingIndicator.style.display = 'block';
+    // Force scroll to bottom for mobile
+    requestAnimationFrame(() => {
+        chatMessages.scrollTop = chatMessages.scrollHeight;
+        setTimeout(() => {
+            chatMessages.scrollTop = chatMessages.scrollHeight;
+        }, 50);
+    });
+}
+
+// Hide typing indicator
+function hideTyping() {
+    typingIndicator.style.display = 'none';
+}
+
+// Send message
+async function sendMessage(message) {
+    if (!message.trim()) return;
+
+    addMessage(message, true);
+    messageInput.value = '';
+    messageInput.style.height = 'auto';
+    sendButton.disabled = true;
+    sendButton.classList.add('loading');
+    showTyping();
+
+    try {
+        if (currentStep === 'patient_info') {
+            await handlePatientInfo(message);
+        } else if (currentStep === 'questions') {
+            await handleQuestionAnswer(message);
+        }
+    } catch (error) {
+        console.error('Error:', error);
+        hideTyping();
+        addMessage(`<div class="error-message">${translations.error_message || 'Sorry, there was an error. Please try again.'}</div>`);
+        sendButton.disabled = false;
+        sendButton.classList.remove('loading');
+    }
+}
+
+// Handle patient information
+async function handlePatientInfo(message) {
+    const response = await fetch(`/patient-info/${sessionId}`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/x-www-form-urlencoded' },
+        body: `info_value=${encodeURIComponent(message)}`
+    });
+
+    const data = await response.json();
+    hideTyping();
+
+    if (data.next_step === 'questions') {
+        currentStep = 'questions';
+        addMessage(data.message);
+        await loadNextQuestion();
+    } else {
+        addMessage(data.message);
+    }
+
+    sendButton.disabled = false;
+    sendButton.classList.remove('loading');
+}
+
+// Connect (or reconnect) the conversation socket; the server resumes by session id
+function connectSocket() {
+    if (!('WebSocket' in window) || conversationComplete) return;
+
+    const protocol = window.location.protocol === 'https:' ? 'wss' : 'ws';
+    socket = new WebSocket(`${protocol}://${window.location.host}/ws/${sessionId}`);
+
+    socket.addEventListener('open', function() {
+        socketReady = true;
+        reconnectDelay = 1000;
+    });
+
+    socket.addEventListener('message', function(event) {
+        handleSocketMessage(JSON.parse(event.data));
+    });
+
+    socket.addEventListener('close', function() {
+        socketReady = false;
+        // A pending question stays pending: the reconnect's state frame resumes it
+        if (!conversationComplete) {
+            setTimeout(connectSocket, reconnectDelay);
+            reconnectDelay = Math.min(reconnectDelay * 2, 30000);
+        }
+    });
+}
+
+function handleSocketMessage(message) {
+    switch (message.type) {
+        case 'ping':
+            socket.send(JSON.stringify({ type: 'pong' }));
+            break;
+        case 'state':
+            // Reconnected mid-question: ask for the current question again
+            if (pendingQuestion) {
+                socket.send(JSON.stringify({ type: 'resume' }));
+            }
+            break;
+        case 'answer_ack':
+            if (message.status === 'success') {
+                hideTyping();
+                addMessage(message.message);
+                showTyping();
+            } else if (pendingQuestion) {
+                pendingQuestion.reject(new Error(message.message));
+                pendingQuestion = null;
+            }
+            break;
+        case 'question':
+            if (pendingQuestion) {
+                pendingQuestion.resolve(message);
+                pendingQuestion = null;
+            }
+            break;
+        case 'error':
+            console.error('Conversation socket error:', message.message);
+            break;
+    }
+}
+
+// Send a message over the socket and wait for the next question it produces
+function requestQuestion(payload) {
+    return new Promise((resolve, reject) => {
+        pendingQuestion = { resolve, reject };
+        socket.send(JSON.stringify(payload));
+    });
+}
+
+// Handle question answers: one round trip records the answer and returns the next question
+async function handleQuestionAnswer(message) {
+    if (socketReady) {
+        const next = await requestQuestion({ type: 'answer', answer: message });
+        hideTyping();
+        showQuestion(next);
+        sendButton.disabled = false;
+        sendButton.classList.remove('loading');
+        return;
+    }
+
+    const response = await fetch(`/turn/${sessionId}`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/x-www-form-urlencoded' },
+        body: `answer=${encodeURIComponent(message)}`
+    });
+
+    const data = await response.json();
+    hideTyping();
+
+    if (data.status === 'complete') {
+        conversationComplete = true;
+        addMessage(data.message + '<br><br><button class="results-button" onclick="viewResults()">' + 
+                 (translations.view_results || 'View Results') + '</button>');
+        sendButton.disabled = true;
+        messageInput.disabled = true;
+    } else {
+        addMessage(data.message);
+        if (data.next) {
+            showQuestion(data.next);
+        } else {
+            await loadNextQuestion();
+        }
+    }
+
+    sendButton.disabled = false;
+    sendButton.classList.remove('loading');
+}
+
+// Load next question
+async function loadNextQuestion() {
+    if (conversationComplete) return;
+
+    showTyping();
+    let data;
+    if (socketReady) {
+        data = await requestQuestion({ type: 'next' });
+    } else {
+        const response = await fetch(`/question/${sessionId}`);
+        data = await response.json();
+    }
+    hideTyping();
+
+    showQuestion(data);
+}
+
+// Show a question payload, or the completion message when the assessment is ready
+function showQuestion(data) {
+    if (conversationComplete) return;
+
+    if (data.question) {
+        addMessage(data.question);
+    } else {
+        conversationComplete = true;
+        addMessage((translations.assessment_complete || 'Assessment complete!') + 
+                  '<br><br><button class="results-button" onclick="viewResults()">' + 
+                  (translations.view_results || 'View Results') + '</button>');
+        sendButton.disabled = true;
+        messageInput.disabled = true;
+    }
+}
+
+// View results
+function viewResults() {
+    window.location.href = `/results/${sessionId}`;
+}
+
+// Form submission
+chatForm.addEventListener('submit', function(e) {
+    e.preventDefault();
+    if (!sendButton.disabled) {
+        sendMessage(messageInput.value);
+    }
+});
+
+// Enter key handling
+messageInput.addEventListener('keydown', function(e) {
+    if (e.key === 'Enter' && !e.shiftKey) {
+        e.preventDefault();
+        if (!sendButton.disabled) {
+            sendMessage(this.value);
+        }
+    }
+});
+
+// Mobile keyboard handling
+function handleMobileKeyboard() {
+    if (window.innerWidth <= 768) {
+        let initialViewportHeight = window.innerHeight;
+
+        messageInput.addEventListener('focus', function() {
+            // Adjust for virtual keyboard
+            setTimeout(() => {
+                const currentHeight = window.innerHeight;
+                const keyboardHeight = initialViewportHeight - currentHeight;
+
+                if (keyboardHeight > 150) {
+                    // Keyboard is open
+                    document.body.style.height = currentHeight + 'px';
+                    chatMessages.scrollTo({
+                        top: chatMessages.scrollHeight,
+                        behavior: 'smooth'
+                    });
+                }
+            }, 300);
+        });
+
+        messageInput.addEventListener('blur', function() {
+            // Restore original height when keyboard closes
+            setTimeout(() => {
+                document.body.style.height = '100vh';
+                chatMessages.scrollTo({
+                    top: chatMessages.scrollHeight,
+                    behavior: 'smooth'
+                });
+            }, 300);
+        });
+
+        // Prevent zoom on iOS
+        messageInput.addEventListener('touchstart', function(e) {
+            messageInput.style.fontSize = '16px';
+        });
+
+        // Handle viewport changes
+        window.addEventListener('resize', function() {
+            setTimeout(() => {
+                chatMessages.scrollTo({
+                    top: chatMessages.scrollHeight,
+                    behavior: 'smooth'
+                });
+            }, 100);
+        });
+    }
+}
+
+// Ensure input area is always visible on mobile
+function ensureInputVisible() {
+    if (window.innerWidth <= 768) {
+        const inputContainer = document.querySelector('.chat-input-container');
+        if (inputContainer) {
+            inputContainer.style.position = 'fixed';
+            inputContainer.style.bottom = '0';
+            inputContainer.style.left = '0';
+            inputContainer.style.right = '0';
+            inputContainer.style.zIndex = '1000';
+
+            // Add padding to messages container
+            const messagesContainer = document.querySelector('.chat-messages');
+            if (messagesContainer) {
+                messagesContainer.style.paddingBottom = '80px';
+            }
+        }
+    }
+}
+
+// Initialize conversation
+window.addEventListener('load', function() {
+    handleMobileKeyboard();
+    ensureInputVisible();
+    connectSocket();
+
+    setTimeout(() => {
+        showTyping();
+        setTimeout(() => {
+            hideTyping();
+            const greeting = (translations && translations.welcome_message) || 
+                           'Hello! I\'m your pregnancy health assistant. Let\'s start with some basic information.';
+            const nameQuestion = (translations && translations.enter_name) || 'What is your name?';
+            addMessage(greeting + '<br><br>' + nameQuestion);
+        }, 1000);
+    }, 500);
+});
+
+// Handle window resize for mobile orientation changes
+window.addEventListener('resize', function() {
+    ensureInputVisible();
+});
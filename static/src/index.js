@@ -0,0 +1,23 @@
+async function startSession(language) {
+    document.getElementById('loading').style.display = 'block';
+
+    try {
+        const formData = new FormData();
+        formData.append('language', language);
+
+        const response = await fetch('/start-session', {
+            method: 'POST',
+            body: formData
+        });
+
+        const data = await response.json();
+
+        if (data.session_id) {
+            window.location.href = `/assessment?session_id=${data.session_id}`;
+        }
+    } catch (error) {
+        console.error('Error starting session:', error);
+        alert('Error starting assessment. Please try again.');
+        document.getElementById('loading').style.display = 'none';
+    }
+}
@@ -0,0 +1,83 @@
+// The page shell is cached per language; session data is loaded separately
+const sessionId = window.location.pathname.split('/').pop();
+const language = document.documentElement.lang;
+
+async function loadResults() {
+    try {
+        const response = await fetch(`/results-data/${sessionId}`);
+        if (!response.ok) {
+            throw new Error(`Status ${response.status}`);
+        }
+        const data = await response.json();
+
+        document.getElementById('urgent-warning').style.display = data.urgent_care_needed ? 'block' : 'none';
+        document.getElementById('risk-assessment').classList.add(`risk-level-${data.risk_level_class}`);
+        document.getElementById('risk-value').textContent = data.risk_level;
+        document.getElementById('explanation').textContent = data.explanation;
+        document.getElementById('recommendations').textContent = data.recommendations.join(' ');
+
+        const container = document.getElementById('questions-responses');
+        data.questions_and_responses.forEach((item, i) => {
+            const qaItem = document.createElement('div');
+            qaItem.className = 'qa-item';
+
+            const question = document.createElement('div');
+            question.className = language === 'ar' ? 'qa-question arabic' : 'qa-question';
+            question.textContent = `Q${i + 1}: ${item.question}`;
+
+            const answer = document.createElement('div');
+            answer.className = language === 'ar' ? 'qa-answer arabic' : 'qa-answer';
+            answer.textContent = `A: ${item.answer}`;
+
+            qaItem.appendChild(question);
+            qaItem.appendChild(answer);
+            container.appendChild(qaItem);
+        });
+    } catch (error) {
+        console.error('Error loading results:', error);
+        const errorMsg = language === 'ar' ? 'خطأ في تحميل النتائج. يرجى المحاولة مرة أخرى.' : 'Error loading results. Please try again.';
+        document.getElementById('explanation').textContent = errorMsg;
+    }
+}
+
+async function generateReport() {
+    const btn = document.getElementById('generate-btn');
+    const loading = document.getElementById('loading');
+
+    btn.disabled = true;
+    loading.style.display = 'block';
+
+    try {
+        const response = await fetch(`/generate-report/${sessionId}`);
+
+        if (response.ok) {
+            const blob = await response.blob();
+            const url = window.URL.createObjectURL(blob);
+            const a = document.createElement('a');
+            a.href = url;
+            a.download = `EMR_Report_${sessionId}.pdf`;
+            document.body.appendChild(a);
+            a.click();
+            window.URL.revokeObjectURL(url);
+            document.body.removeChild(a);
+
+            // Show success message
+            const successMsg = language === 'ar' ? 'تم تحميل التقرير بنجاح' : 'Report downloaded successfully';
+            alert(successMsg);
+        } else {
+            const errorText = await response.text();
+            console.error('Server response:', errorText);
+            const errorMsg = language === 'ar' ? 'خطأ في إنشاء التقرير. يرجى المحاولة مرة أخرى.' : 'Error generating report. Please try again.';
+            alert(errorMsg);
+        }
+    } catch (error) {
+        console.error('Error generating report:', error);
+        const errorMsg = language === 'ar' ? 'خطأ في الاتصال. يرجى المحاولة مرة أخرى.' : 'Connection error. Please try again.';
+        alert(errorMsg);
+    } finally {
+        btn.disabled = false;
+        loading.style.display = 'none';
+    }
+}
+
+document.addEventListener('DOMContentLoaded', loadResults);
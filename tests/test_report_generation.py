@@ -0,0 +1,72 @@
+"""
+PDF reports for completed English and Arabic sessions, through session_to_report_data and /generate-report
+"""
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+import report_generator
+from core.admission import AdmissionController
+from core.analytics_export import session_to_report_data
+from report_generator import ReportGenerator
+from risk_assessment import RiskAssessment
+
+ANSWERS = {
+    "en": ["I have some bleeding and a bad headache", "My vision is blurry", "I feel tired"],
+    "ar": ["لدي نزيف وصداع شديد", "تغيرات في الرؤية", "أشعر بتعب"]
+}
+
+def completed_session(language: str) -> dict:
+    responses = [{"question": f"Q{i}", "answer": answer} for i, answer in enumerate(ANSWERS[language], 1)]
+    return {
+        "id": f"session_test_{language}",
+        "language": language,
+        "patient_info": {"name": "Test Patient", "age": 30, "gestational_week": 24},
+        "responses": responses,
+        "risk_assessment": RiskAssessment().assess_risk(responses, language),
+        "created_at": main.datetime.now()
+    }
+
+@pytest.mark.parametrize("language", ["en", "ar"])
+def test_report_data_is_renderable(language):
+    session = completed_session(language)
+    data = session_to_report_data(session)
+
+    assert data["risk_assessment"]["risk_level"] in ("High", "Medium", "Low")
+    assert isinstance(data["risk_assessment"]["recommendations"], str)
+    assert data["patient_info"]["pregnancy_week"] == 24
+    assert ReportGenerator().generate_pdf_report(data).startswith(b"%PDF")
+
+def test_arabic_assessment_text_is_shaped(monkeypatch):
+    data = session_to_report_data(completed_session("ar"))
+    data["risk_assessment"]["pregnancy_week_risks"] = ["خطر تسمم الحمل"]
+
+    shaped = []
+    def record(text):
+        shaped.append(text)
+        return text
+    monkeypatch.setattr(report_generator, "prepare_pdf_text", record)
+
+    assert ReportGenerator().generate_pdf_report(data).startswith(b"%PDF")
+    assert data["risk_assessment"]["explanation"] in shaped
+    assert data["risk_assessment"]["recommendations"] in shaped
+    assert "خطر تسمم الحمل" in shaped
+
+@pytest.mark.parametrize("language", ["en", "ar"])
+def test_generate_report_endpoint(language, monkeypatch):
+    # Rule-based assessment, and no per-client limit for the single test client
+    main.rag_system.override(None)
+    monkeypatch.setattr(main, "admission", AdmissionController(client_rate=0, session_rate=0))
+    client = TestClient(main.app)
+
+    session_id = client.post("/start-session", data={"language": language}).json()["session_id"]
+    client.post(f"/patient-info/{session_id}", data={"name": "Test Patient", "age": 30, "gestational_week": 24})
+    for answer in ANSWERS[language]:
+        assert client.get(f"/question/{session_id}").status_code == 200
+        assert client.post(f"/submit-answer/{session_id}", data={"answer": answer}).json()["status"] == "success"
+    assert client.get(f"/assess-risk/{session_id}").status_code == 200
+
+    response = client.get(f"/generate-report/{session_id}")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/pdf"
+    assert response.content.startswith(b"%PDF")